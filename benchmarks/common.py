@@ -0,0 +1,10 @@
+"""Parameters and data shared by the benchmarks."""
+
+import numpy as np
+
+# Rounds of the benchmarks going through Qt, which take milliseconds and are measured a fixed number of times
+QT_ROUNDS = 20
+
+
+def random_xy(rng: np.random.Generator, count: int, width: int = 1920, height: int = 1080) -> np.ndarray:
+    return np.stack([rng.integers(0, width, count), rng.integers(0, height, count)], axis=1).astype(np.int32)
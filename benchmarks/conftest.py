@@ -0,0 +1,32 @@
+"""Benchmark suite of scoopick, run with pytest-benchmark on Qt's offscreen platform.
+
+It is not part of the tests, so it has to be selected explicitly. Compare with the checked-in baselines:
+
+    pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-compare
+
+Baselines are machine-specific, but only keyed by OS, Python implementation and version, so the checked-in ones
+are just a reference from the machine that recorded them. Record a baseline on your own machine first, with
+`--benchmark-save=baseline` in a separate storage directory, and compare with that one, adding
+`--benchmark-compare-fail=median:25%` to fail on regressions.
+Set QT_QPA_PLATFORM=xcb to run under Xvfb, where captures go through a real X server.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture(scope="session")
+def rng() -> np.random.Generator:
+    return np.random.default_rng(0)
@@ -0,0 +1,88 @@
+"""Timing precision and throughput of ActionQueue, compared with a loop of `time.sleep` calls.
+
+Events are sent to a RecordingBackend, so nothing actually moves the mouse.
+
+    python benchmarks/input_timing.py --actions 200 --interval 0.005
+    python benchmarks/input_timing.py --json input_timing.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from scoopick.actions import MOVE, ActionQueue, InputEvent, RecordingBackend
+
+
+def sleep_loop(actions: int, interval: float) -> "list[float]":
+    """Times at which the events are sent by the hand-written approach of the examples."""
+    backend = RecordingBackend()
+    for i in range(actions):
+        backend.send([InputEvent(MOVE, (i, i))])
+        time.sleep(interval)
+    return [timestamp for timestamp, _ in backend.batches]
+
+
+def action_queue(actions: int, interval: float, batching: bool = False) -> "list[float]":
+    backend = RecordingBackend()
+    with ActionQueue(backend, interval=interval, batching=batching) as queue:
+        for i in range(actions):
+            queue.move((i, i))
+        queue.run()
+    return [timestamp for timestamp, _ in backend.batches]
+
+
+def timing(timestamps: "list[float]", interval: float) -> dict:
+    """Lateness of each event relative to a perfect schedule starting at the first one, in milliseconds."""
+    lateness = [(t - timestamps[0] - i * interval) * 1000 for i, t in enumerate(timestamps)]
+    steps = [(b - a) * 1000 for a, b in zip(timestamps, timestamps[1:])]
+    return {
+        "drift_ms": lateness[-1],
+        "max_lateness_ms": max(lateness),
+        "step_mean_ms": statistics.fmean(steps) if steps else 0.0,
+        "step_stdev_ms": statistics.pstdev(steps) if steps else 0.0,
+    }
+
+
+def throughput(actions: int, batching: bool) -> float:
+    """Events per second when no delay is asked between them."""
+    start = time.perf_counter()
+    timestamps = action_queue(actions, 0.0, batching)
+    return actions / (time.perf_counter() - start) if timestamps else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=200, help="number of moves in each sequence")
+    parser.add_argument("--interval", type=float, default=0.005, help="delay between two moves, in seconds")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = {
+        "sleep": timing(sleep_loop(args.actions, args.interval), args.interval),
+        "action_queue": timing(action_queue(args.actions, args.interval), args.interval),
+        "throughput": {
+            "unbatched_per_s": throughput(args.actions * 10, batching=False),
+            "batched_per_s": throughput(args.actions * 10, batching=True),
+        },
+    }
+    for name in ("sleep", "action_queue"):
+        result = results[name]
+        print(
+            f"{name}: drift {result['drift_ms']:.2f} ms after {args.actions} actions, "
+            f"max lateness {result['max_lateness_ms']:.2f} ms, "
+            f"step {result['step_mean_ms']:.3f} ± {result['step_stdev_ms']:.3f} ms"
+        )
+    print(
+        f"throughput: {results['throughput']['unbatched_per_s']:.0f} events/s, "
+        f"{results['throughput']['batched_per_s']:.0f} events/s batched"
+    )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Cold-start benchmark of scoopick, based on `python -X importtime`.
+
+Each scenario is imported in a fresh interpreter, so nothing is cached between runs.
+
+    python benchmarks/startup.py --repeat 5
+    python benchmarks/startup.py --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Statement executed for each scenario
+SCENARIOS = {
+    "library": "from scoopick.data import Point; from scoopick.core import ScreenImage",
+    "headless": "from scoopick.cli import main; from scoopick.runner import ScriptRunner",
+    "gui": "from scoopick.app import App",
+}
+
+
+def parse_importtime(stderr: str) -> "list[tuple[str, int, int]]":
+    """Module, nesting depth and cumulative import time in microseconds of each line of `-X importtime`."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, module = line.split("|", 2)
+        # Modules are indented by two spaces per nesting level, after the separator's own space
+        name = module[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        imports.append((name.strip(), depth, int(cumulative)))
+    return imports
+
+
+def measure(statement: str) -> "list[tuple[str, int, int]]":
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, env=env, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def run_scenario(statement: str, repeat: int, top: int) -> dict:
+    runs = [measure(statement) for _ in range(repeat)]
+    # Top-level imports already include the time of everything they import
+    totals = [sum(cumulative for _, depth, cumulative in run if depth == 0) for run in runs]
+    slowest = sorted(runs[-1], key=lambda item: item[2], reverse=True)[:top]
+    return {
+        "statement": statement,
+        "total_ms": statistics.median(totals) / 1000,
+        "min_ms": min(totals) / 1000,
+        "slowest": [{"module": module, "cumulative_ms": cumulative / 1000} for module, _, cumulative in slowest],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run among {', '.join(SCENARIOS)}, all by default")
+    parser.add_argument("--repeat", type=int, default=3, help="number of cold starts per scenario")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to show")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = result = run_scenario(SCENARIOS[name], args.repeat, args.top)
+        print(f"{name}: {result['total_ms']:.1f} ms (median of {args.repeat}, min {result['min_ms']:.1f} ms)")
+        for entry in result["slowest"]:
+            print(f"    {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+from PySide6.QtCore import QRect
+
+from scoopick.screenshot import grab
+
+from .common import QT_ROUNDS
+
+
+def test_capture_full_frame(benchmark, qapp):
+    frame = benchmark.pedantic(grab, rounds=QT_ROUNDS, warmup_rounds=2)
+    assert not frame.is_null
+
+
+def test_capture_region(benchmark, qapp):
+    region = QRect(100, 100, 200, 150)
+    frame = benchmark.pedantic(grab, args=(region,), rounds=QT_ROUNDS, warmup_rounds=2)
+    assert frame.size == (200, 150)
+
+
+def test_capture_to_array(benchmark, qapp):
+    def capture():
+        return grab().as_array()
+
+    array = benchmark.pedantic(capture, rounds=QT_ROUNDS, warmup_rounds=2)
+    assert array.ndim == 3
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from scoopick.data import Point, PointSet
+from scoopick.model import PointsModel
+
+from .common import QT_ROUNDS, random_xy
+
+SIZES = [1_000, 100_000]
+
+
+def make_points(rng: np.random.Generator, count: int) -> PointSet:
+    return PointSet.from_arrays(random_xy(rng, count), rng.integers(0, 256, (count, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_add_points(benchmark, qapp, rng, count):
+    points = make_points(rng, count).to_points()
+
+    def setup():
+        return (PointsModel([]), points), {}
+
+    benchmark.pedantic(lambda model, points: model.add_points(points), setup=setup, rounds=QT_ROUNDS)
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_update_positions(benchmark, qapp, rng, count):
+    model = PointsModel(make_points(rng, count))
+    moved = [Point(idx=i, x=x, y=y) for i, (x, y) in enumerate(random_xy(rng, count).tolist())]
+    benchmark.pedantic(model.update_positions, args=(moved,), rounds=QT_ROUNDS, warmup_rounds=1)
+    assert model.points.xy[-1].tolist() == [moved[-1].x, moved[-1].y]
+
+
+@pytest.mark.parametrize("count", SIZES)
+@pytest.mark.parametrize("pattern", ["range", "scattered"])
+def test_remove_points(benchmark, qapp, rng, count, pattern):
+    points = make_points(rng, count)
+    # Half of the points, either as one contiguous range or every other row
+    rows = list(range(count // 2)) if pattern == "range" else list(range(0, count, 2))
+
+    def setup():
+        return (PointsModel(points), rows), {}
+
+    benchmark.pedantic(lambda model, rows: model.remove_points(rows), setup=setup, rounds=QT_ROUNDS)
+
+
+@pytest.mark.parametrize("count", SIZES)
+def test_nearest_point(benchmark, qapp, rng, count):
+    model = PointsModel(make_points(rng, count))
+    model.nearest_point(0, 0)
+    queries = random_xy(rng, 100).tolist()
+
+    def query():
+        return [model.nearest_point(x, y, 20) for x, y in queries]
+
+    assert len(benchmark(query)) == 100
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from scoopick.data import PointSet
+from scoopick.model import PointsModel
+
+from .common import QT_ROUNDS, random_xy
+
+SIZES = [1_000, 20_000]
+
+
+@pytest.fixture(params=SIZES, ids=str)
+def model(request, qapp, rng) -> PointsModel:
+    count = request.param
+    return PointsModel(PointSet.from_arrays(random_xy(rng, count), rng.integers(0, 256, (count, 3), dtype=np.uint8)))
+
+
+def test_save_points(benchmark, model, tmp_path):
+    path = str(tmp_path / "points.json")
+    benchmark.pedantic(model.to_file, args=(path,), rounds=QT_ROUNDS, warmup_rounds=1)
+
+
+def test_load_points(benchmark, model, tmp_path):
+    path = str(tmp_path / "points.json")
+    model.to_file(path)
+    loaded = PointsModel()
+    assert benchmark.pedantic(loaded.load_from_file, args=(path,), rounds=QT_ROUNDS, warmup_rounds=1)
+    assert len(loaded.points) == len(model.points)
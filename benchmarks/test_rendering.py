@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.data import PointSet
+from scoopick.model import PointsModel
+from scoopick.widgets import CrosshairOverlay, ScreenshotViewer
+
+from .common import QT_ROUNDS, random_xy
+
+# Colors of the points, so that the crosshairs are painted in a few groups like in practice
+PALETTE = np.array([(0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0)], dtype=np.uint8)
+
+
+def make_pixmap(width: int = 1920, height: int = 1080) -> QPixmap:
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor(40, 40, 40))
+    return pixmap
+
+
+@pytest.fixture
+def viewer(qapp) -> ScreenshotViewer:
+    viewer = ScreenshotViewer()
+    viewer.resize(960, 540)
+    viewer.set_pixmap(make_pixmap())
+    return viewer
+
+
+def test_paint_fitted(benchmark, viewer):
+    viewer.grab()
+    benchmark.pedantic(viewer.grab, rounds=QT_ROUNDS, warmup_rounds=1)
+
+
+def test_paint_zoomed(benchmark, viewer):
+    viewer.zoom_to(8)
+    viewer.grab()
+    benchmark.pedantic(viewer.grab, rounds=QT_ROUNDS, warmup_rounds=1)
+
+
+def test_set_screenshot(benchmark, viewer):
+    """New screenshot shown rescaled to the viewer: mipmaps and tiles are rebuilt."""
+    # Alternate between two screenshots, since showing the same one again is a no-op
+    pixmaps = itertools.cycle([make_pixmap(), make_pixmap()])
+
+    def show():
+        viewer.set_pixmap(next(pixmaps))
+        return viewer.grab()
+
+    benchmark.pedantic(show, rounds=QT_ROUNDS, warmup_rounds=1)
+
+
+@pytest.mark.parametrize("count", [10, 1_000, 10_000])
+def test_paint_crosshairs(benchmark, viewer, rng, count):
+    colors = PALETTE[rng.integers(0, len(PALETTE), count)]
+    overlay = CrosshairOverlay(PointsModel(PointSet.from_arrays(random_xy(rng, count), colors)), viewer)
+    overlay.grab()
+    benchmark.pedantic(overlay.grab, rounds=QT_ROUNDS, warmup_rounds=1)
@@ -0,0 +1,41 @@
+import pytest
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.core import ScreenImage
+
+from .common import random_xy
+
+
+@pytest.fixture(scope="module")
+def frame(qapp) -> ScreenImage:
+    pixmap = QPixmap(1920, 1080)
+    pixmap.fill(QColor(10, 20, 30))
+    frame = ScreenImage(pixmap)
+    # Convert once, like any frame sampled more than once
+    frame.as_array()
+    return frame
+
+
+@pytest.mark.parametrize("count", [10, 1_000, 100_000])
+def test_get_pixel_colors(benchmark, frame, rng, count):
+    xy = random_xy(rng, count)
+    colors = benchmark(frame.get_pixel_colors, xy)
+    assert colors.shape == (count, 3)
+
+
+@pytest.mark.parametrize("count", [10, 1_000])
+def test_get_pixel_color_loop(benchmark, frame, rng, count):
+    points = [tuple(point) for point in random_xy(rng, count).tolist()]
+
+    def sample():
+        return [frame.get_pixel_color(point) for point in points]
+
+    assert len(benchmark(sample)) == count
+
+
+def test_first_conversion(benchmark, qapp):
+    pixmap = QPixmap(1920, 1080)
+    pixmap.fill(QColor(10, 20, 30))
+    # A new frame each round, so that the conversion is not cached
+    array = benchmark.pedantic(lambda: ScreenImage(pixmap).as_array(), rounds=50, warmup_rounds=2)
+    assert array.shape == (1080, 1920, 3)
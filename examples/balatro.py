@@ -2,14 +2,14 @@ import time
 from logging import getLogger
 from typing import TYPE_CHECKING
 
-from pyautogui import pixel
 from pynput.mouse import Button, Controller
 
+from scoopick.core import Palette
+
 if TYPE_CHECKING:
     from typing import Callable
 
-    from PySide6.QtGui import QPixmap
-
+    from scoopick.core import ScreenImage
     from scoopick.data import Point
 
 logger = getLogger("scoopick")
@@ -17,7 +17,12 @@ logger = getLogger("scoopick")
 
 class BalatroRunner:
 
-    def __init__(self, points: "list[Point]"):
+    def __init__(
+        self,
+        points: "list[Point]",
+        capture_screenshot: "Callable[..., ScreenImage]",
+        wait_until_stable: "Callable[..., bool]",
+    ):
         # Position of the skip icons
         self.skip_1_icon_pos = points[0].to_tuple()
         self.skip_2_icon_pos = points[1].to_tuple()
@@ -71,12 +76,26 @@ class BalatroRunner:
         self.arcane_pack_color = (125, 96, 224)
         # Color of the tarot skip 2
         self.arcane_pack_color_dark = (93, 89, 155)
+        # Anything too far from the tarot color is a legendary card
+        self.tarot_palette = Palette({"tarot": self.tarot_color}, threshold=10)
+        self.arcane_pack_palette = Palette(
+            {"arcane_pack": self.arcane_pack_color, "arcane_pack_dark": self.arcane_pack_color_dark}, threshold=9
+        )
 
         self.mouse = Controller()
+        self.capture_screenshot = capture_screenshot
+        self.wait_until_stable = wait_until_stable
+
+    # Color of a single pixel, capturing only that pixel instead of the whole screen
+    def pixel(self, x: int, y: int) -> "tuple[int, int, int]":
+        return self.capture_screenshot(region=(x, y, 1, 1)).get_pixel_color((x, y))
 
-    # Distance between two colors
-    def dist(self, p0: "tuple[int, int, int]", p1: "tuple[int, int, int]") -> int:
-        return abs(p0[0] - p1[0]) + abs(p0[1] - p1[1]) + abs(p0[2] - p1[2])
+    # Wait for the animations to end, instead of sleeping for a fixed time.
+    # The background shader and the card wobble never stop, so watch a small box around the options button,
+    # which stays on screen and only moves during transitions, and tolerate the shader's slight color drift
+    def wait_for_animations(self, settle_ms: int = 300, timeout: float = 10):
+        x, y = self.options_btn_pos
+        self.wait_until_stable(region=(x - 8, y - 8, 16, 16), settle_ms=settle_ms, timeout=timeout, threshold=24)
 
     # After opening an arcane pack, look for the legendary card
     def select_arcane_card(self):
@@ -85,16 +104,16 @@ class BalatroRunner:
             time.sleep(0.5)
             self.mouse.position = card_pos
             time.sleep(0.1)
-            color = pixel(icon_pos[0], icon_pos[1])
+            color = self.pixel(icon_pos[0], icon_pos[1])
             # print(color)
-            if self.dist(color, self.tarot_color) > 10:
+            if self.tarot_palette.match(color).label is None:
                 print("Legendary card found!")
                 self.mouse.click(Button.left)
                 time.sleep(1)
                 self.mouse.position = use_pos
                 time.sleep(0.1)
                 self.mouse.click(Button.left)
-                time.sleep(10)
+                self.wait_for_animations(settle_ms=1000, timeout=15)
                 return
         print("No legendary card found")
 
@@ -111,18 +130,18 @@ class BalatroRunner:
         self.mouse.position = self.play_btn_pos
         time.sleep(0.1)
         self.mouse.click(Button.left)
-        time.sleep(2)
+        self.wait_for_animations()
         print("New game")
 
     def click_arcane_pack(self):
         time.sleep(1)
-        skip_1_pixel = pixel(self.skip_1_icon_pos[0], self.skip_1_icon_pos[1])
-        skip_2_pixel = pixel(self.skip_2_icon_under_pos[0], self.skip_2_icon_under_pos[1])
+        skip_1_pixel = self.pixel(self.skip_1_icon_pos[0], self.skip_1_icon_pos[1])
+        skip_2_pixel = self.pixel(self.skip_2_icon_under_pos[0], self.skip_2_icon_under_pos[1])
 
         print("Skip 1 and 2 pixels")
         # print(skip_1_pixel, skip_2_pixel)
-        has_first = self.dist(skip_1_pixel, self.arcane_pack_color) < 10
-        has_second = self.dist(skip_2_pixel, self.arcane_pack_color_dark) < 10
+        has_first = self.arcane_pack_palette.match(skip_1_pixel).label == "arcane_pack"
+        has_second = self.arcane_pack_palette.match(skip_2_pixel).label == "arcane_pack_dark"
 
         if has_first or has_second:
 
@@ -131,7 +150,7 @@ class BalatroRunner:
             time.sleep(0.1)
             self.mouse.click(Button.left)
             print("Skip 1")
-            time.sleep(2.5)
+            self.wait_for_animations()
 
             if has_first:
                 print("Skip 1 is a booster pack")
@@ -151,7 +170,7 @@ class BalatroRunner:
             time.sleep(0.1)
             self.mouse.click(Button.left)
             print("Skip 2")
-            time.sleep(2.5)
+            self.wait_for_animations()
 
             if has_second:
                 print("Skip 2 is a booster pack")
@@ -167,9 +186,13 @@ class BalatroRunner:
         self.reset_game()
 
 
-def run(points: "list[Point]", capture_screenshot: "Callable[[], QPixmap]"):
+def run(
+    points: "list[Point]",
+    capture_screenshot: "Callable[..., ScreenImage]",
+    wait_until_stable: "Callable[..., bool]",
+):
     logger.info("Waiting 10 sec")
     time.sleep(10)
-    balatro = BalatroRunner(points)
+    balatro = BalatroRunner(points, capture_screenshot, wait_until_stable)
     while True:
         balatro.click_arcane_pack()
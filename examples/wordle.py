@@ -6,6 +6,9 @@ from typing import TYPE_CHECKING
 
 from pynput.keyboard import Controller, Key
 
+from scoopick.core import Palette
+from scoopick.screenshot import points_bounding_rect
+
 file_path = os.path.dirname(os.path.realpath(__file__))
 sys.path.append(file_path)
 
@@ -21,8 +24,7 @@ from wordle_solver.wordle_solver import Solver
 if TYPE_CHECKING:
     from typing import Callable
 
-    from PySide6.QtGui import QPixmap
-
+    from scoopick.core import ScreenImage
     from scoopick.data import Point
 
 
@@ -32,45 +34,40 @@ logger = getLogger("scoopick")
 class WordleRunner:
     INITIAL_WORD = "SLATE"
 
-    def __init__(self, points: "list[Point]", capture_screenshot: "Callable[[], QPixmap]"):
+    def __init__(
+        self,
+        points: "list[Point]",
+        capture_screenshot: "Callable[..., ScreenImage]",
+        wait_for_change: "Callable[..., bool]",
+        wait_until_stable: "Callable[..., bool]",
+    ):
         self.points = [points[i * 5 : (i + 1) * 5] for i in range(6)]
-        self.gray = (50, 50, 50)
-        self.green = (83, 141, 78)
-        self.yellow = (181, 159, 59)
+        # Color of the tiles for letters not in the word, in the right spot and in the wrong spot
+        self.palette = Palette({"_": (50, 50, 50), "g": (83, 141, 78), "y": (181, 159, 59)})
         self.keyboard = Controller()
         self.solver = Solver()
         self.current_try = 0
         self.capture_screenshot = capture_screenshot
+        self.wait_for_change = wait_for_change
+        self.wait_until_stable = wait_until_stable
         self.last_screenshot = None
 
-    # Distance between two colors
-    def dist(self, p0: "tuple[int, int, int]", p1: "tuple[int, int, int]") -> int:
-        return abs(p0[0] - p1[0]) + abs(p0[1] - p1[1]) + abs(p0[2] - p1[2])
-
     def submit_word(self, word: str):
         for letter in word:
             self.keyboard.press(letter)
             self.keyboard.release(letter)
             time.sleep(0.1)
+        row = points_bounding_rect(self.points[self.current_try])
         self.keyboard.press(Key.enter)
         self.keyboard.release(Key.enter)
-        time.sleep(3)  # Wait for the result to show up
+        # Wait for the tiles of the row to start flipping and then to settle on the result
+        self.wait_for_change(region=row, timeout=3)
+        self.wait_until_stable(region=row, settle_ms=300)
 
     def get_feedback(self) -> "list[str]":
-        feedback = []
-        screenshot = self.capture_screenshot()
-        for point in self.points[self.current_try]:
-            x, y = point.x, point.y
-            color = screenshot.toImage().pixelColor(x, y).getRgb()[:3]
-            logger.debug(f"Getting pixel color at ({x}, {y}): {color}")
-            distances = tuple(self.dist(color, c) for c in (self.gray, self.green, self.yellow))
-            min_dist = min(distances)
-            if min_dist == distances[0]:
-                feedback.append("_")
-            elif min_dist == distances[1]:
-                feedback.append("g")
-            else:
-                feedback.append("y")
+        points = self.points[self.current_try]
+        screenshot = self.capture_screenshot(region=points_bounding_rect(points))
+        feedback = [label for label, _ in self.palette.classify(screenshot, points)]
         self.current_try += 1
         return feedback
 
@@ -91,7 +88,12 @@ class WordleRunner:
                 return
 
 
-def run(points: "list[Point]", capture_screenshot: "Callable[[], QPixmap]"):
+def run(
+    points: "list[Point]",
+    capture_screenshot: "Callable[..., ScreenImage]",
+    wait_for_change: "Callable[..., bool]",
+    wait_until_stable: "Callable[..., bool]",
+):
     logger.debug("Waiting 3 sec")
     time.sleep(3)
-    WordleRunner(points, capture_screenshot).run()
+    WordleRunner(points, capture_screenshot, wait_for_change, wait_until_stable).run()
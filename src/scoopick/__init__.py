@@ -3,8 +3,13 @@
 Expose a small API and package version.
 """
 
-import importlib.metadata
-
 PACKAGE_NAME = "scoopick"
 
-__version__ = importlib.metadata.version(PACKAGE_NAME)
+
+def __getattr__(name: str):
+    # importlib.metadata is slow to import, and the version is rarely needed
+    if name == "__version__":
+        import importlib.metadata
+
+        return importlib.metadata.version(PACKAGE_NAME)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,7 +2,15 @@
 
 import sys
 
-from .app import main
+from .cli import main
+
+
+def ui():
+    """Launch the GUI, ignoring any subcommand."""
+    from .app import main as gui_main
+
+    return gui_main()
+
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,400 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple, Sequence
+
+from .data import PACKAGE_NAME, Point, PointView
+
+if TYPE_CHECKING:
+    from PySide6.QtCore import QRect
+
+logger = getLogger(PACKAGE_NAME)
+
+# Kinds of InputEvent
+MOVE = "move"
+BUTTON_DOWN = "button_down"
+BUTTON_UP = "button_up"
+KEY_DOWN = "key_down"
+KEY_UP = "key_up"
+
+# Below this delay, the scheduler stops sleeping and spins until the deadline, in seconds
+_SPIN_THRESHOLD = 0.002
+# Longest sleep between two checks of an external cancel token, in seconds
+_CANCEL_POLL_INTERVAL = 0.05
+
+
+class InputEvent(NamedTuple):
+    """Single input sent to a backend.
+
+    `value` is the (x, y) screen position for MOVE, the button name ("left", "right", "middle") for BUTTON_DOWN
+    and BUTTON_UP, and the key for KEY_DOWN and KEY_UP: a single character or a key name like "enter".
+    """
+
+    kind: str
+    value: Any
+
+
+class ActionReport(NamedTuple):
+    """How a sequence of actions went. Lateness is how long after their scheduled time steps were sent, in seconds."""
+
+    events: int
+    batches: int
+    duration: float
+    mean_lateness: float
+    max_lateness: float
+    cancelled: bool
+
+
+class InputBackend:
+    """Sends input events to the system."""
+
+    def send(self, events: "Sequence[InputEvent]"):
+        """Send events in order. Several events are given at once when the queue batches them."""
+        raise NotImplementedError
+
+
+class RecordingBackend(InputBackend):
+    """Backend that only records the events it receives, with the time they arrived, e.g. for tests."""
+
+    def __init__(self):
+        self.batches: list[tuple[float, tuple[InputEvent, ...]]] = []
+
+    def send(self, events: "Sequence[InputEvent]"):
+        self.batches.append((time.perf_counter(), tuple(events)))
+
+    @property
+    def events(self) -> "list[InputEvent]":
+        return [event for _, batch in self.batches for event in batch]
+
+
+class PynputBackend(InputBackend):
+    """Backend controlling the real mouse and keyboard with pynput, which must be installed.
+
+    Positions are in screen coordinates, the device pixels of the screenshots, and are converted to the logical
+    coordinates of the OS with the layout of the screens at the creation of the backend.
+    """
+
+    def __init__(self, screens: "list[tuple[QRect, float]] | None" = None):
+        """
+        Args:
+            screens: logical geometry and device pixel ratio of each screen, from `screenshot.screen_geometries`.
+                The current ones if None, in which case the backend must be created on the GUI thread.
+        """
+        # pynput is an optional dependency, only needed when actions are actually sent
+        from pynput import keyboard, mouse
+
+        from .screenshot import screen_geometries, to_global
+
+        screens = screen_geometries() if screens is None else screens
+        self._to_global = lambda position: to_global(position, screens)
+
+        self._keyboard_module = keyboard
+        self._buttons = {"left": mouse.Button.left, "right": mouse.Button.right, "middle": mouse.Button.middle}
+        self._mouse = mouse.Controller()
+        self._keyboard = keyboard.Controller()
+
+    def _key(self, key: str):
+        if len(key) == 1:
+            return key
+        try:
+            return getattr(self._keyboard_module.Key, key)
+        except AttributeError:
+            raise ValueError(f"Unknown key '{key}'") from None
+
+    def send(self, events: "Sequence[InputEvent]"):
+        for kind, value in events:
+            if kind == MOVE:
+                self._mouse.position = self._to_global(value)
+            elif kind == BUTTON_DOWN:
+                self._mouse.press(self._buttons[value])
+            elif kind == BUTTON_UP:
+                self._mouse.release(self._buttons[value])
+            elif kind == KEY_DOWN:
+                self._keyboard.press(self._key(value))
+            elif kind == KEY_UP:
+                self._keyboard.release(self._key(value))
+
+
+class _Step(NamedTuple):
+    # Time at which the events are sent, in seconds since the start of the sequence
+    offset: float
+    events: "tuple[InputEvent, ...]"
+
+
+def _position(point: "Point | PointView | tuple[int, int]") -> "tuple[int, int]":
+    return point.to_tuple() if isinstance(point, (Point, PointView)) else (int(point[0]), int(point[1]))
+
+
+class ActionQueue:
+    """Sequence of mouse and keyboard actions, executed on a dedicated thread.
+
+    Actions are added with the chainable methods below, and sent by `run` or `submit`.
+    The input thread is started by the first submitted sequence, and stops once none is pending.
+    Each action is scheduled at a fixed offset from the start of the sequence, measured on a monotonic clock,
+    so the delays do not drift the way consecutive `time.sleep` calls do. The scheduler sleeps until shortly
+    before each deadline, then spins until it is reached.
+
+    With `batching`, the events due at the same time, e.g. the press and release of a click, are sent to the
+    backend in a single call.
+    """
+
+    def __init__(
+        self,
+        backend: "InputBackend | None" = None,
+        interval: float = 0.0,
+        batching: bool = False,
+        cancel_token=None,
+        screens: "list[tuple[QRect, float]] | None" = None,
+    ):
+        """
+        Args:
+            backend: where the events are sent. A PynputBackend is created on first use if None.
+            interval: delay added after each action, in seconds.
+            batching: send the events due at the same time in a single call to the backend.
+            cancel_token: object with a `cancelled` attribute, e.g. the CancelToken of a script,
+                stopping the actions when set.
+            screens: layout of the screens given to the PynputBackend, from `screenshot.screen_geometries`.
+                If None, it is read here, so the queue must then be created on the GUI thread.
+        """
+        if backend is None and screens is None:
+            # The backend is created on the input thread, where Qt must not be called
+            from .screenshot import screen_geometries
+
+            screens = screen_geometries()
+        self._backend = backend
+        self._screens = screens
+        self._interval = interval
+        self._batching = batching
+        self._cancel_token = cancel_token
+        self._steps: list[_Step] = []
+        self._offset = 0.0
+        self._sequences: "queue.Queue[tuple[int, list[_Step], Future] | None]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        # Guards the input thread, which must not stop between the put of a sequence and its start
+        self._lock = threading.Lock()
+        # Sequences are numbered when submitted, and cancelling drops all those submitted so far
+        self._submitted = 0
+        self._cancelled_up_to = 0
+        self._wake = threading.Event()
+
+    @property
+    def backend(self) -> InputBackend:
+        if self._backend is None:
+            self._backend = PynputBackend(self._screens)
+        return self._backend
+
+    def _add(self, *events: InputEvent, hold: float = 0.0) -> "ActionQueue":
+        self._steps.append(_Step(self._offset, events))
+        self._offset += hold
+        return self
+
+    def _next(self) -> "ActionQueue":
+        self._offset += self._interval
+        return self
+
+    def wait(self, seconds: float) -> "ActionQueue":
+        self._offset += seconds
+        return self
+
+    def move(self, point: "Point | PointView | tuple[int, int]") -> "ActionQueue":
+        return self._add(InputEvent(MOVE, _position(point)))._next()
+
+    def click(
+        self,
+        point: "Point | PointView | tuple[int, int] | None" = None,
+        button: str = "left",
+        count: int = 1,
+        hold: float = 0.0,
+    ) -> "ActionQueue":
+        """Click at `point`, or where the mouse is if None.
+
+        Args:
+            hold: time between the press and the release of the button, in seconds.
+        """
+        if point is not None:
+            self._add(InputEvent(MOVE, _position(point)))._next()
+        for _ in range(count):
+            self._add(InputEvent(BUTTON_DOWN, button), hold=hold)
+            self._add(InputEvent(BUTTON_UP, button))
+        return self._next()
+
+    def key(self, key: str, hold: float = 0.0) -> "ActionQueue":
+        """Press and release a key, either a single character or a key name like "enter"."""
+        self._add(InputEvent(KEY_DOWN, key), hold=hold)
+        return self._add(InputEvent(KEY_UP, key))._next()
+
+    def type(self, text: str, interval: "float | None" = None) -> "ActionQueue":
+        """Type each character of `text`, `interval` seconds apart (the queue's interval by default)."""
+        interval = self._interval if interval is None else interval
+        for char in text:
+            self._add(InputEvent(KEY_DOWN, char), InputEvent(KEY_UP, char))
+            self._offset += interval
+        return self
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def submit(self) -> "Future[ActionReport]":
+        """Send the actions added so far to the input thread, and start a new sequence.
+
+        Returns:
+            Future resolved with the report of the sequence once it has been executed.
+        """
+        future: Future[ActionReport] = Future()
+        # Steps added at the same offset are merged, so that they can be sent in one batch
+        steps = self._merged() if self._batching else self._steps
+        self._steps, self._offset = [], 0.0
+        with self._lock:
+            self._submitted += 1
+            self._sequences.put((self._submitted, steps, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="scoopick-input", daemon=True)
+                self._thread.start()
+        return future
+
+    def _merged(self) -> "list[_Step]":
+        steps: list[_Step] = []
+        for step in self._steps:
+            if steps and steps[-1].offset == step.offset:
+                steps[-1] = _Step(step.offset, steps[-1].events + step.events)
+            else:
+                steps.append(step)
+        return steps
+
+    def run(self, timeout: "float | None" = None) -> ActionReport:
+        """Execute the actions added so far and wait until they have all been sent."""
+        report = self.submit().result(timeout)
+        if self._cancel_token is not None and hasattr(self._cancel_token, "check"):
+            self._cancel_token.check()
+        return report
+
+    async def run_async(self) -> ActionReport:
+        """Awaitable version of `run`, for scripts written with `async def run`."""
+        import asyncio
+
+        report = await asyncio.wrap_future(self.submit())
+        if self._cancel_token is not None and hasattr(self._cancel_token, "check"):
+            self._cancel_token.check()
+        return report
+
+    def cancel(self):
+        """Stop the sequence being executed, and drop the submitted ones. Buttons and keys held down are released."""
+        self._cancelled_up_to = self._submitted
+        self._wake.set()
+
+    def close(self):
+        """Cancel everything and stop the input thread."""
+        self.cancel()
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._sequences.put(None)
+        if thread is not None:
+            thread.join()
+
+    def __enter__(self) -> "ActionQueue":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _is_cancelled(self, sequence: int) -> bool:
+        return sequence <= self._cancelled_up_to or bool(getattr(self._cancel_token, "cancelled", False))
+
+    def _sleep_until(self, sequence: int, deadline: float) -> bool:
+        """Wait until the perf_counter reaches `deadline`. Returns False if cancelled in the meantime."""
+        while True:
+            # Only cancelling sets it. Clearing it before checking never misses a cancellation
+            self._wake.clear()
+            if self._is_cancelled(sequence):
+                return False
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return True
+            if remaining > _SPIN_THRESHOLD:
+                timeout = remaining - _SPIN_THRESHOLD
+                if self._cancel_token is not None:
+                    timeout = min(timeout, _CANCEL_POLL_INTERVAL)
+                self._wake.wait(timeout)
+            else:
+                # Yield the CPU without giving the OS a chance to oversleep
+                time.sleep(0)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                try:
+                    item = self._sequences.get_nowait()
+                except queue.Empty:
+                    # Nothing pending, the next submit starts a new thread
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+            if item is None:
+                return
+            sequence, steps, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._execute(sequence, steps))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _execute(self, sequence: int, steps: "list[_Step]") -> ActionReport:
+        # Buttons and keys currently held down, released if the sequence is cancelled or fails
+        held: dict[InputEvent, InputEvent] = {}
+        lateness: list[float] = []
+        events = batches = 0
+        backend = self.backend
+        # perf_counter is monotonic, and precise on every platform
+        start = time.perf_counter()
+        cancelled = False
+        for step in steps:
+            if not self._sleep_until(sequence, start + step.offset):
+                cancelled = True
+                break
+            lateness.append(time.perf_counter() - start - step.offset)
+            try:
+                backend.send(step.events)
+            except Exception:
+                # Part of the batch may have been sent, so release what it presses as well
+                _track_held(held, (event for event in step.events if event.kind in (BUTTON_DOWN, KEY_DOWN)))
+                _release(backend, held)
+                raise
+            events += len(step.events)
+            batches += 1
+            _track_held(held, step.events)
+        if cancelled and held:
+            logger.debug("Actions cancelled, releasing %d buttons or keys", len(held))
+            _release(backend, held)
+        return ActionReport(
+            events,
+            batches,
+            time.perf_counter() - start,
+            sum(lateness) / len(lateness) if lateness else 0.0,
+            max(lateness, default=0.0),
+            cancelled,
+        )
+
+
+def _release(backend: InputBackend, held: "dict[InputEvent, InputEvent]"):
+    # One by one, so that a release failing, e.g. for an unknown key, does not keep the others held
+    for event in held.values():
+        try:
+            backend.send((event,))
+        except Exception as e:
+            logger.warning("Failed to release %s: %s", event.value, e)
+
+
+def _track_held(held: "dict[InputEvent, InputEvent]", events: "Iterable[InputEvent]"):
+    for kind, value in events:
+        if kind == BUTTON_DOWN:
+            held[InputEvent(BUTTON_DOWN, value)] = InputEvent(BUTTON_UP, value)
+        elif kind == KEY_DOWN:
+            held[InputEvent(KEY_DOWN, value)] = InputEvent(KEY_UP, value)
+        elif kind == BUTTON_UP:
+            held.pop(InputEvent(BUTTON_DOWN, value), None)
+        elif kind == KEY_UP:
+            held.pop(InputEvent(KEY_DOWN, value), None)
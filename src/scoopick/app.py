@@ -1,15 +1,14 @@
-import importlib.util
 import sys
 
 from PySide6 import QtGui
 from PySide6.QtCore import QRect, Qt, QTimer, Slot
-from PySide6.QtGui import QMouseEvent, QPixmap, QResizeEvent
+from PySide6.QtGui import QCursor, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
     QFileDialog,
     QGroupBox,
     QHBoxLayout,
-    QLabel,
+    QProgressBar,
     QPushButton,
     QSizePolicy,
     QToolTip,
@@ -18,11 +17,21 @@ from PySide6.QtWidgets import (
 )
 
 from .core import ScreenImage
-from .data import Point
+from .data import Point, PointView
 from .model import PointsModel
+from .runner import ScriptRunner, create_runner, qt_event_loop
 from .screenshot import Screenshot
+from .script import MissingRunError, load_script
 from .util import init_logger
-from .widgets import CrosshairWidget, PointsWidget
+from .widgets import CrosshairOverlay, MetricsWidget, PointsWidget, ScreenshotViewer
+
+# Distance from the center of a crosshair within which a click picks it, in pixels of the viewer
+PICK_RADIUS = 8
+# How long stopping a script waits for it to return, in milliseconds
+STOP_TIMEOUT_MS = 2000
+
+# Runners of the scripts still running when the window was closed, kept alive until their thread ends
+_detached_runners: "set[ScriptRunner]" = set()
 
 
 class App(QWidget):
@@ -40,8 +49,17 @@ class App(QWidget):
                 triggered=QApplication.instance().quit,
             )
         )
+        self.addAction(QtGui.QAction("Stop script", self, shortcut=Qt.Key.Key_Escape, triggered=self.stop))
+        self.addAction(
+            QtGui.QAction("Reset zoom", self, shortcut=Qt.Modifier.CTRL | Qt.Key.Key_0, triggered=self.reset_zoom)
+        )
+        self.addAction(
+            QtGui.QAction("Show metrics", self, shortcut=Qt.Modifier.CTRL | Qt.Key.Key_M, triggered=self.show_metrics)
+        )
+        self._metrics_widget: MetricsWidget | None = None
 
         self._mod = None
+        self._runner: ScriptRunner | None = None
         self._screenshot = Screenshot()
         self._screenshot.screenshotted.connect(self.on_screenshotted)
 
@@ -52,13 +70,15 @@ class App(QWidget):
 
         main_layout = QVBoxLayout(self)
 
-        self._screenshot_label = QLabel(self)
-        self._screenshot_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self._screenshot_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self._screenshot_label.setStyleSheet("QLabel { border: 2px dashed gray; }")
-        self._screenshot_label.setMinimumSize(screen_geometry.width() / 8, screen_geometry.height() / 8)
-        self._screenshot_label.mousePressEvent = self._on_mouse_pressed
-        main_layout.addWidget(self._screenshot_label)
+        self._viewer = ScreenshotViewer(self)
+        self._viewer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self._viewer.setMinimumSize(screen_geometry.width() / 8, screen_geometry.height() / 8)
+        self._viewer.image_pressed.connect(self._on_image_pressed)
+        self._viewer.image_dragged.connect(self._on_image_dragged)
+        self._viewer.image_released.connect(self._on_image_released)
+        # Point being dragged on the screenshot, if any
+        self._dragged_point: int | None = None
+        main_layout.addWidget(self._viewer)
 
         points_group_box = QGroupBox("Points", self)
         points_layout = QHBoxLayout(points_group_box)
@@ -67,9 +87,7 @@ class App(QWidget):
         self._points_widget.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
         self._points_widget.setModel(self._points)
         self._points_widget.point_selected.connect(self.on_point_selected)
-        for point in self._points:
-            ch = CrosshairWidget(point, self._points, self._pixmap.pixmap, self._screenshot_label)
-            self._screenshot.screenshotted.connect(ch.on_update_screenshot)
+        self._crosshairs = CrosshairOverlay(self._points, self._viewer)
 
         points_buttons_layout = QVBoxLayout()
         # Add point button
@@ -110,55 +128,61 @@ class App(QWidget):
         self._save_button.clicked.connect(self.save_points)
         buttons_layout.addWidget(self._save_button)
         buttons_layout.addStretch()
+        self._progress_bar = QProgressBar(self)
+        self._progress_bar.setTextVisible(True)
+        self._progress_bar.hide()
+        buttons_layout.addWidget(self._progress_bar)
 
         main_layout.addLayout(buttons_layout)
 
-    def _mouse_to_screen_position(self, event: QMouseEvent):
-        if self._pixmap.is_null:
-            return -1, -1
-        x, y = event.position().toPoint().x(), event.position().toPoint().y()
-        width_label, height_label = (
-            self._screenshot_label.size().width(),
-            self._screenshot_label.size().height(),
-        )
-        width_pixmap, height_pixmap = self._pixmap.size
-        y_offset = 0
-        x_offset = 0
-        if width_label / height_label > width_pixmap / height_pixmap:
-            # black borders on left and right
-            scale = height_label / height_pixmap
-            x_offset = (width_label - width_pixmap * scale) / 2
-        else:
-            # black borders on top and bottom
-            scale = width_label / width_pixmap
-            y_offset = (height_label - height_pixmap * scale) / 2
-        x_screen = (x - x_offset) / scale
-        y_screen = (y - y_offset) / scale
-        return int(x_screen), int(y_screen)
-
     def keyPressEvent(self, event: QtGui.QKeyEvent):
         super().keyPressEvent(event)
         if event.key() in (Qt.Key.Key_Cancel, Qt.Key.Key_Delete, Qt.Key.Key_Backspace):
-            for point in self._points.selected_points:
-                self._points.update_pos(Point(point.idx, point.name, -1, -1))
-
-    def _on_mouse_pressed(self, event: QMouseEvent):
-        x_screen, y_screen = self._mouse_to_screen_position(event)
-        if not (0 <= x_screen < self._pixmap.width and 0 <= y_screen < self._pixmap.height):
-            x_screen, y_screen = -1, -1
-        for point in self._points.selected_points:
-            self._points.update_pos(Point(point.idx, point.name, x_screen, y_screen))
-        QToolTip.showText(
-            self.mapToGlobal(event.position().toPoint()),
-            f"{x_screen}, {y_screen}",
-            self,
+            self._points.update_positions(
+                Point(point.idx, point.name, -1, -1) for point in self._points.selected_points
+            )
+
+    def _pick_point(self, x_screen: int, y_screen: int) -> "PointView | None":
+        """Point whose crosshair center is under the mouse, if any."""
+        if self._pixmap.is_null or x_screen < 0 or y_screen < 0:
+            return None
+        return self._points.nearest_point(x_screen, y_screen, PICK_RADIUS / self._viewer.scale)
+
+    @Slot(int, int, object)
+    def _on_image_pressed(self, x_screen: int, y_screen: int, button: Qt.MouseButton):
+        picked = self._pick_point(x_screen, y_screen)
+        if picked is not None and button == Qt.MouseButton.LeftButton:
+            # Clicking a crosshair selects it, and keeping the button pressed drags it around
+            self._points_widget.setCurrentIndex(self._points.index(picked.idx))
+            self._dragged_point = picked.idx
+            return
+        self._points.update_positions(
+            Point(point.idx, point.name, x_screen, y_screen) for point in self._points.selected_points
         )
+        QToolTip.showText(QCursor.pos(), f"{x_screen}, {y_screen}", self)
+
+    @Slot(int, int)
+    def _on_image_dragged(self, x_screen: int, y_screen: int):
+        if self._dragged_point is None or self._dragged_point not in self._points:
+            return
+        self._points.update_pos(Point(self._dragged_point, "", x_screen, y_screen))
+
+    @Slot()
+    def _on_image_released(self):
+        self._dragged_point = None
 
-    def resizeEvent(self, event: QResizeEvent):
-        scaled_size = self._pixmap.pixmap.size()
-        scaled_size.scale(self._screenshot_label.size(), Qt.AspectRatioMode.KeepAspectRatio)
-        if scaled_size != self._screenshot_label.pixmap().size():
-            self.update_screenshot_label()
+    @Slot()
+    def reset_zoom(self):
+        self._viewer.reset_view()
+
+    @Slot()
+    def show_metrics(self):
+        if self._metrics_widget is None:
+            self._metrics_widget = MetricsWidget(self)
+            self._metrics_widget.setWindowFlag(Qt.WindowType.Window)
+            self._metrics_widget.setWindowTitle("Scoopick metrics")
+        self._metrics_widget.show()
+        self._metrics_widget.raise_()
 
     def _set_buttons_state(self, enabled: bool):
         self._play_button.setEnabled(enabled)
@@ -170,16 +194,72 @@ class App(QWidget):
 
     @Slot()
     def start(self):
+        if self._runner is not None and self._runner.running:
+            self.stop()
+            return
         self.logger.info("Starting game with %d points", len(self._points.points))
         if self._mod is None:
             self.logger.error("No script loaded. Please load a script before starting the game.")
             return
-        self.hide()
-        try:
-            self._mod.run(self._points.points, self._screenshot.screenshot_sync)
-        except Exception as e:
-            self.logger.error("Failed to run script: %s", e)
-        self.show()
+        self._screenshot.track_points(self._points.points)
+        self._runner = create_runner(self._mod.run, self._points.points, self._screenshot, self)
+        self._runner.progress.connect(self.on_script_progress)
+        self._runner.status.connect(self.on_script_status)
+        self._runner.failed.connect(lambda error: self.logger.error("Failed to run script: %s", error))
+        self._runner.finished.connect(self.on_script_finished)
+        self._play_button.setText("Stop script")
+        self._progress_bar.setRange(0, 0)
+        self._progress_bar.setFormat("")
+        self._progress_bar.show()
+        # Keep the window out of the way of the captures, but reachable to stop the script
+        self.showMinimized()
+        self._runner.start()
+
+    @Slot()
+    def stop(self):
+        self._stop_runner()
+
+    def _stop_runner(self) -> bool:
+        """Cancel the script and wait for it to return. Returns False if it is still running after the timeout."""
+        if self._runner is None or not self._runner.running:
+            return True
+        self._runner.cancel()
+        if self._runner.wait(STOP_TIMEOUT_MS):
+            return True
+        self.logger.warning("The script did not stop within %d ms", STOP_TIMEOUT_MS)
+        return False
+
+    @Slot(int, int)
+    def on_script_progress(self, done: int, total: int):
+        self._progress_bar.setRange(0, total)
+        self._progress_bar.setValue(done)
+
+    @Slot(str)
+    def on_script_status(self, text: str):
+        self._progress_bar.setFormat(text)
+        self.setWindowTitle(f"Scoopick - {text}")
+
+    @Slot()
+    def on_script_finished(self):
+        self._runner.deleteLater()
+        self._runner = None
+        self._play_button.setText("Start game")
+        self._progress_bar.hide()
+        self.setWindowTitle("Scoopick")
+        self.showMaximized()
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        runner = self._runner
+        if runner is not None:
+            # The window is going away, there is nothing to restore once the script ends
+            runner.finished.disconnect(self.on_script_finished)
+            if not self._stop_runner():
+                # Destroying a running thread along with the window would abort the process
+                runner.setParent(None)
+                _detached_runners.add(runner)
+                runner.finished.connect(lambda: _detached_runners.discard(runner))
+            self._runner = None
+        super().closeEvent(event)
 
     @Slot()
     def request_screenshot(self):
@@ -190,7 +270,7 @@ class App(QWidget):
     @Slot()
     def on_screenshotted(self, pixmap: QPixmap):
         self._pixmap.pixmap = pixmap
-        self.update_screenshot_label()
+        self._viewer.set_pixmap(pixmap)
         self._set_buttons_state(True)
         self.show()
 
@@ -198,24 +278,12 @@ class App(QWidget):
     def load_script(self):
         filepath, _ = QFileDialog.getOpenFileName(self, "Load script", "", "Python Files (*.py)")
         if filepath:
-            if "script" in sys.modules:
-                del sys.modules["script"]
-            try:
-                importlib.invalidate_caches()
-            except Exception:
-                pass
             try:
-                # Import the input file as a module
-                spec = importlib.util.spec_from_file_location("script", filepath)
-                self._mod = importlib.util.module_from_spec(spec)
-                sys.modules["script"] = self._mod
-                spec.loader.exec_module(self._mod)
-                # Check if the module has a 'run' function
-                if not hasattr(self._mod, "run") or not callable(self._mod.run):
-                    self.logger.error("The configuration file must contain a function called 'run'")
-                    self._mod = None
-                else:
-                    self.logger.info("Loaded script from file '%s'", filepath)
+                self._mod = load_script(filepath)
+                self.logger.info("Loaded script from file '%s'", filepath)
+            except MissingRunError:
+                self.logger.error("The configuration file must contain a function called 'run'")
+                self._mod = None
             except Exception as e:
                 self.logger.error("Failed to load script: %s", e)
                 self._mod = None
@@ -228,21 +296,9 @@ class App(QWidget):
     def load_points(self):
         filepath, _ = QFileDialog.getOpenFileName(self, "Load points", "", "JSON Files (*.json)")
         if filepath:
-            num_points_before = len(self._points.points)
             if not self._points.load_from_file(filepath):
                 self.logger.warning("Invalid points data format")
                 return
-            num_points_after = len(self._points.points)
-            # The excess crosshair widgets will self-destruct on layout update
-            # We just need to make sure to create new ones if we have more points than before
-            for i in range(max(num_points_after - num_points_before, 0)):
-                ch = CrosshairWidget(
-                    self._points[num_points_before + i],
-                    self._points,
-                    self._pixmap.pixmap,
-                    self._screenshot_label,
-                )
-                self._screenshot.screenshotted.connect(ch.on_update_screenshot)
             self.logger.info("Loaded points from %s", filepath)
 
     @Slot()
@@ -255,32 +311,19 @@ class App(QWidget):
     @Slot()
     def add_point(self):
         self._points.add_point()
-        ch = CrosshairWidget(
-            self._points[-1],
-            self._points,
-            self._pixmap.pixmap,
-            self._screenshot_label,
-        )
-        self._screenshot.screenshotted.connect(ch.on_update_screenshot)
 
     def screenshot(self):
         self._screenshot.screenshot()
         QApplication.beep()
 
-    def update_screenshot_label(self):
-        scaled_pixelmap = self._pixmap.pixmap.scaled(
-            self._screenshot_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
-        self._screenshot_label.setPixmap(scaled_pixelmap)
-
 
 def main():
     app = QApplication(sys.argv)
     screenshot = App()
     screenshot.showMaximized()
-    return app.exec()
+    # Run the event loop through asyncio, for async scripts to find it running
+    qt_event_loop().run_forever()
+    return 0
 
 
 if __name__ == "__main__":
@@ -1,16 +1,60 @@
 """Command-line interface for scoopick."""
 
 import argparse
+import inspect
+import logging
+import os
+import signal
+import sys
+
+from .data import PACKAGE_NAME
+
+# Exit codes of `scoopick run`
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_CANCELLED = 130
 
 
 class CliArguments(argparse.Namespace):
     """Command line arguments
 
     Args:
-        name: Name to greet.
+        command: subcommand to execute. If None, the GUI is launched.
+        script: path of the script to run.
+        points: path of the JSON file with the points passed to the script.
+        region: default capture region, either "auto", the index of a screen or "x,y,width,height".
+        iterations: number of times the script's `run` is called. 0 repeats it until interrupted.
+        offscreen: use Qt's offscreen platform, which needs no display.
+        log_level: minimum level of the log messages printed on stderr.
+        metrics: file the latency metrics are written to when the run ends, as JSON or in the Prometheus format.
+        record: file every captured frame is recorded to.
+        replay: recording whose frames are captured instead of the screens.
+        replay_speed: playback speed of the recording, 0 to return a new frame on each capture.
     """
 
-    name: str = "world"
+    command: "str | None" = None
+    script: str = ""
+    points: "str | None" = None
+    region: "str | int | None" = None
+    iterations: int = 1
+    offscreen: bool = False
+    log_level: str = "INFO"
+    metrics: "str | None" = None
+    record: "str | None" = None
+    replay: "str | None" = None
+    replay_speed: float = 1.0
+
+
+def _region(value: str) -> "str | int | tuple[int, int, int, int]":
+    if value == "auto":
+        return value
+    if value.isdigit():
+        return int(value)
+    try:
+        x, y, width, height = (int(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'auto', a screen index or 'x,y,width,height', got '{value}'")
+    return x, y, width, height
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -20,4 +64,173 @@ def build_parser() -> argparse.ArgumentParser:
         An argparse.ArgumentParser instance.
     """
     parser = argparse.ArgumentParser(prog="scoopick", description="scoopick CLI")
+    subparsers = parser.add_subparsers(dest="command")
+    run_parser = subparsers.add_parser("run", help="run a script without the GUI")
+    run_parser.add_argument("script", help="path of the script to run")
+    run_parser.add_argument("--points", help="JSON file with the points passed to the script")
+    run_parser.add_argument(
+        "--region",
+        type=_region,
+        help="default capture region: 'auto' for the bounding box of the points, the index of a screen, "
+        "or 'x,y,width,height'",
+    )
+    run_parser.add_argument(
+        "--iterations",
+        type=int,
+        default=1,
+        help="number of times the script is run, 0 to repeat it until interrupted",
+    )
+    run_parser.add_argument("--offscreen", action="store_true", help="use Qt's offscreen platform")
+    run_parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="minimum level of the log messages",
+    )
+    run_parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="record latency metrics and write them to PATH when the run ends, "
+        "in the Prometheus text format if it ends with .prom, as JSON otherwise",
+    )
+    sources = run_parser.add_mutually_exclusive_group()
+    sources.add_argument("--record", metavar="PATH", help="record every captured frame to PATH")
+    sources.add_argument("--replay", metavar="PATH", help="capture the frames of a recording instead of the screens")
+    run_parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        help="playback speed of --replay relative to the recording, 0 to return a new frame on each capture",
+    )
     return parser
+
+
+def run_headless(args: CliArguments) -> int:
+    """Run a script with only a QGuiApplication, without building any widget.
+
+    Returns:
+        The exit code of the process.
+    """
+    logger = logging.getLogger(PACKAGE_NAME)
+    logger.setLevel(args.log_level)
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    )
+    logger.addHandler(handler)
+    from .metrics import registry
+
+    recording = registry.enabled
+    registry.enabled = recording or args.metrics is not None
+    try:
+        return _run_headless(args, logger)
+    finally:
+        if args.metrics is not None:
+            registry.save(args.metrics)
+        registry.enabled = recording
+        logger.removeHandler(handler)
+
+
+def _run_headless(args: CliArguments, logger: logging.Logger) -> int:
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PySide6.QtCore import QTimer
+    from PySide6.QtGui import QGuiApplication
+
+    from .model import PointsModel
+    from .runner import create_runner
+    from .screenshot import Screenshot
+    from .script import load_script
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    try:
+        module = load_script(args.script)
+    except Exception as e:
+        logger.error("Failed to load script: %s", e)
+        return EXIT_FAILURE
+    points = PointsModel()
+    if args.points is not None and not points.load_from_file(args.points):
+        logger.error("Invalid points file '%s'", args.points)
+        return EXIT_FAILURE
+
+    if args.replay is not None:
+        from .recording import ReplaySource
+
+        try:
+            source = ReplaySource(args.replay, speed=args.replay_speed or None)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to open recording: %s", e)
+            return EXIT_FAILURE
+    elif args.record is not None:
+        from .recording import RecordingSource
+
+        try:
+            source = RecordingSource(args.record)
+        except OSError as e:
+            logger.error("Failed to create recording: %s", e)
+            return EXIT_FAILURE
+    else:
+        source = None
+    screenshot = Screenshot(source)
+    screenshot.region = args.region
+    screenshot.track_points(points.points)
+
+    state = {"iteration": 0, "exit_code": EXIT_SUCCESS, "runner": None}
+
+    def on_failed(error: str):
+        logger.error("Failed to run script: %s", error)
+        state["exit_code"] = EXIT_FAILURE
+
+    def on_cancelled():
+        state["exit_code"] = EXIT_CANCELLED
+
+    def next_iteration():
+        if state["exit_code"] != EXIT_SUCCESS or 0 < args.iterations <= state["iteration"]:
+            app.exit(state["exit_code"])
+            return
+        state["iteration"] += 1
+        logger.debug("Starting iteration %d", state["iteration"])
+        runner = create_runner(module.run, points.points, screenshot)
+        runner.failed.connect(on_failed)
+        runner.cancelled.connect(on_cancelled)
+        runner.finished.connect(next_iteration)
+        state["runner"] = runner
+        runner.start()
+
+    def interrupt(*args):
+        if state["runner"] is not None:
+            state["runner"].cancel()
+        state["exit_code"] = EXIT_CANCELLED
+
+    previous_handler = signal.signal(signal.SIGINT, interrupt)
+    # Python signal handlers only run when the interpreter gets control, so wake it up from the Qt event loop
+    wake_timer = QTimer(interval=200)
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start()
+
+    QTimer.singleShot(0, next_iteration)
+    try:
+        if not inspect.iscoroutinefunction(module.run):
+            return app.exec()
+        from .runner import qt_event_loop
+
+        # asyncio only finds the loop running when it drives the application
+        qt_event_loop().run_forever()
+        return state["exit_code"]
+    finally:
+        wake_timer.stop()
+        signal.signal(signal.SIGINT, previous_handler)
+        if source is not None:
+            source.close()
+
+
+def main(argv: "list[str] | None" = None) -> int:
+    """Entry point of the `scoopick` command."""
+    args, qt_args = build_parser().parse_known_args(argv, namespace=CliArguments())
+    if args.command == "run":
+        if qt_args:
+            build_parser().error(f"unrecognized arguments: {' '.join(qt_args)}")
+        return run_headless(args)
+    from .app import main as gui_main
+
+    return gui_main()
@@ -1 +1,6 @@
+from .diff import FrameDiff, FrameDiffer
 from .image import ScreenImage
+from .match import Anchor, Match, Template, TemplateMatcher
+from .mipmap import MipmapCache
+from .palette import METRICS, Classification, Palette
+from .wait import AsyncWaiter, Waiter, frames_differ
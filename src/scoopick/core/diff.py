@@ -0,0 +1,155 @@
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from PySide6.QtCore import QRect
+
+from ..data import Point, PointSet, as_coords
+from .image import ScreenImage
+
+# Side of the square blocks frames are compared by, in pixels
+DEFAULT_BLOCK_SIZE = 16
+
+
+class FrameDiff(NamedTuple):
+    """Changes between a frame and the previous one.
+
+    `rects` are in screen coordinates and cover every changed pixel, on a grid of blocks.
+    `points` are the rows of the tracked points that fall inside them.
+    """
+
+    rects: "list[QRect]"
+    points: np.ndarray
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.rects)
+
+
+def changed_blocks(first: np.ndarray, second: np.ndarray, block_size: int, threshold: int = 0) -> np.ndarray:
+    """Boolean (rows, columns) mask of the blocks where any channel of any pixel differs by more than `threshold`.
+
+    Args:
+        first, second: (H, W, C) uint8 arrays of the same shape.
+    """
+    if threshold == 0:
+        packed = _packed(first), _packed(second)
+        if packed[0] is not None and packed[1] is not None:
+            changed = packed[0] != packed[1]
+        else:
+            changed = (first != second).any(axis=-1)
+    else:
+        changed = np.maximum(first, second) - np.minimum(first, second) > threshold
+        packed = _packed(changed.view(np.uint8))
+        changed = packed != 0 if packed is not None else changed.any(axis=-1)
+    height, width = changed.shape
+    rows, columns = -(-height // block_size), -(-width // block_size)
+    if (rows * block_size, columns * block_size) != changed.shape:
+        padded = np.zeros((rows * block_size, columns * block_size), dtype=bool)
+        padded[:height, :width] = changed
+        changed = padded
+    # Reduce the rows of each block first, while the memory is still read in order
+    changed = np.logical_or.reduce(changed.reshape(rows, block_size, columns * block_size), axis=1)
+    return np.logical_or.reduce(changed.reshape(rows, columns, block_size), axis=2)
+
+
+def _packed(array: np.ndarray) -> "np.ndarray | None":
+    # RGBA pixels are compared as single 32 bit words, which is many times faster than reducing the channels
+    if array.shape[-1] != 4 or array.strides[-2:] != (4, 1):
+        return None
+    return array.view(np.uint32)[..., 0]
+
+
+def blocks_to_rects(blocks: np.ndarray) -> "list[tuple[int, int, int, int]]":
+    """Merge a mask of blocks into rectangles (column, row, columns, rows) covering exactly the set blocks.
+
+    Runs of consecutive blocks are found on each row, and extended downwards while the next row has the same run.
+    """
+    rects = []
+    # Runs of the previous row, by (first column, end column), with the index of their rect
+    open_runs: dict[tuple[int, int], int] = {}
+    for row, line in enumerate(blocks):
+        edges = np.flatnonzero(np.diff(line.astype(np.int8), prepend=0, append=0))
+        runs = {}
+        for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            index = open_runs.get((start, end))
+            if index is None:
+                index = len(rects)
+                rects.append([start, row, end - start, 1])
+            else:
+                rects[index][3] += 1
+            runs[(start, end)] = index
+        open_runs = runs
+    return [tuple(rect) for rect in rects]
+
+
+def points_in_rects(points: "PointSet | Iterable[Point] | np.ndarray", rects: "Iterable[QRect]") -> np.ndarray:
+    """Rows of the points inside any of the rectangles, sorted."""
+    coords = as_coords(points)
+    inside = np.zeros(len(coords), dtype=bool)
+    for rect in rects:
+        inside |= (
+            (coords[:, 0] >= rect.left())
+            & (coords[:, 0] <= rect.right())
+            & (coords[:, 1] >= rect.top())
+            & (coords[:, 1] <= rect.bottom())
+        )
+    return np.flatnonzero(inside)
+
+
+class FrameDiffer:
+    """Tells what changed on screen between consecutive captures.
+
+    Frames are compared block by block, and the changed blocks are merged into dirty rectangles,
+    so that a script can skip unchanged frames and only look again at the areas that moved.
+    The first frame, or one covering a different area than the previous frame, is entirely dirty.
+    """
+
+    def __init__(
+        self,
+        points: "PointSet | Iterable[Point] | np.ndarray | None" = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        threshold: int = 0,
+    ):
+        """
+        Args:
+            points: points to report when they fall in a dirty rectangle.
+            block_size: side of the blocks, in pixels. Smaller blocks give tighter rectangles but cost more to merge.
+            threshold: largest difference of a channel that is not considered a change.
+        """
+        if block_size <= 0:
+            raise ValueError("The block size must be positive")
+        self._points = points
+        self._block_size = block_size
+        self._threshold = threshold
+        self._previous: ScreenImage | None = None
+
+    @property
+    def block_size(self) -> int:
+        return self._block_size
+
+    def reset(self):
+        """Forget the previous frame, so that the next one is entirely dirty."""
+        self._previous = None
+
+    def update(self, frame: ScreenImage) -> FrameDiff:
+        """Compare `frame` with the previous one, and keep it for the next comparison."""
+        previous, self._previous = self._previous, frame
+        if frame.is_null:
+            rects = []
+        elif previous is None or previous.rect != frame.rect:
+            rects = [frame.rect]
+        else:
+            blocks = changed_blocks(
+                previous.as_array(alpha=True), frame.as_array(alpha=True), self._block_size, self._threshold
+            )
+            rects = [self._to_screen(frame, *rect) for rect in blocks_to_rects(blocks)]
+        points = np.empty(0, dtype=np.intp)
+        if rects and self._points is not None:
+            points = points_in_rects(self._points, rects)
+        return FrameDiff(rects, points)
+
+    def _to_screen(self, frame: ScreenImage, column: int, row: int, columns: int, rows: int) -> QRect:
+        size = self._block_size
+        rect = QRect(frame.origin[0] + column * size, frame.origin[1] + row * size, columns * size, rows * size)
+        # Blocks on the right and bottom edges may extend past the frame
+        return rect.intersected(frame.rect)
@@ -1,30 +1,133 @@
-from PySide6.QtGui import QIcon, QPixmap
+from typing import Iterable
 
-from ..data import Point
+import numpy as np
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QIcon, QImage, QPixmap
+
+from ..data import Point, PointSet, PointView, as_coords
+from ..metrics import PIXEL_SAMPLING, PIXMAP_TO_IMAGE, registry
 
 
 class ScreenImage:
-    def __init__(self, pixmap: QPixmap):
-        self._pixmap = pixmap
+    """Captured frame that can be sampled in screen coordinates.
+
+    When only a region of the screen has been captured, `origin` is the screen position
+    of the top-left pixel of the pixmap, and all sampling methods translate accordingly.
+    Any other attribute is forwarded to the underlying QPixmap.
+
+    Frames built from a QImage can be sampled on any thread, while QPixmaps must stay on the GUI thread.
+    Their pixmap is only created when requested.
+    """
+
+    def __init__(self, pixmap: "QPixmap | QImage", origin: tuple[int, int] = (0, 0)):
+        self._pixels = pixmap
+        self._pixmap = pixmap if isinstance(pixmap, QPixmap) else None
+        self._origin = origin
+        # The converted image must outlive the array, since the array is a view on its buffer
+        self._image: QImage | None = None
+        self._array: np.ndarray | None = None
+        self._cache_key: int | None = None
+
+    def _ensure_array(self) -> np.ndarray:
+        cache_key = self._pixels.cacheKey()
+        if self._array is None or self._cache_key != cache_key:
+            fmt = QImage.Format.Format_RGBA8888 if self._pixels.hasAlphaChannel() else QImage.Format.Format_RGBX8888
+            with registry.timer(PIXMAP_TO_IMAGE):
+                image = self._pixels if isinstance(self._pixels, QImage) else self._pixels.toImage()
+                image = image.convertToFormat(fmt)
+            height, width = image.height(), image.width()
+            buffer = np.frombuffer(image.constBits(), dtype=np.uint8)
+            # Rows may be padded, so slice each scanline down to the visible pixels without copying
+            self._array = buffer.reshape(height, image.bytesPerLine())[:, : width * 4].reshape(height, width, 4)
+            self._image = image
+            self._cache_key = cache_key
+        return self._array
 
-    def get_pixel_color(self, point: Point) -> QIcon:
-        if self._pixmap.isNull():
+    def as_array(self, alpha: bool = False) -> np.ndarray:
+        """Read-only (H, W, 3) RGB view of the screenshot, or (H, W, 4) RGBA if `alpha` is set.
+
+        The pixmap is converted at most once; the array shares memory with the converted image
+        and is cached until the pixmap changes.
+        """
+        if self._pixels.isNull():
+            return np.empty((0, 0, 4 if alpha else 3), dtype=np.uint8)
+        array = self._ensure_array()
+        return array if alpha else array[..., :3]
+
+    @registry.timed(PIXEL_SAMPLING, points="one")
+    def get_pixel_color(self, point: "Point | PointView | tuple[int, int]") -> QIcon:
+        if self._pixels.isNull():
             return QIcon()
-        image = self._pixmap.toImage()
-        color = image.pixelColor(point.x, point.y)
-        return color.red(), color.green(), color.blue()
+        x, y = point.to_tuple() if isinstance(point, (Point, PointView)) else point
+        x, y = x - self._origin[0], y - self._origin[1]
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0, 0, 0
+        r, g, b = self.as_array()[y, x]
+        return int(r), int(g), int(b)
+
+    @registry.timed(PIXEL_SAMPLING, points="many")
+    def get_pixel_colors(self, points: "PointSet | Iterable[Point] | np.ndarray") -> np.ndarray:
+        """Sample the RGB color of every point in a single vectorized gather.
+
+        Args:
+            points: points to sample, as a PointSet, Point objects or an (N, 2) array of (x, y) screen coordinates.
+
+        Returns:
+            An (N, 3) uint8 array of colors. Points outside the image are reported as black,
+            like `QImage.pixelColor` does.
+        """
+        coords = as_coords(points).astype(np.intp, copy=False)
+        colors = np.zeros((len(coords), 3), dtype=np.uint8)
+        if self._pixels.isNull() or len(coords) == 0:
+            return colors
+        xs, ys = coords[:, 0] - self._origin[0], coords[:, 1] - self._origin[1]
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        colors[inside] = self.as_array()[ys[inside], xs[inside]]
+        return colors
 
     @property
     def pixmap(self) -> QPixmap:
+        if self._pixmap is None:
+            self._pixmap = QPixmap.fromImage(self._pixels)
         return self._pixmap
 
     @pixmap.setter
     def pixmap(self, pixmap: QPixmap):
-        self._pixmap = pixmap
+        self._pixels = self._pixmap = pixmap
+        self._image = None
+        self._array = None
+        self._cache_key = None
+
+    @property
+    def origin(self) -> tuple[int, int]:
+        return self._origin
+
+    @origin.setter
+    def origin(self, origin: tuple[int, int]):
+        self._origin = origin
+
+    @property
+    def rect(self) -> QRect:
+        """Area of the screen covered by the image."""
+        return QRect(self._origin[0], self._origin[1], self.width, self.height)
 
     @property
     def is_null(self) -> bool:
-        return self._pixmap.isNull()
+        return self._pixels.isNull()
+
+    @property
+    def cache_key(self) -> int:
+        """Key that changes with the pixels, like `QPixmap.cacheKey`."""
+        return self._pixels.cacheKey()
+
+    def to_image(self) -> "ScreenImage":
+        """Frame holding a QImage of the pixels, which can be sent to and sampled on any thread.
+
+        Must be called on the GUI thread if the frame holds a QPixmap.
+        """
+        if isinstance(self._pixels, QImage):
+            return self
+        return ScreenImage(self._pixels.toImage(), self._origin)
 
     @property
     def size(self) -> tuple[int, int]:
@@ -32,12 +135,18 @@ class ScreenImage:
 
     @property
     def width(self) -> int:
-        if self._pixmap.isNull():
+        if self._pixels.isNull():
             return 0
-        return self._pixmap.size().width()
+        return self._pixels.width()
 
     @property
     def height(self) -> int:
-        if self._pixmap.isNull():
+        if self._pixels.isNull():
             return 0
-        return self._pixmap.size().height()
+        return self._pixels.height()
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        # Keep scripts written against the plain QPixmap returned by `capture_screenshot` working
+        return getattr(self.pixmap, name)
@@ -0,0 +1,385 @@
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage
+
+from ..data import Point, PointSet, as_coords
+from .image import ScreenImage
+
+# Score above which a template is considered found, between -1 and 1
+DEFAULT_THRESHOLD = 0.8
+# Number of pyramid levels below the full resolution
+DEFAULT_MAX_LEVELS = 3
+# Templates are never downsampled below this size, in pixels
+MIN_TEMPLATE_SIDE = 8
+# Best positions of the coarsest level that are refined
+_CANDIDATES = 4
+# Distance around a candidate searched on each finer level, in pixels of that level
+_REFINE_RADIUS = 2
+
+
+class Match(NamedTuple):
+    """Location of a template in a frame, in screen coordinates."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+    score: float
+    scale: float = 1.0
+
+    @property
+    def rect(self) -> QRect:
+        return QRect(self.x, self.y, self.width, self.height)
+
+    @property
+    def center(self) -> "tuple[int, int]":
+        return self.x + self.width // 2, self.y + self.height // 2
+
+
+def _gray(rgb: np.ndarray) -> np.ndarray:
+    # The green channel carries most of the luminance, and a view on it costs nothing
+    return rgb[..., 1]
+
+
+def _downsample(gray: np.ndarray) -> np.ndarray:
+    """Half resolution version of an image, averaging blocks of 2x2 pixels. An odd last row or column is dropped."""
+    height, width = gray.shape[0] // 2 * 2, gray.shape[1] // 2 * 2
+    gray = gray[:height, :width]
+    if gray.dtype == np.uint8:
+        # Add the four pixels as 16 bit integers, which is cheaper than converting the full resolution to floats
+        total = gray[0::2, 0::2].astype(np.uint16) + gray[1::2, 0::2] + gray[0::2, 1::2] + gray[1::2, 1::2]
+        return total.astype(np.float32) * 0.25
+    return (gray[0::2, 0::2] + gray[1::2, 0::2] + gray[0::2, 1::2] + gray[1::2, 1::2]) * 0.25
+
+
+def _resize(gray: np.ndarray, height: int, width: int) -> np.ndarray:
+    rows = np.minimum(((np.arange(height) + 0.5) * gray.shape[0] / height).astype(np.intp), gray.shape[0] - 1)
+    columns = np.minimum(((np.arange(width) + 0.5) * gray.shape[1] / width).astype(np.intp), gray.shape[1] - 1)
+    return gray[rows[:, None], columns]
+
+
+class _Level(NamedTuple):
+    # Template at one level of the pyramid, without its mean
+    centered: np.ndarray
+    norm: float
+    # Fourier transforms of the template padded to the size of the searched images, by size
+    spectra: "dict[tuple[int, int], np.ndarray]"
+
+    def spectrum(self, shape: "tuple[int, int]") -> np.ndarray:
+        spectrum = self.spectra.get(shape)
+        if spectrum is None:
+            spectrum = self.spectra[shape] = np.conj(np.fft.rfft2(self.centered, s=shape))
+        return spectrum
+
+
+class Template:
+    """Reference patch to look for in frames, e.g. a button or an icon."""
+
+    def __init__(self, image: np.ndarray, name: str = ""):
+        """
+        Args:
+            image: (H, W, 3) RGB array of the patch.
+            name: used to identify the template in logs.
+        """
+        image = np.asarray(image, dtype=np.uint8)
+        if image.ndim != 3 or image.shape[2] < 3 or min(image.shape[:2]) == 0:
+            raise ValueError(f"Expected a non-empty (H, W, 3) RGB image, got shape {image.shape}")
+        self._image = np.ascontiguousarray(image[..., :3])
+        self.name = name
+        self._levels: dict[float, list[_Level]] = {}
+
+    @classmethod
+    def from_frame(cls, frame: ScreenImage, rect: "QRect | tuple[int, int, int, int]", name: str = "") -> "Template":
+        """Copy the patch of `frame` covering `rect`, in screen coordinates."""
+        rect = QRect(*rect) if isinstance(rect, tuple) else rect
+        rect = rect.intersected(frame.rect).translated(-frame.origin[0], -frame.origin[1])
+        return cls(frame.as_array()[rect.top() : rect.bottom() + 1, rect.left() : rect.right() + 1].copy(), name)
+
+    @classmethod
+    def load(cls, path: str, name: str = "") -> "Template":
+        image = QImage(path)
+        if image.isNull():
+            raise OSError(f"Cannot read the template {path}")
+        return cls(_image_to_array(image), name)
+
+    def save(self, path: str):
+        if not _array_to_image(self._image).save(path):
+            raise OSError(f"Cannot write the template {path}")
+
+    @property
+    def image(self) -> np.ndarray:
+        return self._image
+
+    @property
+    def size(self) -> "tuple[int, int]":
+        return self._image.shape[1], self._image.shape[0]
+
+    def levels(self, scale: float, count: int) -> "list[_Level]":
+        """Pyramid of the template resized by `scale`, with at most `count` levels below the full resolution."""
+        levels = self._levels.get(scale)
+        if levels is None:
+            gray = _gray(self._image).astype(np.float32)
+            if scale != 1.0:
+                width, height = self.size
+                gray = _resize(gray, max(round(height * scale), 1), max(round(width * scale), 1))
+            levels = []
+            while True:
+                centered = gray - gray.mean()
+                levels.append(_Level(centered, float(np.sqrt((centered.astype(np.float64) ** 2).sum())), {}))
+                if min(gray.shape) < 2 * MIN_TEMPLATE_SIDE:
+                    break
+                gray = _downsample(gray)
+            self._levels[scale] = levels
+        return levels[: count + 1]
+
+
+def _image_to_array(image: QImage) -> np.ndarray:
+    image = image.convertToFormat(QImage.Format.Format_RGB888)
+    buffer = np.frombuffer(image.constBits(), dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return buffer[:, : image.width() * 3].reshape(image.height(), image.width(), 3).copy()
+
+
+def _array_to_image(array: np.ndarray) -> QImage:
+    height, width = array.shape[:2]
+    return QImage(array.tobytes(), width, height, width * 3, QImage.Format.Format_RGB888).copy()
+
+
+class _FrameLevel:
+    """Level of the pyramid of a frame, with the parts of the correlation that do not depend on the template.
+
+    They are computed when first needed, and shared by all the templates searched in the frame.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self._spectrum: np.ndarray | None = None
+        self._integrals: tuple[np.ndarray, np.ndarray] | None = None
+
+    @property
+    def shape(self) -> "tuple[int, int]":
+        return self.image.shape
+
+    @property
+    def spectrum(self) -> np.ndarray:
+        if self._spectrum is None:
+            self._spectrum = np.fft.rfft2(self.image.astype(np.float64))
+        return self._spectrum
+
+    def window_sums(self, h: int, w: int) -> "tuple[np.ndarray, np.ndarray]":
+        """Sums of the pixels and of their squares over every h x w window."""
+        if self._integrals is None:
+            image = self.image.astype(np.float64)
+            self._integrals = _integral(image), _integral(image * image)
+        return tuple(
+            integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+            for integral in self._integrals
+        )
+
+
+def _integral(image: np.ndarray) -> np.ndarray:
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    integral[1:, 1:] = image.cumsum(axis=0).cumsum(axis=1)
+    return integral
+
+
+def _ncc_map(frame_level: _FrameLevel, level: _Level) -> np.ndarray:
+    """Normalized cross-correlation of the template at every position where it fits in the frame."""
+    h, w = level.centered.shape
+    height, width = frame_level.shape
+    # The template has a zero mean, so correlating with it ignores the mean of each window
+    spectrum = frame_level.spectrum * level.spectrum(frame_level.shape)
+    numerator = np.fft.irfft2(spectrum, s=frame_level.shape)[: height - h + 1, : width - w + 1]
+    sums, squares = frame_level.window_sums(h, w)
+    denominator = np.sqrt(np.maximum(squares - sums * sums / (h * w), 0)) * level.norm
+    # Flat windows cannot be compared, and get the lowest score
+    return np.where(denominator > 1e-6, numerator / np.maximum(denominator, 1e-6), -1.0)
+
+
+def _refine(image: np.ndarray, level: _Level, x: int, y: int) -> "tuple[int, int, float]":
+    """Best position of the template, and its score, within _REFINE_RADIUS of (x, y)."""
+    h, w = level.centered.shape
+    left, top = max(x - _REFINE_RADIUS, 0), max(y - _REFINE_RADIUS, 0)
+    right = min(x + _REFINE_RADIUS, image.shape[1] - w)
+    bottom = min(y + _REFINE_RADIUS, image.shape[0] - h)
+    if left > right or top > bottom:
+        return x, y, -1.0
+    windows = sliding_window_view(image[top : bottom + h, left : right + w].astype(np.float32), (h, w))
+    numerator = np.einsum("abij,ij->ab", windows, level.centered, dtype=np.float64)
+    sums = windows.sum(axis=(2, 3), dtype=np.float64)
+    squares = np.einsum("abij,abij->ab", windows, windows, dtype=np.float64)
+    denominator = np.sqrt(np.maximum(squares - sums * sums / (h * w), 0)) * level.norm
+    scores = np.where(denominator > 1e-6, numerator / np.maximum(denominator, 1e-6), -1.0)
+    row, column = np.unravel_index(int(scores.argmax()), scores.shape)
+    return left + int(column), top + int(row), float(scores[row, column])
+
+
+def _peaks(scores: np.ndarray, count: int, spacing: "tuple[int, int]") -> "list[tuple[int, int]]":
+    """Positions of the highest scores, at least `spacing` (w, h) apart from each other."""
+    scores = scores.copy()
+    peaks = []
+    for _ in range(count):
+        row, column = np.unravel_index(int(scores.argmax()), scores.shape)
+        if scores[row, column] <= -1:
+            break
+        peaks.append((int(column), int(row)))
+        scores[
+            max(row - spacing[1], 0) : row + spacing[1] + 1, max(column - spacing[0], 0) : column + spacing[0] + 1
+        ] = -1
+    return peaks
+
+
+class TemplateMatcher:
+    """Locates templates in frames with normalized cross-correlation.
+
+    Frame and template are reduced to a coarse-to-fine pyramid. The whole search area is only scored at the
+    coarsest level, and the best candidates are then refined in a few pixels around them on each finer level.
+    The pyramid of the last frame is kept, so looking for several templates in the same frame builds it once.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_levels: int = DEFAULT_MAX_LEVELS):
+        """
+        Args:
+            threshold: lowest score of a match, between -1 and 1.
+            max_levels: number of pyramid levels below the full resolution. 0 scores every position at full resolution.
+        """
+        self._threshold = threshold
+        self._max_levels = max_levels
+        self._frame_key: tuple | None = None
+        self._frame_levels: list[_FrameLevel] = []
+
+    @property
+    def threshold(self) -> float:
+        return self._threshold
+
+    def _pyramid(self, frame: ScreenImage, area: QRect) -> "list[_FrameLevel]":
+        key = (frame.cache_key, frame.origin, area.getRect())
+        if key != self._frame_key:
+            area = area.translated(-frame.origin[0], -frame.origin[1])
+            gray = _gray(frame.as_array()[area.top() : area.bottom() + 1, area.left() : area.right() + 1])
+            self._frame_levels = [_FrameLevel(gray)]
+            self._frame_key = key
+        return self._frame_levels
+
+    def _level(self, levels: "list[_FrameLevel]", index: int) -> _FrameLevel:
+        while len(levels) <= index:
+            levels.append(_FrameLevel(_downsample(levels[-1].image)))
+        return levels[index]
+
+    def match(
+        self,
+        frame: ScreenImage,
+        template: Template,
+        region: "QRect | tuple[int, int, int, int] | None" = None,
+        scales: "Sequence[float]" = (1.0,),
+    ) -> "Match | None":
+        """Best location of `template` in `frame`.
+
+        Args:
+            frame: frame to search.
+            template: patch to look for.
+            region: area to search, in screen coordinates. The whole frame if None.
+            scales: sizes of the template to try, relative to its own size, e.g. to follow a window being rescaled.
+
+        Returns:
+            The best match over all the scales, or None if none scores at least the threshold.
+        """
+        area = frame.rect if region is None else (QRect(*region) if isinstance(region, tuple) else region)
+        area = area.intersected(frame.rect)
+        if area.isEmpty():
+            return None
+        best = None
+        for scale in scales:
+            found = self._match_scale(frame, area, template, scale)
+            if found is not None and (best is None or found.score > best.score):
+                best = found
+        return best
+
+    def _match_scale(self, frame: ScreenImage, area: QRect, template: Template, scale: float) -> "Match | None":
+        frame_levels = self._pyramid(frame, area)
+        levels = template.levels(scale, self._max_levels)
+        # Use the coarsest level where the template still fits in the search area
+        coarsest = len(levels) - 1
+        while coarsest >= 0:
+            h, w = levels[coarsest].centered.shape
+            frame_level = self._level(frame_levels, coarsest)
+            if h <= frame_level.shape[0] and w <= frame_level.shape[1]:
+                break
+            coarsest -= 1
+        if coarsest < 0:
+            return None
+        h, w = levels[coarsest].centered.shape
+        scores = _ncc_map(frame_level, levels[coarsest])
+        candidates = _peaks(scores, _CANDIDATES if coarsest else 1, (max(w // 2, 1), max(h // 2, 1)))
+        best = None
+        for x, y in candidates:
+            score = float(scores[y, x])
+            for index in range(coarsest - 1, -1, -1):
+                x, y, score = _refine(self._level(frame_levels, index).image, levels[index], 2 * x, 2 * y)
+            if best is None or score > best[2]:
+                best = (x, y, score)
+        if best is None or best[2] < self._threshold:
+            return None
+        x, y, score = best
+        h, w = levels[0].centered.shape
+        return Match(area.x() + x, area.y() + y, w, h, score, scale)
+
+
+class Anchor:
+    """Template that the positions of some points are relative to.
+
+    The points are picked on a reference screenshot where the template was at `origin`.
+    Once the template is found in another frame, `relocate` moves the points along with it,
+    so they keep working when the window moves or is rescaled.
+    """
+
+    def __init__(self, template: Template, origin: "tuple[int, int]"):
+        self.template = template
+        self.origin = origin
+
+    @classmethod
+    def from_frame(cls, frame: ScreenImage, rect: "QRect | tuple[int, int, int, int]", name: str = "") -> "Anchor":
+        rect = QRect(*rect) if isinstance(rect, tuple) else rect
+        rect = rect.intersected(frame.rect)
+        return cls(Template.from_frame(frame, rect, name), (rect.x(), rect.y()))
+
+    @classmethod
+    def load(cls, path: str, name: str = "") -> "Anchor":
+        """Read an anchor saved by `save`, a PNG image with its origin as metadata."""
+        image = QImage(path)
+        if image.isNull():
+            raise OSError(f"Cannot read the anchor {path}")
+        try:
+            x, y = (int(v) for v in image.text("origin").split(","))
+        except ValueError:
+            raise ValueError(f"The anchor {path} has no origin")
+        return cls(Template(_image_to_array(image), name), (x, y))
+
+    def save(self, path: str):
+        image = _array_to_image(self.template.image)
+        image.setText("origin", f"{self.origin[0]},{self.origin[1]}")
+        if not image.save(path, "PNG"):
+            raise OSError(f"Cannot write the anchor {path}")
+
+    def locate(
+        self,
+        frame: ScreenImage,
+        matcher: "TemplateMatcher | None" = None,
+        region: "QRect | tuple[int, int, int, int] | None" = None,
+        scales: "Sequence[float]" = (1.0,),
+    ) -> "Match | None":
+        return (matcher or TemplateMatcher()).match(frame, self.template, region, scales)
+
+    def relocate(self, points: "PointSet | Iterable[Point]", match: Match) -> PointSet:
+        """Copy of the points moved from the reference screenshot to where the anchor has been found.
+
+        Points that are not set stay unset.
+        """
+        point_set = points.copy() if isinstance(points, PointSet) else PointSet.from_points(points)
+        xy = as_coords(point_set)
+        is_set = point_set.is_set
+        moved = np.floor((xy - self.origin) * match.scale + 0.5).astype(np.int64) + (match.x, match.y)
+        xy[is_set] = np.clip(moved[is_set], 0, np.iinfo(np.int32).max)
+        return point_set
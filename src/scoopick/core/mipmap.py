@@ -0,0 +1,50 @@
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage, QPixmap
+
+
+class MipmapCache:
+    """Halved versions of a pixmap, to draw it at any zoom without rescaling the full resolution image each time.
+
+    The source is halved repeatedly into a pyramid of levels, built lazily, so a 4K capture shown in a small
+    window is drawn from the smallest level that is still larger than the target.
+    Everything is kept until a different pixmap is set.
+    """
+
+    def __init__(self):
+        self._cache_key: int | None = None
+        self._levels: list[QImage] = []
+
+    def set_source(self, pixmap: QPixmap) -> bool:
+        """Use a new source pixmap.
+
+        Returns:
+            True if the pixmap is different from the current source, in which case the cache is cleared.
+        """
+        if pixmap.cacheKey() == self._cache_key:
+            return False
+        self._cache_key = pixmap.cacheKey()
+        self._levels = [] if pixmap.isNull() else [pixmap.toImage()]
+        return True
+
+    def _level_for(self, target: QSize) -> QImage:
+        level = self._levels[0]
+        index = 0
+        while level.width() >= 2 * target.width() and level.height() >= 2 * target.height():
+            index += 1
+            if index == len(self._levels):
+                half = QSize(max(level.width() // 2, 1), max(level.height() // 2, 1))
+                self._levels.append(
+                    level.scaled(half, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                )
+            level = self._levels[index]
+        return level
+
+    @property
+    def source_size(self) -> QSize:
+        return self._levels[0].size() if self._levels else QSize()
+
+    def level_for_scale(self, scale: float) -> QImage:
+        """Smallest level that can be drawn at `scale` times the size of the source without upscaling it."""
+        source = self.source_size
+        target = QSize(max(round(source.width() * scale), 1), max(round(source.height() * scale), 1))
+        return self._level_for(target)
@@ -0,0 +1,92 @@
+from typing import Callable, Iterable, Mapping, NamedTuple, Union
+
+import numpy as np
+
+from ..data import Point, PointSet
+from .image import ScreenImage
+
+# Distance functions between colors, taking an array of channel differences (..., 3)
+METRICS: "dict[str, Callable[[np.ndarray], np.ndarray]]" = {
+    "manhattan": lambda diff: np.abs(diff).sum(axis=-1),
+    "euclidean": lambda diff: np.sqrt((diff * diff).sum(axis=-1)),
+    "chebyshev": lambda diff: np.abs(diff).max(axis=-1),
+}
+
+Metric = Union[str, Callable[[np.ndarray], np.ndarray]]
+
+
+class Classification(NamedTuple):
+    """Closest palette entry to a color. `label` is None if the color was rejected."""
+
+    label: "str | None"
+    distance: float
+
+
+class Palette:
+    """Named set of reference colors used to classify the pixels under some points.
+
+    All the distances between the sampled colors and the palette are computed in a single NumPy broadcast.
+    """
+
+    def __init__(
+        self,
+        colors: "Mapping[str, tuple[int, int, int]]",
+        metric: Metric = "manhattan",
+        threshold: "float | None" = None,
+    ):
+        """
+        Args:
+            colors: reference colors by label.
+            metric: one of the names in METRICS, or a function computing the distance from the channel
+                differences along the last axis.
+            threshold: colors farther than this from every entry are rejected. No rejection if None.
+        """
+        if not colors:
+            raise ValueError("A palette needs at least one color")
+        if isinstance(metric, str) and metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRICS)}")
+        self._labels = tuple(colors)
+        self._colors = np.array([colors[label] for label in self._labels], dtype=np.int32).reshape(-1, 3)
+        self._metric = METRICS[metric] if isinstance(metric, str) else metric
+        self._threshold = threshold
+
+    @property
+    def labels(self) -> "tuple[str, ...]":
+        return self._labels
+
+    @property
+    def threshold(self) -> "float | None":
+        return self._threshold
+
+    @threshold.setter
+    def threshold(self, threshold: "float | None"):
+        self._threshold = threshold
+
+    def distances(self, colors: np.ndarray) -> np.ndarray:
+        """(N, K) distances between N colors and the K entries of the palette."""
+        colors = np.asarray(colors, dtype=np.int32).reshape(-1, 1, 3)
+        return self._metric(colors - self._colors[np.newaxis])
+
+    def nearest(self, colors: np.ndarray) -> "tuple[np.ndarray, np.ndarray]":
+        """Index of the closest palette entry for each color, -1 if rejected, and the distance to it."""
+        distances = self.distances(colors)
+        indices = distances.argmin(axis=1)
+        nearest = distances[np.arange(len(indices)), indices]
+        if self._threshold is not None:
+            indices = np.where(nearest > self._threshold, -1, indices)
+        return indices, nearest
+
+    def classify_colors(self, colors: np.ndarray) -> "list[Classification]":
+        indices, nearest = self.nearest(colors)
+        return [
+            Classification(self._labels[index] if index >= 0 else None, float(distance))
+            for index, distance in zip(indices.tolist(), nearest.tolist())
+        ]
+
+    def classify(self, frame: ScreenImage, points: "PointSet | Iterable[Point] | np.ndarray") -> "list[Classification]":
+        """Classify the color under each point of the frame."""
+        return self.classify_colors(frame.get_pixel_colors(points))
+
+    def match(self, color: "tuple[int, int, int]") -> Classification:
+        """Classify a single color."""
+        return self.classify_colors(np.asarray(color))[0]
@@ -0,0 +1,221 @@
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Generator, NamedTuple
+
+import numpy as np
+
+from ..data import Point, PointView
+from .image import ScreenImage
+
+if TYPE_CHECKING:
+    from ..screenshot import Region
+
+# First delay between two captures while polling, in seconds
+DEFAULT_MIN_INTERVAL = 0.01
+# Polling backs off up to this delay, in seconds
+DEFAULT_MAX_INTERVAL = 0.25
+
+
+def frames_differ(first: ScreenImage, second: ScreenImage, threshold: int = 0) -> bool:
+    """Whether any channel of any pixel differs by more than `threshold` between two frames of the same region."""
+    a, b = first.as_array(), second.as_array()
+    if a.shape != b.shape or first.origin != second.origin:
+        return True
+    return bool(np.abs(a.astype(np.int16) - b).max(initial=0) > threshold)
+
+
+class _Grab(NamedTuple):
+    """Step of a wait asking its driver for a capture of `region`, sent back into the wait."""
+
+    region: "Region"
+
+
+# A wait yields captures to grab and delays to sleep, in seconds, and returns whether its condition held
+_Steps = Generator["_Grab | float", "ScreenImage | None", bool]
+
+
+class _Polling:
+    """Polling logic shared by Waiter and AsyncWaiter, which only differ in how they capture and sleep."""
+
+    def __init__(self, capture: Callable, min_interval: float, max_interval: float):
+        self._capture = capture
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+
+    def _backoff(self, interval: float) -> float:
+        return min(interval * 2, self._max_interval)
+
+    def _color_steps(
+        self,
+        point: "Point | PointView | tuple[int, int]",
+        color: "tuple[int, int, int]",
+        tolerance: int,
+        timeout: float,
+    ) -> _Steps:
+        x, y = point.to_tuple() if isinstance(point, (Point, PointView)) else point
+        deadline = time.monotonic() + timeout
+        interval = self._min_interval
+        while True:
+            pixel = (yield _Grab((x, y, 1, 1))).get_pixel_color((x, y))
+            if sum(abs(c0 - c1) for c0, c1 in zip(pixel, color)) <= tolerance:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            yield min(interval, max(deadline - time.monotonic(), 0))
+            interval = self._backoff(interval)
+
+    def _change_steps(self, region: "Region", timeout: float, threshold: int) -> _Steps:
+        deadline = time.monotonic() + timeout
+        interval = self._min_interval
+        reference = yield _Grab(region)
+        while time.monotonic() < deadline:
+            yield min(interval, max(deadline - time.monotonic(), 0))
+            if frames_differ(reference, (yield _Grab(region)), threshold):
+                return True
+            interval = self._backoff(interval)
+        return False
+
+    def _stable_steps(self, region: "Region", settle_ms: int, timeout: float, threshold: int) -> _Steps:
+        settle = settle_ms / 1000
+        deadline = time.monotonic() + timeout
+        interval = self._min_interval
+        last = yield _Grab(region)
+        stable_since = time.monotonic()
+        while time.monotonic() < deadline:
+            # Do not oversleep past the moment the region would be considered stable
+            remaining = stable_since + settle - time.monotonic()
+            yield max(min(interval, remaining, deadline - time.monotonic()), 0)
+            frame = yield _Grab(region)
+            now = time.monotonic()
+            if frames_differ(last, frame, threshold):
+                last, stable_since = frame, now
+                interval = self._min_interval
+                continue
+            if now - stable_since >= settle:
+                return True
+            interval = self._backoff(interval)
+        return False
+
+
+class Waiter(_Polling):
+    """Event-driven replacement for fixed sleeps in scripts.
+
+    Every method polls captures of a small region and returns as soon as its condition holds.
+    The polling interval starts at `min_interval` and doubles up to `max_interval` while nothing happens.
+    """
+
+    def __init__(
+        self,
+        capture: "Callable[..., ScreenImage]",
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ):
+        """
+        Args:
+            capture: function returning a frame of the screen, accepting a `region` keyword argument.
+            min_interval: first delay between two captures, in seconds.
+            max_interval: maximum delay between two captures, in seconds.
+        """
+        super().__init__(capture, min_interval, max_interval)
+
+    def _drive(self, steps: _Steps) -> bool:
+        frame = None
+        try:
+            while True:
+                step = steps.send(frame)
+                if isinstance(step, _Grab):
+                    frame = self._capture(region=step.region)
+                else:
+                    frame = None
+                    time.sleep(step)
+        except StopIteration as stop:
+            return stop.value
+
+    def wait_for_color(
+        self,
+        point: "Point | PointView | tuple[int, int]",
+        color: "tuple[int, int, int]",
+        tolerance: int = 10,
+        timeout: float = 10.0,
+    ) -> bool:
+        """Wait until the pixel at `point` is within `tolerance` (Manhattan distance) of `color`.
+
+        Returns:
+            True if the color was reached, False on timeout.
+        """
+        return self._drive(self._color_steps(point, color, tolerance, timeout))
+
+    def wait_for_change(self, region: "Region" = None, timeout: float = 10.0, threshold: int = 0) -> bool:
+        """Wait until the content of `region` differs from what it is now.
+
+        Returns:
+            True if a change was seen, False on timeout.
+        """
+        return self._drive(self._change_steps(region, timeout, threshold))
+
+    def wait_until_stable(
+        self, region: "Region" = None, settle_ms: int = 250, timeout: float = 10.0, threshold: int = 0
+    ) -> bool:
+        """Wait until the content of `region` has not changed for `settle_ms` milliseconds, e.g. after an animation.
+
+        Returns:
+            True once the region is stable, False on timeout.
+        """
+        return self._drive(self._stable_steps(region, settle_ms, timeout, threshold))
+
+
+class AsyncWaiter(_Polling):
+    """Same waits as Waiter, for scripts written with `async def run`.
+
+    Captures are awaited, and the delays between them are spent in `asyncio.sleep`,
+    so other tasks of the script keep running while waiting.
+    """
+
+    def __init__(
+        self,
+        capture: "Callable[..., Awaitable[ScreenImage]]",
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ):
+        """
+        Args:
+            capture: coroutine function returning a frame of the screen, accepting a `region` keyword argument.
+            min_interval: first delay between two captures, in seconds.
+            max_interval: maximum delay between two captures, in seconds.
+        """
+        super().__init__(capture, min_interval, max_interval)
+
+    async def _drive(self, steps: _Steps) -> bool:
+        # asyncio is only imported by the scripts that use it
+        import asyncio
+
+        frame = None
+        try:
+            while True:
+                step = steps.send(frame)
+                if isinstance(step, _Grab):
+                    frame = await self._capture(region=step.region)
+                else:
+                    frame = None
+                    await asyncio.sleep(step)
+        except StopIteration as stop:
+            return stop.value
+
+    async def wait_for_color(
+        self,
+        point: "Point | PointView | tuple[int, int]",
+        color: "tuple[int, int, int]",
+        tolerance: int = 10,
+        timeout: float = 10.0,
+    ) -> bool:
+        """Awaitable Waiter.wait_for_color."""
+        return await self._drive(self._color_steps(point, color, tolerance, timeout))
+
+    async def wait_for_change(self, region: "Region" = None, timeout: float = 10.0, threshold: int = 0) -> bool:
+        """Awaitable Waiter.wait_for_change."""
+        return await self._drive(self._change_steps(region, timeout, threshold))
+
+    async def wait_until_stable(
+        self, region: "Region" = None, settle_ms: int = 250, timeout: float = 10.0, threshold: int = 0
+    ) -> bool:
+        """Awaitable Waiter.wait_until_stable."""
+        return await self._drive(self._stable_steps(region, settle_ms, timeout, threshold))
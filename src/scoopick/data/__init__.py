@@ -1,3 +1,4 @@
 from .constants import *
 from .point import Point
-from .schema import Schema, validate_data
+from .point_set import POINT_DTYPE, PointSet, PointView, as_coords
+from .schema import Schema, ValidationIssue, validate, validate_data
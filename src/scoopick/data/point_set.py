@@ -0,0 +1,251 @@
+from typing import Iterable, Iterator, overload
+
+import numpy as np
+
+from .point import Point
+
+# Layout of a row of a PointSet. The idx of a point is its row, and names are kept in a separate list
+POINT_DTYPE = np.dtype([("xy", np.int32, (2,)), ("color", np.uint8, (3,))])
+
+_MIN_CAPACITY = 8
+
+
+class PointView:
+    """Lightweight handle to a row of a PointSet, with the same attributes as a Point.
+
+    Reading or assigning an attribute goes straight to the arrays of the set.
+    Like the idx of a Point, a view refers to a position, so it follows whatever point is moved there.
+    """
+
+    __slots__ = ("_set", "_row")
+
+    def __init__(self, point_set: "PointSet", row: int):
+        self._set = point_set
+        self._row = row
+
+    @property
+    def idx(self) -> int:
+        return self._row
+
+    @property
+    def name(self) -> str:
+        return self._set._names[self._row]
+
+    @name.setter
+    def name(self, name: str):
+        self._set._names[self._row] = name
+
+    @property
+    def x(self) -> int:
+        return int(self._set.xy[self._row, 0])
+
+    @x.setter
+    def x(self, x: int):
+        self._set.xy[self._row, 0] = x
+
+    @property
+    def y(self) -> int:
+        return int(self._set.xy[self._row, 1])
+
+    @y.setter
+    def y(self, y: int):
+        self._set.xy[self._row, 1] = y
+
+    @property
+    def color(self) -> "tuple[int, int, int]":
+        return tuple(self._set.colors[self._row].tolist())
+
+    @color.setter
+    def color(self, color: "tuple[int, int, int]"):
+        self._set.colors[self._row] = color
+
+    def update(self, point: "Point | PointView"):
+        """Copy the name, position and color of another point. The idx stays the same."""
+        self._set.update(self._row, point)
+
+    def to_point(self) -> Point:
+        """Standalone copy of the point."""
+        return Point(idx=self._row, name=self.name, x=self.x, y=self.y, color=self.color)
+
+    to_tuple = Point.to_tuple
+    __str__ = Point.__str__
+
+    def __repr__(self):
+        return f"PointView({self.to_point()!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, (Point, PointView)):
+            return (self.idx, self.name, self.to_tuple(), tuple(self.color)) == (
+                other.idx,
+                other.name,
+                other.to_tuple(),
+                tuple(other.color),
+            )
+        return NotImplemented
+
+    __hash__ = None
+
+
+class PointSet:
+    """Collection of points stored in a NumPy structured array.
+
+    Coordinates and colors of all the points are available as arrays, so that they can be processed in bulk,
+    while Point-like views are only created when single points are accessed.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._buffer = np.zeros(max(capacity, _MIN_CAPACITY), dtype=POINT_DTYPE)
+        self._size = 0
+        self._names: list[str] = []
+
+    @classmethod
+    def from_points(cls, points: "Iterable[Point | PointView]") -> "PointSet":
+        points = list(points)
+        point_set = cls(len(points))
+        point_set.extend(points)
+        return point_set
+
+    @classmethod
+    def from_arrays(
+        cls,
+        xy: np.ndarray,
+        colors: "np.ndarray | None" = None,
+        names: "Iterable[str] | None" = None,
+    ) -> "PointSet":
+        """Build a set from an (N, 2) array of coordinates, and optionally (N, 3) colors and N names.
+
+        Points without a name are called "Point <n>", and points without a color are red, like a default Point.
+        """
+        xy = np.asarray(xy).reshape(-1, 2)
+        point_set = cls(len(xy))
+        point_set._size = len(xy)
+        point_set.xy[:] = xy
+        point_set.colors[:] = Point.color if colors is None else np.asarray(colors).reshape(-1, 3)
+        point_set._names = [f"Point {i + 1}" for i in range(len(xy))] if names is None else list(names)
+        if len(point_set._names) != len(xy):
+            raise ValueError(f"Expected {len(xy)} names, got {len(point_set._names)}")
+        return point_set
+
+    @property
+    def array(self) -> np.ndarray:
+        """Structured array with the points, see POINT_DTYPE. It is a view, so writes are reflected in the set."""
+        return self._buffer[: self._size]
+
+    @property
+    def xy(self) -> np.ndarray:
+        """(N, 2) int32 view of the coordinates."""
+        return self._buffer["xy"][: self._size]
+
+    @property
+    def colors(self) -> np.ndarray:
+        """(N, 3) uint8 view of the colors."""
+        return self._buffer["color"][: self._size]
+
+    @property
+    def names(self) -> "list[str]":
+        return self._names
+
+    @property
+    def is_set(self) -> np.ndarray:
+        """Boolean mask of the points that have been placed on the screen, i.e. with non-negative coordinates."""
+        return (self.xy >= 0).all(axis=1)
+
+    def _reserve(self, size: int):
+        if size <= len(self._buffer):
+            return
+        # Grow geometrically, so that appending one point at a time stays cheap
+        buffer = np.zeros(max(size, 2 * len(self._buffer)), dtype=POINT_DTYPE)
+        buffer[: self._size] = self._buffer[: self._size]
+        self._buffer = buffer
+
+    def append(self, point: "Point | PointView"):
+        self._reserve(self._size + 1)
+        self._size += 1
+        self._names.append("")
+        self.update(self._size - 1, point)
+
+    def extend(self, points: "Iterable[Point | PointView]"):
+        for point in points:
+            self.append(point)
+
+    def update(self, index: int, point: "Point | PointView"):
+        """Copy the name, position and color of `point` into the row `index`."""
+        index = self._row(index)
+        self._names[index] = point.name
+        self._buffer[index] = ((point.x, point.y), point.color)
+
+    def set_xy(self, index: int, x: int, y: int):
+        self.xy[self._row(index)] = (x, y)
+
+    def delete(self, indices: "int | Iterable[int]"):
+        """Remove some points. The following ones are shifted back, so their idx changes."""
+        indices = np.atleast_1d(np.asarray(indices if isinstance(indices, int) else list(indices), dtype=np.intp))
+        indices = np.where(indices < 0, indices + self._size, indices)
+        if ((indices < 0) | (indices >= self._size)).any():
+            raise IndexError("PointSet index out of range")
+        keep = np.ones(self._size, dtype=bool)
+        keep[indices] = False
+        kept = self._buffer[: self._size][keep]
+        self._buffer[: len(kept)] = kept
+        self._size = len(kept)
+        self._names = [name for name, k in zip(self._names, keep.tolist()) if k]
+
+    def clear(self):
+        self._size = 0
+        self._names = []
+
+    def copy(self) -> "PointSet":
+        point_set = PointSet(self._size)
+        point_set._buffer[: self._size] = self.array
+        point_set._size = self._size
+        point_set._names = list(self._names)
+        return point_set
+
+    def to_points(self) -> "list[Point]":
+        """Standalone copies of all the points."""
+        return [
+            Point(idx=idx, name=name, x=x, y=y, color=tuple(color))
+            for idx, (name, (x, y), color) in enumerate(zip(self._names, self.xy.tolist(), self.colors.tolist()))
+        ]
+
+    def to_dicts(self) -> "list[dict]":
+        """Points in the format of the points file."""
+        return [
+            {"idx": idx, "name": name, "x": x, "y": y, "color": color}
+            for idx, (name, (x, y), color) in enumerate(zip(self._names, self.xy.tolist(), self.colors.tolist()))
+        ]
+
+    def _row(self, index: int) -> int:
+        row = index + self._size if index < 0 else index
+        if not 0 <= row < self._size:
+            raise IndexError("PointSet index out of range")
+        return row
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> PointView: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "list[PointView]": ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [PointView(self, row) for row in range(*index.indices(self._size))]
+        return PointView(self, self._row(index))
+
+    def __iter__(self) -> Iterator[PointView]:
+        return (PointView(self, row) for row in range(self._size))
+
+    def __repr__(self):
+        return f"PointSet({self.to_points()!r})"
+
+
+def as_coords(points: "PointSet | Iterable[Point] | np.ndarray") -> np.ndarray:
+    """(N, 2) array with the (x, y) coordinates of some points."""
+    if isinstance(points, PointSet):
+        return points.xy
+    if isinstance(points, np.ndarray):
+        return points.reshape(-1, 2)
+    return np.array([(point.x, point.y) for point in points], dtype=np.int32).reshape(-1, 2)
@@ -2,16 +2,35 @@ import importlib.resources
 import json
 import sys
 from enum import Enum
-
-from jsonschema import Draft202012Validator, ValidationError
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
 
 from .constants import PACKAGE_NAME
 
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
+
 
 class Schema(Enum):
     POINTS = "points"
 
 
+class ValidationIssue(NamedTuple):
+    """Reason why some data does not match a schema.
+
+    Args:
+        path: location of the offending value, e.g. `points/3/x`. Empty for the root.
+        message: description of the problem.
+    """
+
+    path: str
+    message: str
+
+    def __str__(self):
+        return f"{self.path}: {self.message}" if self.path else self.message
+
+
+@lru_cache(maxsize=None)
 def load_schema(schema: Schema) -> dict:
     schema_name = f"{schema.value}_schema.json"
     if sys.version_info < (3, 9):
@@ -27,10 +46,75 @@ def load_schema(schema: Schema) -> dict:
     return schema
 
 
-def validate_data(schema: Schema, data: dict) -> bool:
-    try:
-        Draft202012Validator(load_schema(schema)).validate(instance=data)
-        return True
-    except ValidationError as e:
-        print(f"Data validation error: {e.message}")
+@lru_cache(maxsize=None)
+def get_validator(schema: Schema) -> "Draft202012Validator":
+    """Validator of a schema, compiled the first time it is requested."""
+    from jsonschema import Draft202012Validator
+
+    schema_data = load_schema(schema)
+    Draft202012Validator.check_schema(schema_data)
+    return Draft202012Validator(schema_data)
+
+
+_POINT_KEYS = frozenset(("idx", "name", "x", "y", "color"))
+_POINT_REQUIRED_KEYS = frozenset(("name", "x", "y"))
+
+
+# Range of the coordinates, which are stored as int32
+_COORDINATE_MIN, _COORDINATE_MAX = -(2**31), 2**31 - 1
+
+
+def _is_int(value) -> bool:
+    return type(value) is int
+
+
+def _is_coordinate(value) -> bool:
+    return type(value) is int and _COORDINATE_MIN <= value <= _COORDINATE_MAX
+
+
+def _points_look_valid(data) -> bool:
+    """Structural check of a points file, much faster than jsonschema on large arrays.
+
+    It is stricter than the schema, so a False only means that the full validation must run.
+    """
+    if type(data) is not dict or not isinstance(data.get("$schema", ""), str):
+        return False
+    points = data.get("points", [])
+    if type(points) is not list:
         return False
+    for point in points:
+        if type(point) is not dict or not _POINT_REQUIRED_KEYS <= point.keys() <= _POINT_KEYS:
+            return False
+        if type(point["name"]) is not str or not _is_coordinate(point["x"]) or not _is_coordinate(point["y"]):
+            return False
+        if "idx" in point and not _is_int(point["idx"]):
+            return False
+        if "color" in point:
+            color = point["color"]
+            if type(color) is not list or len(color) != 3 or not all(_is_int(c) and 0 <= c <= 255 for c in color):
+                return False
+    return True
+
+
+# Fast paths that accept the data without running the full validator
+_PRECHECKS = {Schema.POINTS: _points_look_valid}
+
+
+def validate(schema: Schema, data: dict) -> "list[ValidationIssue]":
+    """Validate some data against a schema.
+
+    Returns:
+        The issues found, empty if the data is valid.
+    """
+    precheck = _PRECHECKS.get(schema)
+    if precheck is not None and precheck(data):
+        return []
+    return [
+        ValidationIssue("/".join(str(part) for part in error.absolute_path), error.message)
+        for error in get_validator(schema).iter_errors(data)
+    ]
+
+
+def validate_data(schema: Schema, data: dict) -> bool:
+    """Whether some data is valid against a schema. Use `validate` to know why it is not."""
+    return not validate(schema, data)
@@ -0,0 +1,261 @@
+"""Latency histograms and counters of the hot paths, recorded only while enabled.
+
+Recording is off by default, and every instrumented call then only checks a flag.
+It is turned on with `registry.enabled = True`, the `SCOOPICK_METRICS` environment variable,
+`scoopick run --metrics PATH`, or the metrics window of the GUI.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, NamedTuple
+
+from .data import PACKAGE_NAME
+
+# Upper bounds of the latency buckets, in seconds, from 10 µs to 10 s
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0,
+)  # fmt: skip
+
+# Names of the built-in metrics
+CAPTURE = "capture"
+PIXMAP_TO_IMAGE = "pixmap_to_image"
+PIXEL_SAMPLING = "pixel_sampling"
+MODEL_UPDATE = "model_update"
+SCRIPT_RUN = "script_run"
+# Counters of the amount of work done by the timed calls above
+CAPTURED_PIXELS = "captured_pixels"
+UPDATED_POINTS = "updated_points"
+
+
+class Histogram:
+    """Distribution of latencies over fixed buckets, with their count, sum and maximum."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: "tuple[float, ...]" = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # The last count is for the values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile, interpolated linearly inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class MetricKey(NamedTuple):
+    name: str
+    labels: "tuple[tuple[str, str], ...]"
+
+    def format_labels(self) -> str:
+        return ",".join(f"{key}={value}" for key, value in self.labels)
+
+
+def _key(name: str, labels: "dict[str, object]") -> MetricKey:
+    return MetricKey(name, tuple(sorted((key, str(value)) for key, value in labels.items())))
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("_registry", "_key", "_start")
+
+    def __init__(self, registry: "MetricsRegistry", key: MetricKey):
+        self._registry = registry
+        self._key = key
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self._registry._observe(self._key, time.perf_counter() - self._start)
+
+
+class MetricsRegistry:
+    """Thread-safe set of named latency histograms and counters, each with optional labels.
+
+    While `enabled` is False, `timer`, `observe` and `increment` return at once without recording anything.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms: dict[MetricKey, Histogram] = {}
+        self._counters: dict[MetricKey, float] = {}
+
+    def timer(self, name: str, **labels):
+        """Context manager recording the time spent in its block in the `name` histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, _key(name, labels))
+
+    def timed(self, name: str, **labels) -> Callable[[Callable], Callable]:
+        """Decorator recording the duration of each call of the function in the `name` histogram."""
+        key = _key(name, labels)
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._observe(key, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record a duration in the `name` histogram."""
+        if self.enabled:
+            self._observe(_key(name, labels), seconds)
+
+    def _observe(self, key: MetricKey, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add `value` to the `name` counter."""
+        if self.enabled:
+            key = _key(name, labels)
+            with self._lock:
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def histograms(self) -> "dict[MetricKey, Histogram]":
+        """Copy of the histograms recorded so far, sorted by name and labels."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            copies = {}
+            for key, histogram in items:
+                copy = copies[key] = Histogram(histogram.buckets)
+                copy.counts, copy.count = list(histogram.counts), histogram.count
+                copy.sum, copy.max = histogram.sum, histogram.max
+            return copies
+
+    def counters(self) -> "dict[MetricKey, float]":
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def to_dict(self) -> dict:
+        """Summary of every metric, with latencies in seconds."""
+        return {
+            "histograms": [
+                {
+                    "name": key.name,
+                    "labels": dict(key.labels),
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.mean,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99),
+                    "max": histogram.max,
+                    "buckets": dict(zip([*map(str, histogram.buckets), "+Inf"], histogram.counts)),
+                }
+                for key, histogram in self.histograms().items()
+            ],
+            "counters": [
+                {"name": key.name, "labels": dict(key.labels), "value": value} for key, value in self.counters().items()
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        declared = set()
+        for key, histogram in self.histograms().items():
+            name = f"{PACKAGE_NAME}_{key.name}_seconds"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip([*histogram.buckets, math.inf], histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{name}_bucket{_prometheus_labels(key.labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_prometheus_labels(key.labels)} {histogram.sum!r}")
+            lines.append(f"{name}_count{_prometheus_labels(key.labels)} {histogram.count}")
+        for key, value in self.counters().items():
+            name = f"{PACKAGE_NAME}_{key.name}_total"
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_prometheus_labels(key.labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: str):
+        """Write the metrics to `path`, in the Prometheus format if it ends with .prom or .txt, else as JSON."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _prometheus_labels(labels: "tuple[tuple[str, str], ...]") -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+# Registry of the built-in metrics, also available to scripts
+registry = MetricsRegistry(enabled=bool(os.environ.get("SCOOPICK_METRICS")))
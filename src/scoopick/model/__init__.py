@@ -1,2 +1,3 @@
 from .binding import Binding
 from .points import PointsModel
+from .spatial import GridIndex
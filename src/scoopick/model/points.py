@@ -1,11 +1,15 @@
 import json
-from dataclasses import asdict, replace
+from contextlib import contextmanager
 from logging import getLogger
+from typing import Iterable, Iterator
 
-from PySide6.QtCore import QAbstractListModel, QModelIndex
+import numpy as np
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Signal
 from PySide6.QtGui import Qt
 
-from ..data import PACKAGE_NAME, Point, Schema, validate_data
+from ..data import PACKAGE_NAME, Point, PointSet, PointView, Schema, validate
+from ..metrics import MODEL_UPDATE, UPDATED_POINTS, registry
+from .spatial import GridIndex
 
 logger = getLogger(PACKAGE_NAME)
 
@@ -19,11 +23,26 @@ DEFAULT_POINTS = (
 )
 
 
+# Removing more scattered ranges of rows than this resets the model, instead of notifying each range
+_MAX_REMOVED_RANGES = 16
+
+
 class PointsModel(QAbstractListModel):
-    def __init__(self, points: list[Point] | None = None, *args, **kwargs):
+    selection_changed = Signal(object, name="selectionChanged")
+
+    def __init__(self, points: "list[Point] | PointSet | None" = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._points: list[Point] = points or [replace(point) for point in DEFAULT_POINTS]
-        self._selected_point: tuple[Point] = tuple()
+        self._points = PointSet.from_points(points or DEFAULT_POINTS)
+        self._selected_point: tuple[PointView] = tuple()
+        # Built on the first spatial query, then kept up to date by update_pos and update_point
+        self._index: GridIndex | None = None
+        # Rows changed inside a batch, notified with a single dataChanged when it ends
+        self._batch_depth = 0
+        self._pending_rows: tuple[int, int] | None = None
+        self.layoutChanged.connect(self._invalidate_index)
+        self.modelReset.connect(self._invalidate_index)
+        self.rowsInserted.connect(self._invalidate_index)
+        self.rowsRemoved.connect(self._invalidate_index)
 
     @classmethod
     def from_file(cls, filepath: str) -> "PointsModel":
@@ -37,15 +56,23 @@ class PointsModel(QAbstractListModel):
                 data: dict = json.load(f)
             except json.JSONDecodeError:
                 return False
-        if not validate_data(Schema.POINTS, data):
+        issues = validate(Schema.POINTS, data)
+        for issue in issues:
+            logger.debug("Invalid points data in '%s': %s", filepath, issue)
+        if issues:
             return False
-        self._points = [Point(**point_data) for point_data in data.get("points", [])]
-        self._reindex_points()
-        self.layoutChanged.emit()
+        points = data.get("points", [])
+        self._reset(
+            PointSet.from_arrays(
+                np.array([(point["x"], point["y"]) for point in points], dtype=np.int32),
+                np.array([point.get("color", Point.color) for point in points], dtype=np.uint8),
+                [point["name"] for point in points],
+            )
+        )
         return True
 
     def to_file(self, filepath: str):
-        data = {"points": [asdict(point) for point in self._points]}
+        data = {"points": self._points.to_dicts()}
         with open(filepath, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4)
 
@@ -64,58 +91,164 @@ class PointsModel(QAbstractListModel):
     def rowCount(self, index: QModelIndex):
         return len(self._points)
 
-    def select_points(self, points: tuple[Point]):
+    def select_points(self, points: "tuple[Point | PointView]"):
         self._selected_point = points
-        # self.layoutChanged.emit()
+        self.selection_changed.emit(points)
 
     def add_point(self, point: Point | None = None) -> bool:
         if point is None:
             point = Point(idx=-1, name=f"Point {len(self._points) + 1}", x=-1, y=-1, color=(0, 0, 0))
-        point.idx = len(self._points)
-        self._points.append(replace(point))
-        self.layoutChanged.emit()
+        return self.add_points((point,))
+
+    @registry.timed(MODEL_UPDATE, operation="add")
+    def add_points(self, points: "Iterable[Point | PointView]") -> bool:
+        """Append some points, notifying the views of all of them at once."""
+        points = list(points)
+        if not points:
+            return False
+        self._flush_changes()
+        first = len(self._points)
+        self.beginInsertRows(QModelIndex(), first, first + len(points) - 1)
+        self._points.extend(points)
+        self.endInsertRows()
+        registry.increment(UPDATED_POINTS, len(points), operation="add")
         return True
 
     def remove_selected_points(self):
         idxs = [point.idx for point in self._selected_point]
-        for point in self._selected_point:
-            self._points.remove(point)
-        self._reindex_points()
+        self.remove_points(idxs)
         self._selected_point = tuple(self._points[idx] for idx in idxs if idx < len(self._points))
-        self.layoutChanged.emit()
-
-    def set_points(self, points: list[Point]):
-        self._points = [replace(point) for point in points]
-        self.layoutChanged.emit()
-
-    def remove_point(self, point: Point):
-        self._points.remove(point)
-        self._reindex_points()
-        self.layoutChanged.emit()
-
-    def _reindex_points(self):
-        for idx, point in enumerate(self._points):
-            point.idx = idx
-
-    def __getitem__(self, index: int) -> Point:
+        self.selection_changed.emit(self._selected_point)
+
+    @registry.timed(MODEL_UPDATE, operation="remove")
+    def remove_points(self, indices: "Iterable[int]"):
+        """Remove the points at some rows, with one notification for each contiguous range of rows."""
+        rows = np.unique(np.fromiter(indices, dtype=np.intp))
+        if not len(rows):
+            return
+        self._flush_changes()
+        registry.increment(UPDATED_POINTS, len(rows), operation="remove")
+        # Split the rows into contiguous ranges
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        ranges = [(int(chunk[0]), int(chunk[-1])) for chunk in np.split(rows, breaks)]
+        if len(ranges) > _MAX_REMOVED_RANGES:
+            self.beginResetModel()
+            self._points.delete(rows)
+            self.endResetModel()
+            return
+        # Start from the end, so that the rows of the following ranges are not shifted
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self._points.delete(range(first, last + 1))
+            self.endRemoveRows()
+
+    def set_points(self, points: "list[Point] | PointSet"):
+        self._reset(points.copy() if isinstance(points, PointSet) else PointSet.from_points(points))
+
+    def remove_point(self, point: "Point | PointView"):
+        self.remove_points((point.idx,))
+
+    @registry.timed(MODEL_UPDATE, operation="reset")
+    def _reset(self, points: PointSet):
+        self._flush_changes()
+        self.beginResetModel()
+        self._points = points
+        self._selected_point = tuple()
+        self.endResetModel()
+        registry.increment(UPDATED_POINTS, len(points), operation="reset")
+        self.selection_changed.emit(self._selected_point)
+
+    def __getitem__(self, index: int) -> PointView:
         return self._points[index]
 
     def __contains__(self, index: int) -> bool:
         return 0 <= index < len(self._points)
 
     @property
-    def points(self):
+    def points(self) -> PointSet:
         return self._points
 
     @property
-    def selected_points(self) -> tuple[Point]:
+    def selected_points(self) -> "tuple[PointView]":
         return self._selected_point
 
+    @registry.timed(MODEL_UPDATE, operation="update")
     def update_point(self, point: Point):
-        self._points[point.idx].update(point)
-        self.dataChanged.emit(self.index(point.idx), self.index(point.idx))
+        self._points.update(point.idx, point)
+        if self._index is not None:
+            self._index.move(point.idx, point.x, point.y)
+        self._rows_changed(point.idx, point.idx)
+        registry.increment(UPDATED_POINTS, operation="update")
 
+    @registry.timed(MODEL_UPDATE, operation="move")
     def update_pos(self, point: Point):
-        self._points[point.idx].x = point.x
-        self._points[point.idx].y = point.y
-        self.dataChanged.emit(self.index(point.idx), self.index(point.idx))
+        self._points.set_xy(point.idx, point.x, point.y)
+        if self._index is not None:
+            self._index.move(point.idx, point.x, point.y)
+        self._rows_changed(point.idx, point.idx)
+        registry.increment(UPDATED_POINTS, operation="move")
+
+    @registry.timed(MODEL_UPDATE, operation="move_many")
+    def update_positions(self, points: "Iterable[Point | PointView]"):
+        """Move many points at once, with a single dataChanged covering all of them."""
+        changes = [(point.idx, point.x, point.y) for point in points]
+        if not changes:
+            return
+        rows, xs, ys = (np.array(values, dtype=np.intp) for values in zip(*changes))
+        self._points.xy[rows] = np.stack([xs, ys], axis=1)
+        if self._index is not None:
+            for row, x, y in changes:
+                self._index.move(row, x, y)
+        self._rows_changed(int(rows.min()), int(rows.max()))
+        registry.increment(UPDATED_POINTS, len(changes), operation="move_many")
+
+    @contextmanager
+    def batch(self) -> "Iterator[PointsModel]":
+        """Coalesce the dataChanged of all the updates made inside the block into one.
+
+        Batches can be nested, and the views are notified when the outermost one ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_changes()
+
+    def _rows_changed(self, first: int, last: int):
+        if self._batch_depth == 0:
+            self.dataChanged.emit(self.index(first), self.index(last))
+        elif self._pending_rows is None:
+            self._pending_rows = (first, last)
+        else:
+            self._pending_rows = (min(first, self._pending_rows[0]), max(last, self._pending_rows[1]))
+
+    def _flush_changes(self):
+        if self._pending_rows is None:
+            return
+        first, last = self._pending_rows
+        self._pending_rows = None
+        self.dataChanged.emit(self.index(first), self.index(last))
+
+    def _invalidate_index(self, *args):
+        self._index = None
+
+    @property
+    def spatial_index(self) -> GridIndex:
+        """Index of the positions of the points. It only sees the changes made through the model."""
+        if self._index is None or len(self._index) != len(self._points):
+            self._index = GridIndex.from_points(self._points)
+        return self._index
+
+    def nearest_point(self, x: int, y: int, max_distance: "float | None" = None) -> "PointView | None":
+        """Point closest to (x, y), or None if there is none within `max_distance`."""
+        row = self.spatial_index.nearest(x, y, max_distance)
+        return None if row is None else self._points[row]
+
+    def points_near(self, x: int, y: int, radius: float) -> "list[PointView]":
+        """Points at most `radius` away from (x, y), closest first."""
+        return [self._points[row] for row in self.spatial_index.within_radius(x, y, radius).tolist()]
+
+    def points_in_rect(self, x: int, y: int, width: int, height: int) -> "list[PointView]":
+        return [self._points[row] for row in self.spatial_index.in_rect(x, y, width, height).tolist()]
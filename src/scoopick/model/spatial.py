@@ -0,0 +1,173 @@
+import math
+from typing import Iterable
+
+import numpy as np
+
+from ..data import PointSet, as_coords
+
+# Side of the cells of a GridIndex when none is given, in pixels
+DEFAULT_CELL_SIZE = 32
+
+
+class GridIndex:
+    """Spatial hash of point coordinates, for hit-testing and neighbourhood queries.
+
+    The plane is split into square cells, and each cell keeps the rows of the points inside it.
+    Queries only look at the cells overlapping the searched area, and moving a point only touches two cells.
+    Points with negative coordinates have not been placed yet and are never returned.
+    """
+
+    def __init__(self, cell_size: int = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            raise ValueError("The cell size must be positive")
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        # Cell of each row, or None if the point is not set
+        self._row_cells: list[tuple[int, int] | None] = []
+        self._xy = np.empty((0, 2), dtype=np.int64)
+        self._count = 0
+        # Bounds of the occupied cells, computed on demand
+        self._extent: "tuple[int, int, int, int] | None" = None
+
+    @classmethod
+    def from_points(cls, points: "PointSet | Iterable | np.ndarray", cell_size: int = DEFAULT_CELL_SIZE) -> "GridIndex":
+        index = cls(cell_size)
+        index.rebuild(points)
+        return index
+
+    @property
+    def cell_size(self) -> int:
+        return self._cell_size
+
+    def __len__(self) -> int:
+        return len(self._row_cells)
+
+    def _cell(self, x: int, y: int) -> "tuple[int, int] | None":
+        if x < 0 or y < 0:
+            return None
+        return x // self._cell_size, y // self._cell_size
+
+    def rebuild(self, points: "PointSet | Iterable | np.ndarray"):
+        """Index all the points again, e.g. after some have been inserted or removed."""
+        self._xy = np.array(as_coords(points), dtype=np.int64).reshape(-1, 2)
+        self._cells = {}
+        self._row_cells = []
+        self._count = 0
+        self._extent = None
+        for row, (x, y) in enumerate(self._xy.tolist()):
+            cell = self._cell(x, y)
+            self._row_cells.append(cell)
+            if cell is not None:
+                self._cells.setdefault(cell, set()).add(row)
+                self._count += 1
+
+    def move(self, row: int, x: int, y: int):
+        """Update the position of a single point."""
+        self._xy[row] = (x, y)
+        old_cell, new_cell = self._row_cells[row], self._cell(x, y)
+        if old_cell == new_cell:
+            return
+        self._extent = None
+        if old_cell is not None:
+            rows = self._cells[old_cell]
+            rows.discard(row)
+            if not rows:
+                del self._cells[old_cell]
+            self._count -= 1
+        if new_cell is not None:
+            self._cells.setdefault(new_cell, set()).add(row)
+            self._count += 1
+        self._row_cells[row] = new_cell
+
+    def _rows_in_cells(self, first: "tuple[int, int]", last: "tuple[int, int]") -> np.ndarray:
+        rows = []
+        # Iterate over whichever is smaller, the cells in the area or the occupied cells
+        if (last[0] - first[0] + 1) * (last[1] - first[1] + 1) <= len(self._cells):
+            for cx in range(first[0], last[0] + 1):
+                for cy in range(first[1], last[1] + 1):
+                    rows.extend(self._cells.get((cx, cy), ()))
+        else:
+            for (cx, cy), cell_rows in self._cells.items():
+                if first[0] <= cx <= last[0] and first[1] <= cy <= last[1]:
+                    rows.extend(cell_rows)
+        return np.array(rows, dtype=np.intp)
+
+    def in_rect(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """Rows of the points inside the rectangle, sorted."""
+        if width <= 0 or height <= 0:
+            return np.empty(0, dtype=np.intp)
+        right, bottom = x + width - 1, y + height - 1
+        first = (max(x, 0) // self._cell_size, max(y, 0) // self._cell_size)
+        last = (right // self._cell_size, bottom // self._cell_size)
+        rows = self._rows_in_cells(first, last)
+        xy = self._xy[rows]
+        inside = (xy[:, 0] >= x) & (xy[:, 0] <= right) & (xy[:, 1] >= y) & (xy[:, 1] <= bottom)
+        return np.sort(rows[inside])
+
+    def within_radius(self, x: int, y: int, radius: float) -> np.ndarray:
+        """Rows of the points at most `radius` away from (x, y), closest first."""
+        r = math.floor(radius)
+        rows = self.in_rect(x - r, y - r, 2 * r + 1, 2 * r + 1)
+        distances = np.hypot(*(self._xy[rows] - (x, y)).T)
+        order = np.argsort(distances, kind="stable")
+        return rows[order][distances[order] <= radius]
+
+    def nearest(self, x: int, y: int, max_distance: "float | None" = None) -> "int | None":
+        """Row of the point closest to (x, y), or None if there is none within `max_distance`."""
+        if not self._cells:
+            return None
+        if max_distance is not None:
+            rows = self.within_radius(x, y, max_distance)
+            return int(rows[0]) if len(rows) else None
+        # Look at growing rings of cells around (x, y), until no unexplored cell can hold a closer point.
+        # Rings nearer than the occupied cells are empty, and so are those beyond all of them
+        cx, cy = max(x, 0) // self._cell_size, max(y, 0) // self._cell_size
+        left, top, right, bottom = self._cell_extent()
+        ring = max(left - cx, cx - right, top - cy, cy - bottom, 0)
+        last_ring = max(cx - left, right - cx, cy - top, bottom - cy)
+        best, best_distance = None, math.inf
+        seen = visited = 0
+        while seen < self._count and ring <= last_ring:
+            # Points in this ring or farther are at least this far away
+            if (ring - 1) * self._cell_size > best_distance:
+                break
+            visited += 8 * ring if ring else 1
+            if visited > self._count:
+                # Sparse points: scanning them all is cheaper than visiting more cells
+                return self._nearest_brute_force(x, y)
+            rows = self._ring_rows(cx, cy, ring)
+            ring += 1
+            if not len(rows):
+                continue
+            seen += len(rows)
+            distances = np.hypot(*(self._xy[rows] - (x, y)).T)
+            i = int(distances.argmin())
+            if distances[i] < best_distance or (distances[i] == best_distance and rows[i] < best):
+                best, best_distance = int(rows[i]), float(distances[i])
+        return best
+
+    def _nearest_brute_force(self, x: int, y: int) -> int:
+        rows = np.flatnonzero((self._xy >= 0).all(axis=1))
+        distances = np.hypot(*(self._xy[rows] - (x, y)).T)
+        # argmin returns the first of equally close points, i.e. the lowest row like the ring search
+        return int(rows[distances.argmin()])
+
+    def _cell_extent(self) -> "tuple[int, int, int, int]":
+        """First and last occupied cells along each axis, as (left, top, right, bottom)."""
+        if self._extent is None:
+            cells = np.array(list(self._cells), dtype=np.int64)
+            (left, top), (right, bottom) = cells.min(axis=0).tolist(), cells.max(axis=0).tolist()
+            self._extent = (left, top, right, bottom)
+        return self._extent
+
+    def _ring_rows(self, cx: int, cy: int, ring: int) -> np.ndarray:
+        if ring == 0:
+            return np.array(list(self._cells.get((cx, cy), ())), dtype=np.intp)
+        rows = []
+        for i in range(-ring, ring + 1):
+            for cell in ((cx + i, cy - ring), (cx + i, cy + ring)):
+                rows.extend(self._cells.get(cell, ()))
+        for j in range(-ring + 1, ring):
+            for cell in ((cx - ring, cy + j), (cx + ring, cy + j)):
+                rows.extend(self._cells.get(cell, ()))
+        return np.array(rows, dtype=np.intp)
@@ -0,0 +1,193 @@
+import itertools
+import os
+from logging import getLogger
+from urllib.parse import unquote, urlparse
+
+from PySide6.QtCore import SLOT, QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
+from PySide6.QtDBus import QDBusConnection, QDBusMessage, QDBusPendingCallWatcher
+from PySide6.QtGui import QImage
+
+logger = getLogger(__name__)
+
+PORTAL_SERVICE = "org.freedesktop.portal.Desktop"
+PORTAL_PATH = "/org/freedesktop/portal/desktop"
+PORTAL_SCREENSHOT_INTERFACE = "org.freedesktop.portal.Screenshot"
+PORTAL_REQUEST_INTERFACE = "org.freedesktop.portal.Request"
+# Time to wait for the portal to deliver a screenshot before giving up
+DEFAULT_TIMEOUT_MS = 5000
+
+
+class _DecodeSignals(QObject):
+    """Created without a parent and owned by its task, so it outlives a request deleted during the decode."""
+
+    decoded = Signal(QImage, name="decoded")
+
+
+class _DecodeTask(QRunnable):
+    """Load the PNG written by the portal and delete it, off the GUI thread."""
+
+    def __init__(self, image_path: str, signals: _DecodeSignals):
+        super().__init__()
+        self._image_path = image_path
+        self._signals = signals
+
+    def run(self):
+        image = QImage(self._image_path)
+        try:
+            os.remove(self._image_path)
+        except OSError as e:
+            logger.warning("Could not remove portal screenshot '%s': %s", self._image_path, e)
+        self._signals.decoded.emit(image)
+
+
+class _PortalRequest(QObject):
+    """A single in-flight Screenshot request, identified by its handle token."""
+
+    def __init__(self, portal: "ScreenshotPortal", request_id: int, token: str, timeout: int):
+        super().__init__(portal)
+        self.request_id = request_id
+        self.token = token
+        self.handle = ""
+        self._done = False
+        self._timer = QTimer(self, singleShot=True, interval=timeout)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def start(self, service: str, sender: str):
+        # Subscribe before calling, so a fast portal cannot respond before we are listening
+        self._subscribe(f"{PORTAL_PATH}/request/{sender}/{self.token}")
+        self._timer.start()
+        message = QDBusMessage.createMethodCall(service, PORTAL_PATH, PORTAL_SCREENSHOT_INTERFACE, "Screenshot")
+        message.setArguments(["", {"interactive": False, "handle_token": self.token}])
+        pending = self._portal.connection.asyncCall(message, self._timer.interval())
+        watcher = QDBusPendingCallWatcher(pending, self)
+        watcher.finished.connect(self._on_call_finished)
+
+    def _subscribe(self, handle: str):
+        self._unsubscribe()
+        self.handle = handle
+        self._portal.connection.connect(
+            "", handle, PORTAL_REQUEST_INTERFACE, "Response", self, SLOT("on_response(uint, QVariantMap)")
+        )
+
+    def _unsubscribe(self):
+        if self.handle:
+            self._portal.connection.disconnect(
+                "", self.handle, PORTAL_REQUEST_INTERFACE, "Response", self, SLOT("on_response(uint, QVariantMap)")
+            )
+            self.handle = ""
+
+    @Slot(QDBusPendingCallWatcher)
+    def _on_call_finished(self, watcher: QDBusPendingCallWatcher):
+        reply = watcher.reply()
+        watcher.deleteLater()
+        if reply.type() in (QDBusMessage.MessageType.ErrorMessage, QDBusMessage.MessageType.InvalidMessage):
+            self._fail(f"failed to call Screenshot method: {reply.errorMessage()}")
+            return
+        handle = reply.arguments()[0].path()
+        if handle != self.handle:
+            # Portals older than version 0.9 do not honor the handle_token
+            logger.debug("Portal returned unexpected handle %s, subscribing to it", handle)
+            self._subscribe(handle)
+
+    @property
+    def _portal(self) -> "ScreenshotPortal":
+        # Not stored as an attribute: a reference cycle would leave the portal to be deleted at a random time by the GC
+        return self.parent()
+
+    @Slot()
+    def _on_timeout(self):
+        self._fail(f"timed out after {self._timer.interval()} ms")
+
+    @Slot("uint", "QVariantMap")
+    def on_response(self, status: int, response: dict):
+        logger.debug("Received response for request %d: %d, with results: %s", self.request_id, status, response)
+        if self._done:
+            return
+        if status != 0:
+            self._fail(f"portal returned status {status}")
+            return
+        image_path = unquote(urlparse(response.get("uri", "")).path)
+        signals = _DecodeSignals()
+        # Disconnected when the request is deleted, e.g. after a timeout, and the task then emits into nothing
+        signals.decoded.connect(self._on_decoded)
+        self._portal.thread_pool.start(_DecodeTask(image_path, signals))
+
+    @Slot(QImage)
+    def _on_decoded(self, image: QImage):
+        if self._done:
+            return
+        if image.isNull():
+            self._fail("could not load the screenshot returned by the portal")
+            return
+        self._finish()
+        self._portal.captured.emit(self.request_id, image)
+
+    def _fail(self, error_message: str):
+        if self._done:
+            return
+        self._finish()
+        logger.error("Error taking screenshot: %s", error_message)
+        self._portal.failed.emit(self.request_id, error_message)
+
+    def _finish(self):
+        self._done = True
+        self._timer.stop()
+        self._unsubscribe()
+        self.deleteLater()
+
+
+class ScreenshotPortal(QObject):
+    """Long-lived client for the xdg-desktop-portal Screenshot interface.
+
+    Requests are sent with non-blocking calls and a unique handle token each, so several can be in flight.
+    The resulting PNG is decoded in a worker thread, and every request either emits `captured`
+    or `failed` within `timeout` milliseconds.
+    """
+
+    captured = Signal(int, QImage, name="captured")
+    failed = Signal(int, str, name="failed")
+
+    def __init__(
+        self,
+        connection: QDBusConnection | None = None,
+        service: str = PORTAL_SERVICE,
+        timeout: int = DEFAULT_TIMEOUT_MS,
+        parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self._connection = connection if connection is not None else QDBusConnection.sessionBus()
+        self._service = service
+        # The request handle path embeds our unique bus name, without the leading ':' and with '.' replaced
+        self._sender = self._connection.baseService().lstrip(":").replace(".", "_")
+        self._timeout = timeout
+        self._ids = itertools.count(1)
+        self._token_prefix = f"scoopick_{os.getpid()}_{id(self):x}"
+        self._thread_pool = QThreadPool(self)
+
+    @property
+    def connection(self) -> QDBusConnection:
+        return self._connection
+
+    @property
+    def thread_pool(self) -> QThreadPool:
+        return self._thread_pool
+
+    @property
+    def timeout(self) -> int:
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout: int):
+        self._timeout = timeout
+
+    def request(self) -> int:
+        """Ask the portal for a screenshot without blocking.
+
+        Returns:
+            The id of the request, matching the one emitted by `captured` or `failed`.
+        """
+        request_id = next(self._ids)
+        logger.debug("Taking screenshot via portal, request %d", request_id)
+        request = _PortalRequest(self, request_id, f"{self._token_prefix}_{request_id}", self._timeout)
+        request.start(self._service, self._sender)
+        return request_id
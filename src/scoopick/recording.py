@@ -0,0 +1,322 @@
+"""Capture sources of Screenshot, to record the frames of a session and replay them later without the screen.
+
+Recordings are single files: a header with the layout of the screens, the raw RGBA pixels of each frame,
+and an index of the frames with their timestamp and position. They are memory-mapped when replayed,
+so any frame is read directly, without loading the others. A frame identical to the previous one
+only adds an entry to the index.
+"""
+
+import json
+import struct
+import threading
+import time
+from logging import getLogger
+from typing import BinaryIO
+
+import numpy as np
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage
+
+from .core import ScreenImage
+from .data import PACKAGE_NAME
+from .screenshot import desktop_rect, grab, screen_rects
+
+logger = getLogger(PACKAGE_NAME)
+
+_MAGIC = b"SCOOPREC"
+_INDEX_MAGIC = b"SCOOPIDX"
+_VERSION = 1
+# Magic, version and length of the JSON metadata
+_HEADER = struct.Struct("<8sII")
+# Offset and number of entries of the index, and magic
+_TRAILER = struct.Struct("<QQ8s")
+# Frames start on multiples of this, in bytes
+_ALIGNMENT = 64
+_INDEX_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("offset", "<u8"),
+        ("x", "<i4"),
+        ("y", "<i4"),
+        ("width", "<u4"),
+        ("height", "<u4"),
+    ]
+)
+
+
+class FrameRecorder:
+    """Write frames to a recording file, with the time they were captured at."""
+
+    def __init__(self, path: str, screens: "list[QRect] | None" = None):
+        """
+        Args:
+            path: file the recording is written to. It is only readable once the recorder is closed.
+            screens: area of each screen during the session, the current screens if None.
+        """
+        screens = screen_rects() if screens is None else screens
+        metadata = json.dumps(
+            {"screens": [[rect.x(), rect.y(), rect.width(), rect.height()] for rect in screens]}
+        ).encode()
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, len(metadata)))
+        self._file.write(metadata)
+        self._entries: list[tuple] = []
+        # Last frame written, to spot identical ones
+        self._previous: ScreenImage | None = None
+        self._start: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def write(self, frame: ScreenImage, timestamp: "float | None" = None):
+        """Append a frame.
+
+        Args:
+            timestamp: `time.monotonic()` at which the frame was captured, now if None.
+        """
+        if self._file is None:
+            raise ValueError("The recorder is closed")
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if self._start is None:
+            self._start = timestamp
+        pixels = frame.as_array(alpha=True)
+        x, y = frame.origin
+        height, width = pixels.shape[:2]
+        previous = self._entries[-1] if self._entries else None
+        if (
+            previous is not None
+            and previous[2:] == (x, y, width, height)
+            and np.array_equal(pixels, self._previous.as_array(alpha=True))
+        ):
+            offset = previous[1]
+        else:
+            offset = -self._file.tell() % _ALIGNMENT + self._file.tell()
+            self._file.seek(offset)
+            self._file.write(np.ascontiguousarray(pixels).data)
+            self._previous = frame
+        self._entries.append((timestamp - self._start, offset, x, y, width, height))
+
+    def close(self):
+        if self._file is None:
+            return
+        index = np.array(self._entries, dtype=_INDEX_DTYPE)
+        offset = -self._file.tell() % _ALIGNMENT + self._file.tell()
+        self._file.seek(offset)
+        self._file.write(index.tobytes())
+        self._file.write(_TRAILER.pack(offset, len(index), _INDEX_MAGIC))
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FrameRecording:
+    """Memory-mapped recording written by a FrameRecorder."""
+
+    def __init__(self, path: str):
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(self._data) < _HEADER.size + _TRAILER.size:
+            raise ValueError(f"'{path}' is not a recording")
+        magic, version, metadata_size = _HEADER.unpack_from(self._data, 0)
+        index_offset, count, index_magic = _TRAILER.unpack_from(self._data, len(self._data) - _TRAILER.size)
+        if magic != _MAGIC or index_magic != _INDEX_MAGIC:
+            raise ValueError(f"'{path}' is not a complete recording")
+        if version != _VERSION:
+            raise ValueError(f"Unsupported recording version {version}")
+        metadata = json.loads(bytes(self._data[_HEADER.size : _HEADER.size + metadata_size]))
+        self._screens = [QRect(*rect) for rect in metadata["screens"]]
+        self._index = np.frombuffer(self._data, dtype=_INDEX_DTYPE, count=count, offset=index_offset)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Time of each frame, in seconds since the first one."""
+        return self._index["timestamp"]
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1]) if len(self) else 0.0
+
+    @property
+    def screens(self) -> "list[QRect]":
+        """Area of each screen during the recording."""
+        return list(self._screens)
+
+    def frame_rect(self, index: int) -> QRect:
+        entry = self._index[index]
+        return QRect(int(entry["x"]), int(entry["y"]), int(entry["width"]), int(entry["height"]))
+
+    def index_at(self, elapsed: float) -> int:
+        """Index of the last frame captured at most `elapsed` seconds after the first one."""
+        return max(int(np.searchsorted(self.timestamps, elapsed, side="right")) - 1, 0)
+
+    def pixels(self, index: int) -> np.ndarray:
+        """Read-only (H, W, 4) RGBA view of a frame, in the mapped file."""
+        entry = self._index[index]
+        height, width, offset = int(entry["height"]), int(entry["width"]), int(entry["offset"])
+        return self._data[offset : offset + height * width * 4].reshape(height, width, 4)
+
+    def frame(self, index: int, region: "QRect | None" = None) -> ScreenImage:
+        """Frame at `index`, cropped to `region` in screen coordinates if given.
+
+        Only the pixels of the region are read and converted. A null frame is returned if they do not overlap.
+        """
+        rect = frame_rect = self.frame_rect(index)
+        pixels = self.pixels(index)
+        if region is not None and region != frame_rect:
+            rect = region.intersected(frame_rect)
+            if rect.isEmpty():
+                return ScreenImage(QImage())
+            x, y = rect.x() - frame_rect.x(), rect.y() - frame_rect.y()
+            pixels = pixels[y : y + rect.height(), x : x + rect.width()]
+        pixels = np.ascontiguousarray(pixels)
+        image = QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0], QImage.Format.Format_RGBA8888)
+        # Copy the pixels, so the frame does not depend on the mapped file. It holds a QImage, which replay can
+        # read on any thread and which only becomes a pixmap if the GUI displays it
+        return ScreenImage(image.copy(), origin=(rect.x(), rect.y()))
+
+    def __getitem__(self, index: int) -> ScreenImage:
+        return self.frame(index)
+
+
+class CaptureSource:
+    """Where a Screenshot gets its frames from: the screens by default, or a recording."""
+
+    # Whether the frames come from the screens. Screenshot then captures them itself when it has to go through
+    # the screenshot portal, and hands them to `record`
+    live = False
+
+    def grab(self, region: "QRect | None" = None) -> ScreenImage:
+        """Capture an area of the virtual desktop, or all of it if `region` is None."""
+        raise NotImplementedError
+
+    def screen_rects(self) -> "list[QRect]":
+        return screen_rects()
+
+    def desktop_rect(self) -> QRect:
+        return desktop_rect()
+
+    def record(self, frame: ScreenImage):
+        """Frame captured from the screens by the Screenshot instead of `grab`, for live sources."""
+
+    def close(self):
+        pass
+
+
+class ScreenSource(CaptureSource):
+    """Live screens, captured like a Screenshot does without a source."""
+
+    live = True
+
+    def grab(self, region: "QRect | None" = None) -> ScreenImage:
+        return grab(region)
+
+
+class RecordingSource(CaptureSource):
+    """Capture from another source, the screens by default, and record every frame to a file until closed."""
+
+    def __init__(self, path: str, source: "CaptureSource | None" = None):
+        self._source = ScreenSource() if source is None else source
+        self.live = self._source.live
+        self._recorder = FrameRecorder(path, self._source.screen_rects())
+        # Streams capture from their own thread
+        self._lock = threading.Lock()
+
+    def grab(self, region: "QRect | None" = None) -> ScreenImage:
+        frame = self._source.grab(region)
+        self.record(frame)
+        return frame
+
+    def record(self, frame: ScreenImage):
+        timestamp = time.monotonic()
+        if not frame.is_null:
+            with self._lock:
+                self._recorder.write(frame, timestamp)
+
+    def screen_rects(self) -> "list[QRect]":
+        return self._source.screen_rects()
+
+    def desktop_rect(self) -> QRect:
+        return self._source.desktop_rect()
+
+    def close(self):
+        with self._lock:
+            logger.info("Recorded %d frames", len(self._recorder))
+            self._recorder.close()
+
+
+class ReplaySource(CaptureSource):
+    """Replay a recording in place of the screens.
+
+    At the recorded speed, or a multiple of it, a capture returns the last frame recorded at the time elapsed since
+    the first capture. Without a speed, each capture returns the next frame, as fast as the script asks for them.
+    Once the recording is over, captures keep returning its last frame, or start again from the first one with `loop`.
+    """
+
+    def __init__(self, path: str, speed: "float | None" = 1.0, loop: bool = False):
+        """
+        Args:
+            speed: playback speed relative to the recording, or None to replay one frame per capture.
+        """
+        self._recording = FrameRecording(path)
+        if not len(self._recording):
+            raise ValueError(f"'{path}' has no frames")
+        self._speed = speed
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._start: float | None = None
+        self._next = 0
+
+    @property
+    def recording(self) -> FrameRecording:
+        return self._recording
+
+    @property
+    def finished(self) -> bool:
+        """Whether the last frame has been reached."""
+        if self._loop:
+            return False
+        if self._speed is None:
+            return self._next >= len(self._recording)
+        return self._start is not None and self._elapsed() > self._recording.duration
+
+    def _elapsed(self) -> float:
+        return (time.monotonic() - self._start) * self._speed
+
+    def _next_index(self) -> int:
+        count = len(self._recording)
+        with self._lock:
+            if self._speed is None:
+                index = self._next % count if self._loop else min(self._next, count - 1)
+                self._next += 1
+                return index
+            if self._start is None:
+                self._start = time.monotonic()
+            elapsed = self._elapsed()
+            if self._loop and self._recording.duration > 0:
+                elapsed %= self._recording.duration
+            return self._recording.index_at(elapsed)
+
+    def grab(self, region: "QRect | None" = None) -> ScreenImage:
+        return self._recording.frame(self._next_index(), region)
+
+    def rewind(self):
+        """Replay from the first frame."""
+        with self._lock:
+            self._start = None
+            self._next = 0
+
+    def screen_rects(self) -> "list[QRect]":
+        return self._recording.screens
+
+    def desktop_rect(self) -> QRect:
+        rect = QRect()
+        for screen in self._recording.screens:
+            rect = rect.united(screen)
+        return rect
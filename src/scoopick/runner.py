@@ -0,0 +1,356 @@
+import inspect
+import threading
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Callable
+
+from PySide6.QtCore import (
+    QCoreApplication,
+    QEventLoop,
+    QObject,
+    Qt,
+    QThread,
+    QTimer,
+    Signal,
+    Slot,
+)
+
+from .actions import ActionQueue
+from .core import AsyncWaiter, FrameDiffer, Waiter
+from .data import PACKAGE_NAME, Point, PointSet
+from .metrics import SCRIPT_RUN, registry
+from .screenshot import Screenshot, screen_geometries
+from .script import script_kwargs
+
+if TYPE_CHECKING:
+    import asyncio
+
+logger = getLogger(PACKAGE_NAME)
+
+# asyncio loop running on the Qt event loop, see qt_event_loop
+_qt_loop: "asyncio.AbstractEventLoop | None" = None
+
+
+class ScriptCancelled(Exception):
+    """Raised inside a script when it has been asked to stop."""
+
+
+class CancelToken:
+    """Thread-safe flag used to ask a running script to stop.
+
+    Scripts that loop for a long time should check it, or use `wait` instead of `time.sleep`.
+    Calls to the helpers passed to the script also raise ScriptCancelled once the token is cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Raise ScriptCancelled if the token has been cancelled."""
+        if self._event.is_set():
+            raise ScriptCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep for up to `timeout` seconds, waking up early on cancellation.
+
+        Returns:
+            True if the token has been cancelled.
+        """
+        return self._event.wait(timeout)
+
+
+class GuiInvoker(QObject):
+    """Run callables on the thread owning this object, blocking the calling thread until they return."""
+
+    _requested = Signal(object, name="_requested")
+
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._requested.connect(self._execute, Qt.ConnectionType.BlockingQueuedConnection)
+
+    @Slot(object)
+    def _execute(self, call: dict):
+        try:
+            call["result"] = call["func"](*call["args"], **call["kwargs"])
+        except BaseException as e:
+            call["error"] = e
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        if QThread.currentThread() is self.thread():
+            return func(*args, **kwargs)
+        call = {"func": func, "args": args, "kwargs": kwargs}
+        self._requested.emit(call)
+        if "error" in call:
+            raise call["error"]
+        return call.get("result")
+
+    def wrap(self, func: Callable) -> Callable:
+        """Version of `func` that can be called from any thread."""
+        return lambda *args, **kwargs: self.call(func, *args, **kwargs)
+
+
+class _ScriptThread(QThread):
+    def __init__(self, target: Callable[[], None], parent: QObject | None = None):
+        super().__init__(parent)
+        self.setObjectName("scoopick-script")
+        self._target = target
+
+    def run(self):
+        self._target()
+
+
+class ScriptRunner(QObject):
+    """Run a script's `run` function on a worker thread.
+
+    Captures requested by the script are marshalled to the thread owning the Screenshot,
+    while progress and status updates are sent back through signals.
+    """
+
+    progress = Signal(int, int, name="progress")
+    status = Signal(str, name="status")
+    succeeded = Signal(name="succeeded")
+    failed = Signal(str, name="failed")
+    cancelled = Signal(name="cancelled")
+    finished = Signal(name="finished")
+
+    def __init__(
+        self,
+        run: Callable,
+        points: "PointSet | list[Point]",
+        screenshot: Screenshot,
+        parent: QObject | None = None,
+    ):
+        super().__init__(parent)
+        self._run = run
+        # The script gets its own copy, so that editing the points in the GUI cannot race with it
+        self._point_set = points.copy() if isinstance(points, PointSet) else PointSet.from_points(points)
+        self._points = self._point_set.to_points()
+        self._screenshot = screenshot
+        self._token = CancelToken()
+        self._invoker = GuiInvoker(self)
+        self._thread: _ScriptThread | None = None
+
+    @property
+    def cancel_token(self) -> CancelToken:
+        return self._token
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.isRunning()
+
+    def start(self):
+        self._thread = _ScriptThread(self._target, self)
+        self._thread.finished.connect(self.finished)
+        self._thread.start()
+
+    def cancel(self):
+        logger.info("Stopping script")
+        self._token.cancel()
+
+    def wait(self, timeout: int = -1) -> bool:
+        """Wait until the script ends, for at most `timeout` milliseconds if not negative.
+
+        On the thread of the runner, events are processed in the meantime, since the script may be waiting
+        for a capture to be run there.
+
+        Returns:
+            True if the script is not running anymore.
+        """
+        if not self.running:
+            return True
+        if QThread.currentThread() is not self.thread():
+            return self._thread.wait(timeout) if timeout >= 0 else self._thread.wait()
+        return self._wait_processing_events(timeout)
+
+    def _wait_processing_events(self, timeout: int) -> bool:
+        loop = QEventLoop()
+        self.finished.connect(loop.quit)
+        if timeout >= 0:
+            QTimer.singleShot(timeout, loop, loop.quit)
+        loop.exec()
+        self.finished.disconnect(loop.quit)
+        return not self.running
+
+    def _guarded(self, func: Callable) -> Callable:
+        gui_func = self._invoker.wrap(func)
+
+        def guarded(*args, **kwargs):
+            self._token.check()
+            return gui_func(*args, **kwargs)
+
+        return guarded
+
+    def _actions(self, **kwargs) -> ActionQueue:
+        self._token.check()
+        if kwargs.get("backend") is None and "screens" not in kwargs:
+            # Read on the GUI thread, the queue is created on the script thread
+            kwargs["screens"] = self._invoker.call(screen_geometries)
+        return ActionQueue(cancel_token=self._token, **kwargs)
+
+    def _report_progress(self, done: int, total: int = 0):
+        self._token.check()
+        self.progress.emit(done, total)
+
+    def _report_status(self, text: str):
+        self._token.check()
+        self.status.emit(text)
+
+    def helpers(self) -> "dict[str, Any]":
+        """All the optional helpers a script can ask for, by parameter name."""
+        capture = self._guarded(self._screenshot.screenshot_sync)
+        waiter = Waiter(capture)
+        return {
+            "capture_screenshot": capture,
+            "wait_for_color": waiter.wait_for_color,
+            "wait_for_change": waiter.wait_for_change,
+            "wait_until_stable": waiter.wait_until_stable,
+            "stream": self._guarded(self._screenshot.stream),
+            "screens": self._guarded(self._screenshot.screen_rects),
+            "frame_differ": FrameDiffer(self._point_set),
+            "actions": self._actions,
+            "point_set": self._point_set,
+            "cancel_token": self._token,
+            "progress": self._report_progress,
+            "status": self._report_status,
+        }
+
+    def _target(self):
+        helpers = self.helpers()
+        capture = helpers.pop("capture_screenshot")
+        try:
+            with registry.timer(SCRIPT_RUN, runner="thread"):
+                self._run(self._points, capture, **script_kwargs(self._run, helpers))
+        except ScriptCancelled:
+            logger.info("Script stopped")
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            if self._token.cancelled:
+                self.cancelled.emit()
+            else:
+                self.succeeded.emit()
+
+
+def qt_event_loop() -> "asyncio.AbstractEventLoop":
+    """asyncio event loop driven by the Qt event loop of the application, created on first use.
+
+    asyncio only finds it running while it drives the application, so start the application with
+    `qt_event_loop().run_forever()` instead of `exec()` to run async scripts.
+    """
+    global _qt_loop
+    if _qt_loop is None or _qt_loop.is_closed():
+        # QtAsyncio, and asyncio itself, are only imported when an async script is run
+        from PySide6.QtAsyncio import QAsyncioEventLoop
+
+        _qt_loop = QAsyncioEventLoop(QCoreApplication.instance(), quit_qapp=False)
+    return _qt_loop
+
+
+class AsyncScriptRunner(ScriptRunner):
+    """Run a script's `async def run` as a task of an asyncio loop driven by the Qt event loop.
+
+    The script runs on the GUI thread between its awaits, so it must not block: captures and waits are awaitable,
+    and CPU-heavy work can be sent to a thread with `asyncio.to_thread`. A script can overlap captures,
+    input and computations, or drive several targets at once with `asyncio.gather`, without threads of its own.
+    """
+
+    def __init__(
+        self,
+        run: Callable,
+        points: "PointSet | list[Point]",
+        screenshot: Screenshot,
+        parent: QObject | None = None,
+    ):
+        super().__init__(run, points, screenshot, parent)
+        self._task: "asyncio.Task | None" = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        import asyncio
+
+        loop = qt_event_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not loop:
+            raise RuntimeError("Async scripts need the application to run with qt_event_loop().run_forever()")
+        self._task = loop.create_task(self._target())
+        self._task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: "asyncio.Task"):
+        # Cancelled before it got to run
+        if task.cancelled():
+            self.cancelled.emit()
+        self.finished.emit()
+
+    def cancel(self):
+        super().cancel()
+        if self.running:
+            self._task.cancel()
+
+    def wait(self, timeout: int = -1) -> bool:
+        """Process events until the script ends, since it runs on this thread."""
+        if not self.running:
+            return True
+        return self._wait_processing_events(timeout)
+
+    def _checked(self, func: Callable) -> Callable:
+        async def checked(*args, **kwargs):
+            self._token.check()
+            return await func(*args, **kwargs)
+
+        return checked
+
+    def helpers(self) -> "dict[str, Any]":
+        """Same helpers as ScriptRunner, with awaitable captures and waits."""
+        helpers = super().helpers()
+        capture = self._checked(self._screenshot.screenshot_async)
+        waiter = AsyncWaiter(capture)
+        helpers.update(
+            capture_screenshot=capture,
+            wait_for_color=self._checked(waiter.wait_for_color),
+            wait_for_change=self._checked(waiter.wait_for_change),
+            wait_until_stable=self._checked(waiter.wait_until_stable),
+        )
+        return helpers
+
+    async def _target(self):
+        import asyncio
+
+        helpers = self.helpers()
+        capture = helpers.pop("capture_screenshot")
+        try:
+            with registry.timer(SCRIPT_RUN, runner="async"):
+                await self._run(self._points, capture, **script_kwargs(self._run, helpers))
+        except (ScriptCancelled, asyncio.CancelledError):
+            logger.info("Script stopped")
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            if self._token.cancelled:
+                self.cancelled.emit()
+            else:
+                self.succeeded.emit()
+
+
+def create_runner(
+    run: Callable,
+    points: "PointSet | list[Point]",
+    screenshot: Screenshot,
+    parent: QObject | None = None,
+) -> ScriptRunner:
+    """AsyncScriptRunner for an `async def run`, ScriptRunner for a plain function."""
+    runner_class = AsyncScriptRunner if inspect.iscoroutinefunction(run) else ScriptRunner
+    return runner_class(run, points, screenshot, parent)
@@ -1,89 +1,376 @@
+import math
 import os
 import sys
 from logging import getLogger
+from typing import TYPE_CHECKING, Iterable, Union
 
-from PySide6.QtCore import SLOT, QEventLoop, QObject, Signal, Slot
-from PySide6.QtDBus import QDBusConnection, QDBusInterface, QDBusMessage
-from PySide6.QtGui import QGuiApplication, QPixmap
+from PySide6.QtCore import QEventLoop, QObject, QPoint, QRect, Qt, Signal, Slot
+from PySide6.QtGui import QGuiApplication, QImage, QPainter, QPixmap, QScreen
+
+from .core import ScreenImage
+from .data import Point, PointSet, as_coords
+from .metrics import CAPTURE, CAPTURED_PIXELS, registry
+from .stream import DEFAULT_STREAM_CAPACITY, FrameStream
+
+if TYPE_CHECKING:
+    from .portal import ScreenshotPortal
+    from .recording import CaptureSource
 
 logger = getLogger(__name__)
 
+# Capture only the bounding box of the tracked points
+AUTO_REGION = "auto"
+# Extra pixels added around the tracked points in auto region mode
+DEFAULT_REGION_MARGIN = 16
+
+Region = Union[QRect, "tuple[int, int, int, int]", int, str, None]
+
+
+def points_bounding_rect(points: "PointSet | Iterable[Point]", margin: int = DEFAULT_REGION_MARGIN) -> QRect:
+    """Smallest rectangle containing all the points that have been set, grown by `margin` on each side."""
+    coords = as_coords(points)
+    coords = coords[(coords >= 0).all(axis=1)]
+    if not len(coords):
+        return QRect()
+    (left, top), (right, bottom) = coords.min(axis=0).tolist(), coords.max(axis=0).tolist()
+    return QRect(left - margin, top - margin, right - left + 1 + 2 * margin, bottom - top + 1 + 2 * margin)
+
+
+def _device_rects(screens: "list[tuple[QRect, float]]") -> "list[QRect]":
+    """Area in screen coordinates of screens given by their logical geometry and device pixel ratio."""
+    rects = [
+        QRect(
+            round(geometry.x() * dpr),
+            round(geometry.y() * dpr),
+            round(geometry.width() * dpr),
+            round(geometry.height() * dpr),
+        )
+        for geometry, dpr in screens
+    ]
+    if not rects:
+        return []
+    left, top = min(rect.left() for rect in rects), min(rect.top() for rect in rects)
+    return [rect.translated(-left, -top) for rect in rects]
+
+
+def _screens() -> "list[tuple[QScreen, QRect]]":
+    """Screens with their area in screen coordinates.
+
+    Screen coordinates are in device pixels, with their origin at the top-left corner of the virtual desktop,
+    so that they are never negative. Each screen is placed at its logical position scaled by its own pixel ratio.
+    """
+    screens = QGuiApplication.screens()
+    return list(zip(screens, _device_rects(screen_geometries(screens))))
+
+
+def screen_geometries(screens: "list[QScreen] | None" = None) -> "list[tuple[QRect, float]]":
+    """Logical geometry, as used by the OS, and device pixel ratio of each screen."""
+    screens = QGuiApplication.screens() if screens is None else screens
+    return [(screen.geometry(), screen.devicePixelRatio()) for screen in screens]
+
+
+def to_global(position: "tuple[int, int]", screens: "list[tuple[QRect, float]] | None" = None) -> "tuple[int, int]":
+    """Convert a position in screen coordinates to the logical global coordinates of the OS, e.g. to move the mouse.
+
+    Args:
+        screens: logical geometry and device pixel ratio of each screen, the current ones if None.
+    """
+    screens = screen_geometries() if screens is None else screens
+    rects = _device_rects(screens)
+    if not rects:
+        return position
+    x, y = position
+
+    def distance(rect: QRect) -> int:
+        dx = max(rect.left() - x, 0, x - rect.right())
+        dy = max(rect.top() - y, 0, y - rect.bottom())
+        return dx * dx + dy * dy
+
+    # Screen containing the position, or the closest one
+    index = min(range(len(rects)), key=lambda i: distance(rects[i]))
+    (geometry, dpr), rect = screens[index], rects[index]
+    return geometry.x() + round((x - rect.x()) / dpr), geometry.y() + round((y - rect.y()) / dpr)
+
+
+def screen_rects() -> "list[QRect]":
+    """Area of each screen in screen coordinates, in the order of `QGuiApplication.screens()`."""
+    return [rect for _, rect in _screens()]
+
+
+def desktop_rect() -> QRect:
+    """Bounding box of all the screens, in screen coordinates."""
+    rect = QRect()
+    for screen_rect in screen_rects():
+        rect = rect.united(screen_rect)
+    return rect
+
+
+def split_region(region: QRect, rects: "list[QRect]") -> "list[tuple[int, QRect]]":
+    """Parts of `region` on each screen, as (index of the screen, part) for the screens it overlaps."""
+    parts = []
+    for i, rect in enumerate(rects):
+        part = region.intersected(rect)
+        if not part.isEmpty():
+            parts.append((i, part))
+    return parts
+
+
+def stitch(region: QRect, parts: "list[ScreenImage]") -> QImage:
+    """Single image covering `region`, with each part drawn at its origin. Areas outside of all parts are black."""
+    image = QImage(region.size(), QImage.Format.Format_RGB32)
+    image.fill(Qt.GlobalColor.black)
+    painter = QPainter(image)
+    for part in parts:
+        painter.drawPixmap(QPoint(part.origin[0] - region.x(), part.origin[1] - region.y()), part.pixmap)
+    painter.end()
+    return image
+
+
+def _grab_screen(screen: QScreen, screen_rect: QRect, part: QRect) -> ScreenImage:
+    if part == screen_rect:
+        return ScreenImage(screen.grabWindow(0), origin=(screen_rect.x(), screen_rect.y()))
+    # Parts are in device pixels, like the points picked on the screenshot, while grabWindow wants logical ones
+    # relative to the screen
+    dpr = screen.devicePixelRatio()
+    x, y = math.floor((part.x() - screen_rect.x()) / dpr), math.floor((part.y() - screen_rect.y()) / dpr)
+    width = math.ceil((part.x() - screen_rect.x() + part.width()) / dpr) - x
+    height = math.ceil((part.y() - screen_rect.y() + part.height()) / dpr) - y
+    origin = (screen_rect.x() + round(x * dpr), screen_rect.y() + round(y * dpr))
+    return ScreenImage(screen.grabWindow(0, x, y, width, height), origin=origin)
+
+
+@registry.timed(CAPTURE, backend="qt")
+def grab(region: QRect | None = None) -> ScreenImage:
+    """Capture an area of the virtual desktop, or all of it if `region` is None.
+
+    Only the screens overlapping the area are grabbed, and their parts are stitched into a single frame.
+    Like any use of QPixmap, it must be called on the GUI thread.
+    """
+    screens = _screens()
+    if region is None:
+        region = desktop_rect()
+    parts = split_region(region, [rect for _, rect in screens])
+    if not parts:
+        return ScreenImage(QPixmap())
+    if len(parts) == 1 and parts[0][1] == region:
+        i, part = parts[0]
+        frame = _grab_screen(*screens[i], part)
+    else:
+        grabbed = [_grab_screen(*screens[i], part) for i, part in parts]
+        frame = ScreenImage(stitch(region, grabbed), origin=(region.x(), region.y()))
+    if registry.enabled:
+        registry.increment(CAPTURED_PIXELS, frame.width * frame.height, backend="qt")
+    return frame
+
 
 class Screenshot(QObject):
     screenshotted = Signal(QPixmap, name="screenshotted")
-    _screenshotted = Signal(QPixmap, name="_screenshotted")
 
-    def __init__(self):
+    def __init__(self, source: "CaptureSource | None" = None):
+        """
+        Args:
+            source: where the frames come from instead of the screens, e.g. a scoopick.recording.ReplaySource.
+        """
         super().__init__()
+        self._source = source
         # Check if running on Wayland and on Linux
         self._wayland = "WAYLAND_DISPLAY" in os.environ and sys.platform.startswith("linux")
-        self._last_screenshot = None
-        self._sync_mode = False
+        self._portal: "ScreenshotPortal | None" = None
+        self._portal_requests: set[int] = set()
+        if self._wayland:
+            # QtDBus is only needed, and thus only imported, on Wayland
+            from .portal import ScreenshotPortal
+
+            self._portal = ScreenshotPortal(parent=self)
+            self._portal.captured.connect(self._on_portal_captured)
+            self._portal.failed.connect(self._on_portal_failed)
+        self._region: Region = None
+        self._auto_region = QRect()
+
+    @property
+    def source(self) -> "CaptureSource | None":
+        """Source of the frames, or None for the screens."""
+        return self._source
+
+    @source.setter
+    def source(self, source: "CaptureSource | None"):
+        self._source = source
+
+    @property
+    def _uses_portal(self) -> bool:
+        # Live sources, like the recording of the screens, are captured through the portal where it is needed
+        return self._portal is not None and (self._source is None or self._source.live)
+
+    def _captured(self, frame: ScreenImage) -> ScreenImage:
+        """Hand a frame captured through the portal to the source, e.g. to record it."""
+        if registry.enabled:
+            registry.increment(CAPTURED_PIXELS, frame.width * frame.height, backend="portal")
+        if self._source is not None:
+            self._source.record(frame)
+        return frame
+
+    def screen_rects(self) -> "list[QRect]":
+        """Area of each screen, those of the recording when replaying one."""
+        return screen_rects() if self._source is None else self._source.screen_rects()
+
+    @property
+    def region(self) -> Region:
+        """Default region used by `screenshot_sync`.
+
+        Either None (all the screens), a rect, the index of a screen or AUTO_REGION.
+        """
+        return self._region
+
+    @region.setter
+    def region(self, region: Region):
+        self._region = region
+
+    def track_points(self, points: "PointSet | Iterable[Point]", margin: int = DEFAULT_REGION_MARGIN):
+        """Set the points whose bounding box is captured when the region is AUTO_REGION."""
+        self._auto_region = points_bounding_rect(points, margin)
+
+    def _resolve_region(self, region: Region) -> QRect | None:
+        if region is None:
+            region = self._region
+        if region == AUTO_REGION:
+            region = self._auto_region
+        if region is None:
+            return None
+        if isinstance(region, int):
+            rects = self.screen_rects()
+            if not 0 <= region < len(rects):
+                logger.warning("There is no screen %d, capturing all the screens", region)
+                return None
+            return rects[region]
+        if isinstance(region, tuple):
+            region = QRect(*region)
+        region = region.intersected(desktop_rect() if self._source is None else self._source.desktop_rect())
+        if region.isEmpty():
+            logger.warning("Capture region %s is outside of the screens, capturing all of them", region)
+            return None
+        return region
+
+    def _grab(self, region: QRect | None) -> ScreenImage:
+        return grab(region) if self._source is None else self._source.grab(region)
 
     def screenshot(self):
-        if self._wayland:
-            self._screenshot_wayland()
+        if self._uses_portal:
+            self._portal_requests.add(self._portal.request())
         else:
-            screen = QGuiApplication.primaryScreen()
-            self.screenshotted.emit(screen.grabWindow(0))
-
-    def _check_portal_response(self, response, error_message):
-        if response.type() in (
-            QDBusMessage.MessageType.ErrorMessage,
-            QDBusMessage.MessageType.InvalidMessage,
-        ):
-            logger.error("Error taking screenshot: %s", error_message)
-            return False
-        return True
-
-    @Slot("uint", "QVariantMap")
-    def response_callback(self, status, response):
-        logger.debug("Received response: %d, with results: %s", status, response)
-        if status == 0:
-            image_path = response.get("uri", "").replace("file://", "")
-            image = QPixmap()
-            image.load(image_path)
-            os.remove(image_path)
-            if not self._sync_mode:
-                self.screenshotted.emit(image)
-            else:
-                self._last_screenshot = image
-                self._screenshotted.emit(image)
-
-    def _screenshot_wayland(self):
-        service = "org.freedesktop.portal.Desktop"
-        path = "/org/freedesktop/portal/desktop"
-        iface = "org.freedesktop.portal.Screenshot"
-
-        logger.debug("Taking screenshot via portal...")
-        iface = QDBusInterface(service, path, interface=iface, connection=QDBusConnection.sessionBus())
-        screenshot_response = iface.call("Screenshot", "", {"interactive": False, "handle_token": "scoopick"})
-        if not self._check_portal_response(screenshot_response, "Failed to call Screenshot method"):
-            return
-
-        QDBusConnection.sessionBus().connect(
-            "",
-            screenshot_response.arguments()[0].path(),
-            "org.freedesktop.portal.Request",
-            "Response",
-            self,
-            SLOT("response_callback(uint, QVariantMap)"),
-        )
+            self.screenshotted.emit(self._grab(None).pixmap)
+
+    @Slot(int, QImage)
+    def _on_portal_captured(self, request_id: int, image: QImage):
+        if request_id in self._portal_requests:
+            self._portal_requests.discard(request_id)
+            self.screenshotted.emit(self._captured(ScreenImage(QPixmap.fromImage(image))).pixmap)
+
+    @Slot(int, str)
+    def _on_portal_failed(self, request_id: int, error_message: str):
+        self._portal_requests.discard(request_id)
+
+    def _screenshot_wayland_sync(self, region: QRect | None) -> ScreenImage:
+        request_id = self._portal.request()
+        images: list[QImage] = []
+        loop = QEventLoop()
 
-    def screenshot_sync(self) -> QPixmap:
-        self._last_screenshot = None
-        self._sync_mode = True
+        def on_captured(captured_id: int, image: QImage):
+            if captured_id == request_id:
+                images.append(image)
+                loop.quit()
+
+        def on_failed(failed_id: int, error_message: str):
+            if failed_id == request_id:
+                loop.quit()
+
+        self._portal.captured.connect(on_captured)
+        self._portal.failed.connect(on_failed)
+        # The portal guarantees either signal within its timeout, so this cannot hang
+        with registry.timer(CAPTURE, backend="portal"):
+            loop.exec()
+        self._portal.captured.disconnect(on_captured)
+        self._portal.failed.disconnect(on_failed)
+
+        if not images:
+            return ScreenImage(QPixmap())
+        # The portal always returns the whole screen
+        if region is None:
+            return self._captured(ScreenImage(QPixmap.fromImage(images[0])))
+        return self._captured(ScreenImage(QPixmap.fromImage(images[0].copy(region)), origin=(region.x(), region.y())))
+
+    def screenshot_sync(self, region: Region = None) -> ScreenImage:
+        """Capture the screen and wait for the result.
+
+        Args:
+            region: area to capture, in screen coordinates, or the index of a screen.
+                If None, the default `region` is used. AUTO_REGION captures the bounding box of the tracked points,
+                so only the screens they are on are grabbed.
+
+        Returns:
+            The captured frame. Sampling it with screen coordinates works regardless of the region.
+        """
+        region = self._resolve_region(region)
+        if self._uses_portal:
+            return self._screenshot_wayland_sync(region)
+        return self._grab(region)
+
+    async def screenshot_async(self, region: Region = None) -> ScreenImage:
+        """Awaitable version of `screenshot_sync`, for scripts written with `async def run`.
+
+        The screens are grabbed on this thread, where QPixmaps can be used, and the frame is converted to an array
+        on a worker thread. Portal captures are awaited without a nested event loop, so the GUI and the other tasks
+        of the script keep running meanwhile.
+        """
+        # asyncio is only imported by the scripts that use it
+        import asyncio
+
+        region = self._resolve_region(region)
+        loop = asyncio.get_running_loop()
+        if not self._uses_portal:
+            frame = self._grab(region).to_image()
+            await loop.run_in_executor(None, frame.as_array)
+            return frame
+
+        future = loop.create_future()
+        request_id = self._portal.request()
+
+        def on_captured(captured_id: int, image: QImage):
+            if captured_id == request_id and not future.done():
+                future.set_result(image)
+
+        def on_failed(failed_id: int, error_message: str):
+            if failed_id == request_id and not future.done():
+                future.set_result(None)
+
+        self._portal.captured.connect(on_captured)
+        self._portal.failed.connect(on_failed)
         try:
-            if self._wayland:
-                self._screenshot_wayland()
-                loop = QEventLoop()
-                self._screenshotted.connect(loop.quit)
-                loop.exec()
-                self._screenshotted.disconnect(loop.quit)
-                self._sync_mode = False
-                return self._last_screenshot
-
-            screen = QGuiApplication.primaryScreen()
+            with registry.timer(CAPTURE, backend="portal"):
+                image = await future
         finally:
-            self._sync_mode = False
-        return screen.grabWindow(0)
+            self._portal.captured.disconnect(on_captured)
+            self._portal.failed.disconnect(on_failed)
+        if image is None:
+            return ScreenImage(QPixmap())
+        if region is None:
+            return self._captured(ScreenImage(QPixmap.fromImage(image)))
+        return self._captured(ScreenImage(QPixmap.fromImage(image.copy(region)), origin=(region.x(), region.y())))
+
+    def stream(self, fps: float = 30, region: Region = None, capacity: int = DEFAULT_STREAM_CAPACITY) -> FrameStream:
+        """Start capturing continuously on a background thread.
+
+        Args:
+            fps: target number of frames per second.
+            region: area of the screen to capture, resolved like in `screenshot_sync`.
+            capacity: number of frames kept in the ring buffer.
+
+        Returns:
+            The running stream. Its `latest` frame can be read at any time without waiting for a capture.
+        """
+        if not self._uses_portal:
+            return FrameStream(fps, self._resolve_region(region), self._grab, capacity, parent=self).start()
+        stream = FrameStream(fps, self._resolve_region(region), None, capacity, parent=self)
+        if self._source is not None:
+            # Called directly on the stream thread
+            stream.frame_captured.connect(lambda frame: self._source.record(frame.image))
+        return stream.start()
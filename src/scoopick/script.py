@@ -0,0 +1,55 @@
+import importlib
+import importlib.util
+import inspect
+import sys
+from types import ModuleType
+from typing import Any, Callable
+
+# Name under which the loaded script is registered in sys.modules
+SCRIPT_MODULE_NAME = "script"
+
+
+class MissingRunError(ValueError):
+    """The script does not define a `run` function."""
+
+
+def load_script(filepath: str) -> ModuleType:
+    """Import a user script from a file, replacing any previously loaded one.
+
+    Raises:
+        MissingRunError: if the script does not define a callable `run`.
+    """
+    if SCRIPT_MODULE_NAME in sys.modules:
+        del sys.modules[SCRIPT_MODULE_NAME]
+    try:
+        importlib.invalidate_caches()
+    except Exception:
+        pass
+    # Import the input file as a module
+    spec = importlib.util.spec_from_file_location(SCRIPT_MODULE_NAME, filepath)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[SCRIPT_MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    # Check if the module has a 'run' function
+    if not callable(getattr(module, "run", None)):
+        raise MissingRunError(f"Script '{filepath}' must contain a function called 'run'")
+    return module
+
+
+def script_kwargs(run: Callable, available: "dict[str, Any]") -> "dict[str, Any]":
+    """Select the optional helpers a script's `run` function asks for.
+
+    Scripts declare the helpers they want as extra parameters of `run`, after `points` and `capture_screenshot`,
+    so that older scripts taking only the first two keep working.
+
+    Args:
+        run: the `run` function of the script.
+        available: all the helpers that can be passed, by parameter name.
+
+    Returns:
+        The helpers accepted by `run`, or all of them if it takes `**kwargs`.
+    """
+    parameters = inspect.signature(run).parameters
+    if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return dict(available)
+    return {name: value for name, value in available.items() if name in parameters}
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import deque
+from logging import getLogger
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+from PySide6.QtCore import (
+    QCoreApplication,
+    QEventLoop,
+    QMetaObject,
+    QObject,
+    QRect,
+    Qt,
+    QThread,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QImage
+
+from .core import ScreenImage
+
+if TYPE_CHECKING:
+    from .portal import ScreenshotPortal
+
+logger = getLogger(__name__)
+
+# Number of frames kept by a stream when no capacity is given
+DEFAULT_STREAM_CAPACITY = 8
+
+
+class Frame(NamedTuple):
+    """Frame captured by a stream, with the `time.monotonic()` at which it was received."""
+
+    timestamp: float
+    image: ScreenImage
+
+
+class _StreamWorker(QObject):
+    """Lives in the stream thread and requests a frame on each timer tick.
+
+    Frames are grabbed on the GUI thread, where QPixmaps can be used, or by the screenshot portal,
+    and only converted to arrays here.
+    """
+
+    captured = Signal(object, name="captured")
+    grab_requested = Signal(object, name="grabRequested")
+
+    def __init__(self, interval: int, region: QRect | None, use_portal: bool):
+        super().__init__()
+        self._interval = interval
+        self._region = region
+        self._use_portal = use_portal
+        self._timer: QTimer | None = None
+        self._portal: "ScreenshotPortal | None" = None
+        # Never queue more than one request, slow captures just lower the frame rate
+        self._busy = False
+
+    @Slot()
+    def start(self):
+        # Created here so that the timer and the portal belong to the stream thread
+        self._timer = QTimer(self, interval=self._interval)
+        self._timer.timeout.connect(self._tick)
+        if self._use_portal:
+            from .portal import ScreenshotPortal
+
+            self._portal = ScreenshotPortal(parent=self)
+            self._portal.captured.connect(self._on_portal_captured)
+            self._portal.failed.connect(self._on_portal_failed)
+        self._timer.start()
+        self._tick()
+
+    @Slot()
+    def stop(self):
+        if self._timer is not None:
+            self._timer.stop()
+
+    @Slot()
+    def _tick(self):
+        if self._busy:
+            return
+        self._busy = True
+        if self._portal is not None:
+            self._portal.request()
+        else:
+            self.grab_requested.emit(self._region)
+
+    @Slot(object)
+    def _on_grabbed(self, image: ScreenImage):
+        self._busy = False
+        self._publish(image)
+
+    @Slot(int, QImage)
+    def _on_portal_captured(self, request_id: int, image: QImage):
+        self._busy = False
+        region = self._region
+        if region is None:
+            self._publish(ScreenImage(image))
+        else:
+            self._publish(ScreenImage(image.copy(region), origin=(region.x(), region.y())))
+
+    @Slot(int, str)
+    def _on_portal_failed(self, request_id: int, error_message: str):
+        self._busy = False
+
+    def _publish(self, image: ScreenImage):
+        if image.is_null:
+            return
+        # Convert in the stream thread, so that readers can sample the frame right away.
+        # Frames hold QImages, which unlike QPixmaps can be used off the GUI thread
+        image.as_array()
+        self.captured.emit(Frame(time.monotonic(), image))
+
+
+class FrameStream(QObject):
+    """Continuous capture running on a background thread.
+
+    Frames are stored in a fixed-size ring buffer, so reading the most recent one never waits for a capture.
+    Use it as a context manager, or call `stop` when done. It must be created on the GUI thread, where the
+    screens are grabbed.
+    """
+
+    frame_captured = Signal(object, name="frameCaptured")
+    _grabbed = Signal(object, name="_grabbed")
+
+    def __init__(
+        self,
+        fps: float,
+        region: QRect | None = None,
+        grab: "Callable[[QRect | None], ScreenImage] | None" = None,
+        capacity: int = DEFAULT_STREAM_CAPACITY,
+        parent: QObject | None = None,
+    ):
+        """
+        Args:
+            fps: target number of frames per second.
+            region: area of the screen to capture, or None for the full screen.
+            grab: function capturing a region. If None, frames are requested from the screenshot portal.
+            capacity: number of frames kept in the ring buffer.
+        """
+        super().__init__(parent)
+        self._frames: deque[Frame] = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._thread = QThread()
+        self._thread.setObjectName("scoopick-stream")
+        self._grab = grab
+        self._worker = _StreamWorker(max(1, round(1000 / fps)), region, grab is None)
+        self._worker.moveToThread(self._thread)
+        self._worker.captured.connect(self._store, type=Qt.ConnectionType.DirectConnection)
+        # Queued both ways: the grabs run on the thread of the stream object, the conversions on the stream thread
+        self._worker.grab_requested.connect(self._on_grab_requested)
+        self._grabbed.connect(self._worker._on_grabbed)
+        self._thread.started.connect(self._worker.start)
+        self._thread.finished.connect(self._worker.deleteLater)
+        # A QThread must not be destroyed while running
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def start(self) -> "FrameStream":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._thread.isRunning():
+            return
+        QMetaObject.invokeMethod(self._worker, "stop", Qt.ConnectionType.BlockingQueuedConnection)
+        self._thread.quit()
+        self._thread.wait()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.isRunning()
+
+    @Slot(object)
+    def _on_grab_requested(self, region: "QRect | None"):
+        if not self._thread.isRunning():
+            return
+        self._grabbed.emit(self._grab(region).to_image())
+
+    def _store(self, frame: Frame):
+        # Runs in the stream thread
+        with self._condition:
+            self._frames.append(frame)
+            self._condition.notify_all()
+        self.frame_captured.emit(frame)
+
+    def latest(self) -> Frame | None:
+        """Most recent frame, or None if nothing has been captured yet."""
+        try:
+            return self._frames[-1]
+        except IndexError:
+            return None
+
+    def frames(self) -> list[Frame]:
+        """Frames currently in the ring buffer, oldest first."""
+        return list(self._frames)
+
+    def next_frame(self, after: float | None = None, timeout: float | None = None) -> Frame | None:
+        """Wait for a frame captured after the monotonic time `after` (now, by default).
+
+        Returns:
+            The frame, or None if none arrived within `timeout` seconds.
+        """
+        after = time.monotonic() if after is None else after
+        if QThread.currentThread() is self.thread():
+            return self._next_frame_processing_events(after, timeout)
+        with self._condition:
+            if self._condition.wait_for(lambda: self._frames and self._frames[-1].timestamp > after, timeout):
+                return self._frames[-1]
+        return None
+
+    def _next_frame_processing_events(self, after: float, timeout: float | None) -> Frame | None:
+        # The frames are grabbed on this thread, so blocking it would starve the stream
+
+        def ready() -> bool:
+            return bool(self._frames) and self._frames[-1].timestamp > after
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        loop = QEventLoop()
+        # Queued to this thread, since frames are captured on the stream thread
+        self.frame_captured.connect(loop.quit)
+        if timeout is not None:
+            QTimer.singleShot(round(timeout * 1000), loop, loop.quit)
+        while not ready() and (deadline is None or time.monotonic() < deadline):
+            loop.exec()
+        self.frame_captured.disconnect(loop.quit)
+        return self._frames[-1] if ready() else None
+
+    def __enter__(self) -> "FrameStream":
+        if not self.running:
+            self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
@@ -1,50 +1,79 @@
+import atexit
+import queue
 from logging import (
-    DEBUG,
     ERROR,
     INFO,
     WARNING,
     Formatter,
+    Handler,
     Logger,
+    LogRecord,
     StreamHandler,
+    getLevelName,
     getLogger,
 )
+from logging.handlers import QueueHandler, QueueListener
 from typing import TYPE_CHECKING
 
-from pyqttoast import Toast, ToastPreset
-from pyqttoast.toast_enums import ToastPosition
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
 
 from ..data import PACKAGE_NAME
 
 if TYPE_CHECKING:
+    from pyqttoast import ToastPreset
+
     from scoopick.app import App
 
+# Shortest time between two toasts, in milliseconds. Records arriving in between are coalesced into the next one
+TOAST_INTERVAL_MS = 1000
+# How long a toast stays on screen, in milliseconds
+TOAST_DURATION_MS = 5000
+
+
+class ToastNotifier(QObject):
+    """Show log records as toasts on the GUI thread, at most one every `interval` milliseconds.
+
+    The first record is shown at once. Those arriving while the interval runs are summarized in a single toast
+    when it ends, with the latest message of the most severe level and a count of the others.
+    """
 
-class CustomHandler(StreamHandler):
+    record_received = Signal(int, str, name="recordReceived")
 
-    def __init__(self, app: "App", stream=None):
-        super().__init__(stream)
+    def __init__(self, app: "App", interval: int = TOAST_INTERVAL_MS):
+        super().__init__(app)
         self._app = app
+        self._pending: list[tuple[int, str]] = []
+        self._timer = QTimer(self, singleShot=True, interval=interval)
+        self._timer.timeout.connect(self._flush)
+        # Signals emitted by the logging thread are queued to the thread of the notifier
+        self.record_received.connect(self._on_record_received)
 
-    def emit(self, record):
-        super().emit(record)
-        if record.levelno == DEBUG:
-            return  # Do not show toasts for debug messages
-        title = "Notification"
-        preset = ToastPreset.INFORMATION
-        if record.levelno >= INFO:
-            title = "Info"
-            preset = ToastPreset.INFORMATION
-        if record.levelno >= WARNING:
-            title = "Warning"
-            preset = ToastPreset.WARNING
-        if record.levelno >= ERROR:
-            title = "Error"
-            preset = ToastPreset.ERROR
-        self.show_toast(text=record.message, title=title, preset=preset)
+    @Slot(int, str)
+    def _on_record_received(self, level: int, message: str):
+        self._pending.append((level, message))
+        if not self._timer.isActive():
+            self._flush()
+
+    @Slot()
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        level = max(level for level, _ in pending)
+        message = next(message for record_level, message in reversed(pending) if record_level == level)
+        summary = summarize([record_level for record_level, _ in pending], level)
+        self.show_toast(f"{message}\n{summary}" if summary else message, *_toast_style(level))
+        self._timer.start()
 
     def show_toast(
-        self, text: str, title: str = "", preset: ToastPreset = ToastPreset.INFORMATION, duration: int = 5000
+        self, text: str, title: str = "", preset: "ToastPreset | None" = None, duration: int = TOAST_DURATION_MS
     ):
+        # pyqttoast pulls in QtWidgets, so it is only imported once a toast is needed
+        from pyqttoast import Toast, ToastPreset
+        from pyqttoast.toast_enums import ToastPosition
+
+        if preset is None:
+            preset = ToastPreset.INFORMATION
         toast = Toast(self._app)
         toast.applyPreset(preset)  # Apply style preset
         toast.setDuration(duration)
@@ -54,17 +83,89 @@ class CustomHandler(StreamHandler):
         toast.show()
 
 
-def init_logger(app: "App", log_level: int = DEBUG) -> Logger:
-    """Initialize and configure the logger for the application."""
+def summarize(levels: "list[int]", shown: int) -> str:
+    """Count of the records not shown in a coalesced toast, e.g. "2 more warnings, 1 more info"."""
+    counts: dict[int, int] = {}
+    for level in levels:
+        counts[level] = counts.get(level, 0) + 1
+    counts[shown] -= 1
+    parts = []
+    for level in sorted(counts, reverse=True):
+        if counts[level]:
+            name = getLevelName(level).lower()
+            plural = "s" if counts[level] > 1 and name in ("warning", "error") else ""
+            parts.append(f"{counts[level]} more {name}{plural}")
+    return ", ".join(parts)
+
+
+def _toast_style(level: int) -> "tuple[str, ToastPreset]":
+    from pyqttoast import ToastPreset
+
+    if level >= ERROR:
+        return "Error", ToastPreset.ERROR
+    if level >= WARNING:
+        return "Warning", ToastPreset.WARNING
+    return "Info", ToastPreset.INFORMATION
+
+
+class ToastHandler(Handler):
+    """Forward records to a ToastNotifier. Called on the logging thread, so it only emits a signal."""
+
+    def __init__(self, notifier: ToastNotifier, level: int = INFO):
+        super().__init__(level)
+        self._notifier = notifier
+
+    def emit(self, record: LogRecord):
+        try:
+            self._notifier.record_received.emit(record.levelno, record.getMessage())
+        except RuntimeError:
+            pass  # The notifier was deleted along with the application
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler leaving the formatting to the listener thread.
+
+    The message is merged with its arguments, since they may change once the call returns,
+    but timestamps and tracebacks are only formatted by the handlers of the listener.
+    """
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        record.msg, record.args = record.getMessage(), None
+        return record
+
+
+def init_logger(app: "App", log_level: int = INFO) -> Logger:
+    """Initialize and configure the logger for the application.
+
+    Records are put on a queue, and printed and shown as toasts by a listener thread,
+    so logging never waits on the console or the GUI. Calling it again replaces the previous handlers.
+    """
     logger = getLogger(PACKAGE_NAME)
     logger.setLevel(log_level)
+    remove_handlers(logger)
 
-    custom_handler = CustomHandler(app=app)
-    formatter = Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    stream_handler = StreamHandler()
+    stream_handler.setFormatter(
+        Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
     )
-    custom_handler.setFormatter(formatter)
-
-    logger.addHandler(custom_handler)
+    notifier = ToastNotifier(app)
+    listener = QueueListener(queue.SimpleQueue(), stream_handler, ToastHandler(notifier), respect_handler_level=True)
+    handler = _DeferredQueueHandler(listener.queue)
+    handler.listener = listener
+    logger.addHandler(handler)
+    listener.start()
+    # Print the records still queued when the interpreter exits
+    atexit.register(listener.stop)
     return logger
+
+
+def remove_handlers(logger: Logger):
+    """Remove the handlers added by init_logger, once their queued records have been handled."""
+    for handler in list(logger.handlers):
+        if isinstance(handler, _DeferredQueueHandler):
+            logger.removeHandler(handler)
+            handler.listener.stop()
+            atexit.unregister(handler.listener.stop)
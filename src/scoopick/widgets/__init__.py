@@ -1,3 +1,5 @@
-from .crosshair import CrosshairWidget
+from .crosshair import CrosshairOverlay
+from .metrics import MetricsWidget
 from .point import PointWidget
 from .points import PointsWidget
+from .viewer import ScreenshotViewer
@@ -1,137 +1,194 @@
 from logging import getLogger
 
-from PySide6.QtCore import QModelIndex, QRect, QSize, Slot
-from PySide6.QtGui import QColor, QPainter, QPen, QPixmap
-from PySide6.QtWidgets import QLabel, QWidget
+import numpy as np
+from PySide6.QtCore import QEvent, QLine, QModelIndex, QObject, QRect, Qt, Slot
+from PySide6.QtGui import QColor, QPainter, QPaintEvent, QPen, QRegion
+from PySide6.QtWidgets import QWidget
 
-from scoopick.model.points import PointsModel
-
-from ..data import PACKAGE_NAME, Point
+from ..data import PACKAGE_NAME, Point, PointView
+from ..model import PointsModel
+from .viewer import ScreenshotViewer
 
 logger = getLogger(PACKAGE_NAME)
 
-
-class CrosshairWidget(QWidget):
-
-    def __init__(self, point: Point, points_model: PointsModel, current_pixmap: QPixmap | None = None, *args, **kwargs):
-        super().__init__(*args, size=QSize(40, 40), **kwargs)
-        self._idx = point.idx
+# Half of the side of the square occupied by a crosshair, in pixels
+CROSSHAIR_RADIUS = 20
+# Gap between the center of a crosshair and its arms
+_GAP = 5
+# Position given to the points that are not shown, far enough to be outside of any repainted area
+_HIDDEN = np.iinfo(np.int32).min // 2
+# Changes touching more points than this repaint the whole overlay instead of each crosshair
+_MAX_DIRTY_POINTS = 64
+
+
+class CrosshairOverlay(QWidget):
+    """Transparent layer over the screenshot viewer that paints the crosshairs of all the points.
+
+    Positions in the viewer are computed for all the points at once, and changes only repaint
+    the areas of the crosshairs that moved or changed selection.
+    """
+
+    def __init__(self, points_model: PointsModel, viewer: ScreenshotViewer):
+        super().__init__(viewer)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_NoSystemBackground)
+        self._viewer = viewer
+        # Position of each point in the viewer, or _HIDDEN. Recomputed lazily, see _view_positions
+        self._positions: np.ndarray | None = None
+        self._transform: tuple[float, float, float] | None = None
+        self._selected: set[int] = set()
         self._points_model = points_model
-        self._label: QLabel = self.parent()
-        self._pixmap = current_pixmap
-
         self._points_model.layoutChanged.connect(self.on_layout_update)
+        self._points_model.modelReset.connect(self.on_layout_update)
+        self._points_model.rowsInserted.connect(self.on_rows_inserted)
+        self._points_model.rowsRemoved.connect(self.on_layout_update)
         self._points_model.dataChanged.connect(self.on_point_update)
-        self.updateGeometry()
-
-        logger.debug("Created CrosshairWidget for point idx=%d", self._idx)
-
-    def set_model(self, points_model: PointsModel):
-        self._points_model = points_model
-
-    @property
-    def _point(self) -> Point:
-        return self._points_model[self._idx]
-
-    @property
-    def _selected(self) -> bool:
-        for p in self._points_model.selected_points:
-            if p.idx == self._idx:
-                return True
-        return False
-
-    def _from_screen_to_label(self) -> tuple[int, int]:
-        x, y = self._point.x, self._point.y
-        if self._pixmap is None or self._pixmap.isNull():
-            return -1, -1
-        lw, lh = self._label.size().width(), self._label.size().height()
-        scaled_pixmap_w, scaled_pixmap_h = (
-            self._label.pixmap().size().width(),
-            self._label.pixmap().size().height(),
-        )
-        pixmap_w, pixmap_h = self._pixmap.size().width(), self._pixmap.size().height()
-        scale_x = scaled_pixmap_w / pixmap_w
-        scale_y = scaled_pixmap_h / pixmap_h
-
-        diff_x = (lw - scaled_pixmap_w) // 2
-        diff_y = (lh - scaled_pixmap_h) // 2
-
-        if scale_x > scale_y:
-            scale_x = scale_y
-        else:
-            scale_y = scale_x
-        return int(x * scale_x + diff_x), int(y * scale_y + diff_y)
+        self._points_model.selection_changed.connect(self.on_selection_changed)
+        viewer.view_changed.connect(self._invalidate)
+        viewer.installEventFilter(self)
+        self.resize(viewer.size())
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if watched is self._viewer and event.type() == QEvent.Type.Resize:
+            self.resize(self._viewer.size())
+            self._invalidate()
+        return super().eventFilter(watched, event)
+
+    def _invalidate(self):
+        self._positions = None
+        self.update()
+
+    def _map_points(self, xy: np.ndarray) -> np.ndarray:
+        if self._transform is None:
+            return np.full_like(xy, _HIDDEN)
+        scale, offset_x, offset_y = self._transform
+        # Crosshairs point at the center of their pixel, like ScreenshotViewer.map_from_image
+        positions = np.floor((xy + 0.5) * scale + (offset_x, offset_y))
+        positions[(xy < 0).any(axis=1)] = _HIDDEN
+        # Points far outside of the view do not need to be drawn
+        positions = np.clip(positions, _HIDDEN, -_HIDDEN)
+        return positions.astype(np.int32)
+
+    def _view_positions(self) -> np.ndarray:
+        transform = self._viewer.transform()
+        xy = self._points_model.points.xy
+        if self._positions is None or len(self._positions) != len(xy) or transform != self._transform:
+            self._transform = transform
+            self._positions = self._map_points(xy)
+        return self._positions
+
+    @staticmethod
+    def _crosshair_rect(x: int, y: int) -> QRect:
+        return QRect(x - CROSSHAIR_RADIUS, y - CROSSHAIR_RADIUS, 2 * CROSSHAIR_RADIUS + 1, 2 * CROSSHAIR_RADIUS + 1)
+
+    def _dirty_region(self, rows: "list[int]") -> QRegion:
+        region = QRegion()
+        positions = self._positions
+        if positions is None:
+            return region
+        for row in rows:
+            if row < len(positions) and positions[row, 0] != _HIDDEN:
+                region += self._crosshair_rect(*positions[row].tolist())
+        return region
 
     @Slot()
-    def on_update_screenshot(self, pixmap: QPixmap):
-        self._pixmap = pixmap
-        if self._pixmap.isNull():
+    def on_layout_update(self, *args):
+        self._selected = {row for row in self._selected if row < len(self._points_model.points)}
+        self._invalidate()
+
+    @Slot(QModelIndex, int, int)
+    def on_rows_inserted(self, parent: QModelIndex, first: int, last: int):
+        if self._positions is None or first != len(self._positions) or last - first + 1 > _MAX_DIRTY_POINTS:
+            self.on_layout_update()
+            return
+        # Appended points only need their own crosshairs to be painted
+        self._positions = np.concatenate([self._positions, self._map_points(self._points_model.points.xy[first:])])
+        region = self._dirty_region(list(range(first, last + 1)))
+        if not region.isEmpty():
+            self.update(region)
+
+    @Slot(QModelIndex, QModelIndex)
+    def on_point_update(self, top_left: QModelIndex, bottom_right: QModelIndex, *args):
+        first, last = top_left.row(), bottom_right.row()
+        if self._positions is None or len(self._positions) != len(self._points_model.points):
+            self._invalidate()
             return
-        self.updateGeometry()
+        if last - first + 1 > _MAX_DIRTY_POINTS:
+            self._positions[first : last + 1] = self._map_points(self._points_model.points.xy[first : last + 1])
+            self.update()
+            return
+        rows = list(range(first, last + 1))
+        # Repaint both where the crosshairs were and where they are now
+        region = self._dirty_region(rows)
+        self._positions[first : last + 1] = self._map_points(self._points_model.points.xy[first : last + 1])
+        region += self._dirty_region(rows)
+        if not region.isEmpty():
+            self.update(region)
+
+    @Slot(object)
+    def on_selection_changed(self, points: "tuple[Point | PointView]"):
+        selected = {point.idx for point in points}
+        changed = sorted(selected ^ self._selected)
+        self._selected = selected
+        if self._positions is None or len(changed) > _MAX_DIRTY_POINTS:
+            self.update()
+            return
+        region = self._dirty_region(changed)
+        if not region.isEmpty():
+            self.update(region)
 
-    def on_layout_update(self, *args):
-        if self._idx not in self._points_model:
-            logger.debug(
-                "CrosshairWidget: point %d no longer in model, destroying widget %d",
-                self._idx,
-                id(self),
-            )
-            self._points_model.layoutChanged.disconnect(self.on_layout_update)
-            self._points_model.dataChanged.disconnect(self.on_point_update)
-            self.deleteLater()
-        else:
-            self.updateGeometry()
-
-    def on_point_update(self, idx_from: QModelIndex, idx_to: QModelIndex):
-        # Only update if our point is in the updated range
-        if idx_from.row() <= self._idx <= idx_to.row():
-            logger.debug(
-                "CrosshairWidget: point %d updated, updating widget %d",
-                self._idx,
-                id(self),
-            )
-            self.updateGeometry()
-
-    def updateGeometry(self):
-        super().updateGeometry()
-        x_label, y_label = self._from_screen_to_label()
-        if x_label < 0 or y_label < 0:
-            logger.debug(
-                "CrosshairWidget: point %d is out of bounds, hiding widget %d",
-                self._idx,
-                id(self),
-            )
-            self.hide()
-        else:
-            self.show()
-            self.move(x_label - self.width() // 2, y_label - self.height() // 2)
-            logger.debug(
-                "CrosshairWidget: point %d moved to (%d, %d) in widget %d",
-                self._idx,
-                x_label,
-                y_label,
-                id(self),
-            )
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        try:
-            point = self._point
-        except IndexError:
+    def paintEvent(self, event: QPaintEvent):
+        positions = self._view_positions()
+        if not len(positions):
             return
-        if point.x < 0 or point.y < 0:
+        dirty = event.rect()
+        # Only the crosshairs overlapping the area being repainted are drawn, which also skips the hidden ones
+        visible = (
+            (positions[:, 0] + CROSSHAIR_RADIUS >= dirty.left())
+            & (positions[:, 0] - CROSSHAIR_RADIUS <= dirty.right())
+            & (positions[:, 1] + CROSSHAIR_RADIUS >= dirty.top())
+            & (positions[:, 1] - CROSSHAIR_RADIUS <= dirty.bottom())
+        )
+        rows = np.flatnonzero(visible)
+        if not len(rows):
             return
+        colors = self._points_model.points.colors
 
         painter = QPainter(self)
         pen = QPen()
-        pen.setColor(QColor(*point.color))
-        painter.setPen(pen)
-        painter.drawEllipse(QRect(self.width() // 2 - 2, self.height() // 2 - 2, 4, 4))
-        painter.drawRect(QRect(self.width() // 2, 0, 1, self.height() // 2 - 5))
-        painter.drawRect(QRect(self.width() // 2, self.height() // 2 + 5, 1, self.height() // 2 - 5))
-        painter.drawRect(QRect(0, self.height() // 2, self.width() // 2 - 5, 1))
-        painter.drawRect(QRect(self.width() // 2 + 5, self.height() // 2, self.width() // 2 - 5, 1))
-        if self._selected:
-            pen.setWidth(2)
+        # Group the crosshairs by color, so that each color costs a couple of draw calls whatever the number of points
+        for color, group in _group_by_color(rows, colors[rows]):
+            pen.setColor(QColor(*color))
+            pen.setWidth(1)
             painter.setPen(pen)
-            painter.drawRect(1, 1, self.width() - 2, self.height() - 2)
+            painter.drawLines([line for x, y in positions[group].tolist() for line in _crosshair_lines(x, y)])
+            selected = [row for row in group.tolist() if row in self._selected]
+            if selected:
+                pen.setWidth(2)
+                painter.setPen(pen)
+                painter.drawRects(
+                    [self._crosshair_rect(x, y).adjusted(1, 1, -2, -2) for x, y in positions[selected].tolist()]
+                )
+        painter.end()
+
+
+def _crosshair_lines(x: int, y: int) -> "tuple[QLine, ...]":
+    return (
+        # Small ring around the center
+        QLine(x - 1, y - 2, x + 1, y - 2),
+        QLine(x - 1, y + 2, x + 1, y + 2),
+        QLine(x - 2, y - 1, x - 2, y + 1),
+        QLine(x + 2, y - 1, x + 2, y + 1),
+        # Arms
+        QLine(x, y - CROSSHAIR_RADIUS, x, y - _GAP),
+        QLine(x, y + _GAP, x, y + CROSSHAIR_RADIUS),
+        QLine(x - CROSSHAIR_RADIUS, y, x - _GAP, y),
+        QLine(x + _GAP, y, x + CROSSHAIR_RADIUS, y),
+    )
+
+
+def _group_by_color(rows: np.ndarray, colors: np.ndarray):
+    """Split `rows` into groups of points sharing the same color."""
+    unique, inverse, counts = np.unique(colors, axis=0, return_inverse=True, return_counts=True)
+    groups = np.split(rows[np.argsort(inverse.reshape(-1), kind="stable")], np.cumsum(counts)[:-1])
+    return zip(unique.tolist(), groups)
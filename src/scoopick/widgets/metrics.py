@@ -0,0 +1,107 @@
+from PySide6.QtCore import Qt, QTimer, Slot
+from PySide6.QtGui import QHideEvent, QShowEvent
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..metrics import MetricsRegistry, registry
+
+# Delay between two refreshes of the table while it is shown, in milliseconds
+REFRESH_INTERVAL_MS = 1000
+
+COLUMNS = ("Metric", "Labels", "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)")
+
+
+class MetricsWidget(QWidget):
+    """Table of the latency histograms of a MetricsRegistry, refreshed while it is shown."""
+
+    def __init__(self, parent: QWidget | None = None, metrics: MetricsRegistry = registry):
+        super().__init__(parent)
+        self._metrics = metrics
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self._record_box = QCheckBox("Record metrics", self)
+        self._record_box.setChecked(metrics.enabled)
+        self._record_box.toggled.connect(self._on_record_toggled)
+        controls.addWidget(self._record_box)
+        controls.addStretch()
+        reset_button = QPushButton("Reset", self)
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(reset_button)
+        save_button = QPushButton("Save...", self)
+        save_button.clicked.connect(self.save)
+        controls.addWidget(save_button)
+        layout.addLayout(controls)
+
+        self._table = QTableWidget(0, len(COLUMNS), self)
+        self._table.setHorizontalHeaderLabels(COLUMNS)
+        self._table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self._table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self._table)
+
+        self._timer = QTimer(self, interval=REFRESH_INTERVAL_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    @property
+    def table(self) -> QTableWidget:
+        return self._table
+
+    @Slot(bool)
+    def _on_record_toggled(self, checked: bool):
+        self._metrics.enabled = checked
+
+    @Slot()
+    def refresh(self):
+        histograms = self._metrics.histograms()
+        self._table.setRowCount(len(histograms))
+        for row, (key, histogram) in enumerate(histograms.items()):
+            values = (
+                key.name,
+                key.format_labels(),
+                str(histogram.count),
+                *(
+                    f"{seconds * 1000:.3f}"
+                    for seconds in (
+                        histogram.mean,
+                        histogram.quantile(0.5),
+                        histogram.quantile(0.95),
+                        histogram.max,
+                    )
+                ),
+            )
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self._table.setItem(row, column, item)
+
+    @Slot()
+    def reset(self):
+        self._metrics.reset()
+        self.refresh()
+
+    @Slot()
+    def save(self):
+        filepath, _ = QFileDialog.getSaveFileName(
+            self, "Save metrics", "metrics.json", "JSON Files (*.json);;Prometheus Files (*.prom)"
+        )
+        if filepath:
+            self._metrics.save(filepath)
+
+    def showEvent(self, event: QShowEvent):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event: QHideEvent):
+        super().hideEvent(event)
+        self._timer.stop()
@@ -0,0 +1,247 @@
+import math
+from collections import OrderedDict
+
+from PySide6.QtCore import QPointF, QRect, QRectF, QSize, Qt, QTimer, Signal
+from PySide6.QtGui import (
+    QColor,
+    QImage,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QPen,
+    QPixmap,
+    QResizeEvent,
+    QWheelEvent,
+)
+from PySide6.QtWidgets import QWidget
+
+from ..core import MipmapCache
+
+# Side of the tiles the screenshot is split into, in pixels of the mipmap level they come from
+TILE_SIZE = 256
+# Number of tiles kept in the cache, across all levels
+DEFAULT_MAX_TILES = 128
+# Largest zoom, in widget pixels per screenshot pixel
+MAX_SCALE = 32.0
+# Zoom factor of a notch of the mouse wheel
+ZOOM_STEP = 1.25
+# Delay after the last resize or zoom before the tiles are drawn with smooth filtering, in milliseconds
+SMOOTH_DELAY_MS = 150
+
+
+class ScreenshotViewer(QWidget):
+    """Zoomable and pannable view of a screenshot.
+
+    The screenshot fits the widget by default. The mouse wheel zooms around the cursor,
+    and dragging with the middle button pans. Only the tiles that are visible are drawn,
+    taken from the mipmap level closest to the current zoom and cached between paints.
+
+    Mouse presses with the other buttons are reported through signals, in screenshot coordinates.
+    """
+
+    view_changed = Signal(name="viewChanged")
+    image_pressed = Signal(int, int, object, name="imagePressed")
+    image_dragged = Signal(int, int, name="imageDragged")
+    image_released = Signal(name="imageReleased")
+
+    def __init__(self, parent: QWidget | None = None, max_tiles: int = DEFAULT_MAX_TILES):
+        super().__init__(parent)
+        self._mipmaps = MipmapCache()
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+        self._max_tiles = max_tiles
+        # Zoom relative to the scale that fits the whole screenshot, and screenshot point shown at the center
+        self._zoom = 1.0
+        self._center = QPointF()
+        self._pan_origin: QPointF | None = None
+        # Tiles are drawn without filtering while the view is changing, and smoothed once it settles
+        self._interacting = False
+        self._settle_timer = QTimer(self, singleShot=True, interval=SMOOTH_DELAY_MS)
+        self._settle_timer.timeout.connect(self._on_settled)
+
+    def set_pixmap(self, pixmap: QPixmap):
+        if self._mipmaps.set_source(pixmap):
+            self._tiles.clear()
+            self.reset_view()
+
+    @property
+    def image_size(self) -> QSize:
+        return self._mipmaps.source_size
+
+    def _fit_scale(self) -> float:
+        size = self.image_size
+        if size.isEmpty() or self.width() <= 0 or self.height() <= 0:
+            return 1.0
+        return min(self.width() / size.width(), self.height() / size.height())
+
+    @property
+    def scale(self) -> float:
+        """Widget pixels per screenshot pixel."""
+        return self._fit_scale() * self._zoom
+
+    def transform(self) -> "tuple[float, float, float] | None":
+        """Scale and offsets mapping screenshot coordinates to the widget, or None if there is no screenshot."""
+        if self.image_size.isEmpty():
+            return None
+        scale = self.scale
+        return scale, self.width() / 2 - self._center.x() * scale, self.height() / 2 - self._center.y() * scale
+
+    def map_to_image(self, position: QPointF) -> "tuple[int, int]":
+        """Screenshot pixel under a position of the widget, or (-1, -1) if there is none."""
+        transform = self.transform()
+        if transform is None:
+            return -1, -1
+        scale, offset_x, offset_y = transform
+        x, y = math.floor((position.x() - offset_x) / scale), math.floor((position.y() - offset_y) / scale)
+        size = self.image_size
+        if not (0 <= x < size.width() and 0 <= y < size.height()):
+            return -1, -1
+        return x, y
+
+    def map_from_image(self, x: float, y: float) -> QPointF:
+        """Position in the widget of the center of a screenshot pixel."""
+        scale, offset_x, offset_y = self.transform() or (1.0, 0.0, 0.0)
+        return QPointF((x + 0.5) * scale + offset_x, (y + 0.5) * scale + offset_y)
+
+    def reset_view(self):
+        """Fit the whole screenshot in the widget."""
+        size = self.image_size
+        self._zoom = 1.0
+        self._center = QPointF(size.width() / 2, size.height() / 2)
+        self._view_changed()
+
+    def zoom_to(self, zoom: float, anchor: QPointF | None = None):
+        """Zoom relative to the fitting scale, keeping the screenshot point under `anchor` in place.
+
+        Args:
+            zoom: 1 fits the whole screenshot, higher values zoom in.
+            anchor: position in the widget, the center if None.
+        """
+        if self.image_size.isEmpty():
+            return
+        anchor = QPointF(self.width() / 2, self.height() / 2) if anchor is None else anchor
+        scale, offset_x, offset_y = self.transform()
+        anchored = QPointF((anchor.x() - offset_x) / scale, (anchor.y() - offset_y) / scale)
+        self._zoom = min(max(zoom, 1.0), max(MAX_SCALE / self._fit_scale(), 1.0))
+        scale = self.scale
+        self._center = QPointF(
+            anchored.x() - (anchor.x() - self.width() / 2) / scale,
+            anchored.y() - (anchor.y() - self.height() / 2) / scale,
+        )
+        self._view_changed()
+
+    @property
+    def zoom(self) -> float:
+        return self._zoom
+
+    def _clamp_center(self):
+        # Keep the screenshot covering the widget along the axes where it is larger than it
+        size, scale = self.image_size, self.scale
+        coords = []
+        for center, length, view in (
+            (self._center.x(), size.width(), self.width()),
+            (self._center.y(), size.height(), self.height()),
+        ):
+            half_view = view / (2 * scale)
+            coords.append(length / 2 if length * scale <= view else min(max(center, half_view), length - half_view))
+        self._center = QPointF(*coords)
+
+    def _view_changed(self):
+        self._clamp_center()
+        self._interacting = True
+        self._settle_timer.start()
+        self.update()
+        self.view_changed.emit()
+
+    def _on_settled(self):
+        self._interacting = False
+        self.update()
+
+    def _tile(self, level: QImage, tx: int, ty: int) -> QPixmap:
+        key = (level.width(), tx, ty)
+        tile = self._tiles.get(key)
+        if tile is None:
+            rect = QRect(tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE).intersected(level.rect())
+            tile = QPixmap.fromImage(level.copy(rect))
+            self._tiles[key] = tile
+            while len(self._tiles) > self._max_tiles:
+                self._tiles.popitem(last=False)
+        else:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def paintEvent(self, event: QPaintEvent):
+        painter = QPainter(self)
+        transform = self.transform()
+        if transform is not None:
+            self._paint_tiles(painter, event.rect(), *transform)
+        painter.setPen(QPen(QColor("gray"), 2, Qt.PenStyle.DashLine))
+        painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+        painter.end()
+
+    def _paint_tiles(self, painter: QPainter, dirty: QRect, scale: float, offset_x: float, offset_y: float):
+        size = self.image_size
+        level = self._mipmaps.level_for_scale(min(scale, 1.0))
+        # Widget pixels per level pixel. Halving odd sizes rounds down, so both axes are kept apart
+        draw_x = scale * size.width() / level.width()
+        draw_y = scale * size.height() / level.height()
+        # Filter when shrinking the level, but show the pixels as they are when zoomed in
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, not self._interacting and draw_x < 1)
+
+        left = max((dirty.left() - offset_x) / draw_x, 0)
+        top = max((dirty.top() - offset_y) / draw_y, 0)
+        right = min((dirty.right() + 1 - offset_x) / draw_x, level.width())
+        bottom = min((dirty.bottom() + 1 - offset_y) / draw_y, level.height())
+        if left >= right or top >= bottom:
+            return
+        for ty in range(int(top // TILE_SIZE), math.ceil(bottom / TILE_SIZE)):
+            for tx in range(int(left // TILE_SIZE), math.ceil(right / TILE_SIZE)):
+                tile = self._tile(level, tx, ty)
+                target = QRectF(
+                    offset_x + tx * TILE_SIZE * draw_x,
+                    offset_y + ty * TILE_SIZE * draw_y,
+                    tile.width() * draw_x,
+                    tile.height() * draw_y,
+                )
+                painter.drawPixmap(target, tile, QRectF(tile.rect()))
+
+    def resizeEvent(self, event: QResizeEvent):
+        super().resizeEvent(event)
+        self._view_changed()
+
+    def wheelEvent(self, event: QWheelEvent):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom_to(self._zoom * ZOOM_STEP**steps, event.position())
+        event.accept()
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self._pan_origin = event.position()
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+            return
+        self.image_pressed.emit(*self.map_to_image(event.position()), event.button())
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self._pan_origin is not None:
+            delta = event.position() - self._pan_origin
+            self._pan_origin = event.position()
+            self._center -= delta / self.scale
+            self._view_changed()
+            return
+        if event.buttons() & Qt.MouseButton.LeftButton:
+            transform = self.transform()
+            if transform is None:
+                return
+            scale, offset_x, offset_y = transform
+            size = self.image_size
+            # Dragging outside of the screenshot sticks to its border
+            x = min(max(math.floor((event.position().x() - offset_x) / scale), 0), size.width() - 1)
+            y = min(max(math.floor((event.position().y() - offset_y) / scale), 0), size.height() - 1)
+            self.image_dragged.emit(x, y)
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self._pan_origin = None
+            self.unsetCursor()
+            return
+        self.image_released.emit()
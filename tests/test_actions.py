@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from scoopick.actions import (
+    BUTTON_DOWN,
+    BUTTON_UP,
+    KEY_DOWN,
+    KEY_UP,
+    MOVE,
+    ActionQueue,
+    InputEvent,
+    RecordingBackend,
+)
+from scoopick.data import Point
+from scoopick.runner import CancelToken, ScriptCancelled
+
+
+def test_actions_are_sent_in_order():
+    backend = RecordingBackend()
+    with ActionQueue(backend) as actions:
+        report = actions.click(Point(x=10, y=20)).key("enter").type("ab").run(timeout=2)
+    assert backend.events == [
+        InputEvent(MOVE, (10, 20)),
+        InputEvent(BUTTON_DOWN, "left"),
+        InputEvent(BUTTON_UP, "left"),
+        InputEvent(KEY_DOWN, "enter"),
+        InputEvent(KEY_UP, "enter"),
+        InputEvent(KEY_DOWN, "a"),
+        InputEvent(KEY_UP, "a"),
+        InputEvent(KEY_DOWN, "b"),
+        InputEvent(KEY_UP, "b"),
+    ]
+    assert report.events == 9
+    assert not report.cancelled
+    assert len(actions) == 0
+
+
+def test_batching():
+    backend = RecordingBackend()
+    with ActionQueue(backend, batching=True) as actions:
+        report = actions.click((1, 2)).wait(0.01).click((3, 4), count=2).run(timeout=2)
+    assert report.batches == 2
+    assert [len(batch) for _, batch in backend.batches] == [3, 5]
+
+
+def test_schedule_does_not_drift():
+    backend = RecordingBackend()
+    with ActionQueue(backend, interval=0.005) as actions:
+        for i in range(20):
+            actions.move((i, i))
+        report = actions.run(timeout=2)
+    times = [timestamp for timestamp, _ in backend.batches]
+    # The last move is scheduled 95 ms after the first one, whatever the lateness of the others
+    assert times[-1] - times[0] == pytest.approx(0.095, abs=0.01)
+    assert report.max_lateness < 0.01
+
+
+def test_cancel_releases_held_buttons():
+    backend = RecordingBackend()
+    with ActionQueue(backend) as actions:
+        future = actions.click((0, 0), hold=5).submit()
+        time.sleep(0.05)
+        actions.cancel()
+        report = future.result(timeout=2)
+        assert report.cancelled
+        assert backend.events[-1] == InputEvent(BUTTON_UP, "left")
+        # Later sequences are not affected
+        assert not actions.move((1, 1)).run(timeout=2).cancelled
+
+
+def test_cancel_token():
+    token = CancelToken()
+    backend = RecordingBackend()
+    with ActionQueue(backend, cancel_token=token) as actions:
+        actions.move((0, 0)).wait(5).move((1, 1))
+        token.cancel()
+        with pytest.raises(ScriptCancelled):
+            actions.run(timeout=2)
+
+
+def test_input_thread_stops_when_idle():
+    backend = RecordingBackend()
+    # Scripts create a queue per call of the actions helper, without closing them
+    queues = [ActionQueue(backend) for _ in range(3)]
+    for actions in queues:
+        actions.move((0, 0)).run(timeout=2)
+    deadline = time.monotonic() + 2
+    while any(thread.name == "scoopick-input" for thread in threading.enumerate()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not any(thread.name == "scoopick-input" for thread in threading.enumerate())
+    # The thread is started again by the next sequence
+    assert queues[0].move((1, 1)).run(timeout=2).events == 1
+
+
+class FailingBackend(RecordingBackend):
+    """Fails the first time the left button is released."""
+
+    def __init__(self):
+        super().__init__()
+        self.failed = False
+
+    def send(self, events):
+        if not self.failed and InputEvent(BUTTON_UP, "left") in events:
+            self.failed = True
+            raise RuntimeError("no input")
+        super().send(events)
+
+
+def test_failure_releases_held_buttons():
+    backend = FailingBackend()
+    with ActionQueue(backend) as actions:
+        with pytest.raises(RuntimeError):
+            actions.click((0, 0), hold=0.01).run(timeout=2)
+    assert backend.events == [InputEvent(MOVE, (0, 0)), InputEvent(BUTTON_DOWN, "left"), InputEvent(BUTTON_UP, "left")]
@@ -0,0 +1,93 @@
+import json
+import sys
+
+from scoopick.cli import (
+    EXIT_FAILURE,
+    EXIT_SUCCESS,
+    CliArguments,
+    build_parser,
+    run_headless,
+)
+
+SCRIPT = """
+calls = []
+
+
+def run(points, capture_screenshot):
+    calls.append((len(points), capture_screenshot().origin))
+"""
+
+ASYNC_SCRIPT = """
+import asyncio
+
+calls = []
+
+
+async def run(points, capture_screenshot):
+    await asyncio.sleep(0)
+    calls.append((await capture_screenshot(region=(0, 0, 2, 2))).size)
+"""
+
+
+def parse(*argv: str) -> CliArguments:
+    return build_parser().parse_args(argv, namespace=CliArguments())
+
+
+def test_parser():
+    args = parse("run", "script.py", "--points", "points.json", "--region", "1,2,3,4", "--iterations", "3")
+    assert (args.command, args.script, args.points) == ("run", "script.py", "points.json")
+    assert args.region == (1, 2, 3, 4)
+    assert args.iterations == 3
+    assert parse("run", "script.py", "--region", "auto").region == "auto"
+    assert parse("run", "script.py", "--region", "1").region == 1
+    assert parse().command is None
+
+
+def test_run_headless(qapp, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(SCRIPT)
+    points = tmp_path / "points.json"
+    points.write_text(json.dumps({"points": [{"name": "a", "x": 10, "y": 20}]}))
+    args = parse("run", str(script), "--points", str(points), "--region", "auto", "--iterations", "2")
+    assert run_headless(args) == EXIT_SUCCESS
+    assert sys.modules["script"].calls == [(1, (0, 4)), (1, (0, 4))]
+
+
+def test_run_headless_async(qapp, tmp_path):
+    script = tmp_path / "async_script.py"
+    script.write_text(ASYNC_SCRIPT)
+    assert run_headless(parse("run", str(script), "--region", "0,0,4,4", "--iterations", "2")) == EXIT_SUCCESS
+    assert sys.modules["script"].calls == [(2, 2), (2, 2)]
+
+
+def test_run_headless_missing_run(qapp, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text("x = 1\n")
+    assert run_headless(parse("run", str(script))) == EXIT_FAILURE
+
+
+def test_run_headless_metrics(qapp, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(SCRIPT)
+    metrics = tmp_path / "metrics.json"
+    assert run_headless(parse("run", str(script), "--region", "0,0,4,4", "--metrics", str(metrics))) == EXIT_SUCCESS
+    names = {histogram["name"] for histogram in json.loads(metrics.read_text())["histograms"]}
+    assert {"capture", "script_run"} <= names
+
+
+def test_run_headless_record_and_replay(qapp, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(SCRIPT)
+    recording = str(tmp_path / "session.rec")
+    assert run_headless(parse("run", str(script), "--region", "2,3,4,4", "--record", recording)) == EXIT_SUCCESS
+    args = parse("run", str(script), "--replay", recording, "--replay-speed", "0", "--iterations", "2")
+    assert run_headless(args) == EXIT_SUCCESS
+    assert [origin for _, origin in sys.modules["script"].calls] == [(2, 3), (2, 3)]
+
+
+def test_run_headless_bad_recording_paths(qapp, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(SCRIPT)
+    missing = str(tmp_path / "missing" / "session.rec")
+    assert run_headless(parse("run", str(script), "--record", missing)) == EXIT_FAILURE
+    assert run_headless(parse("run", str(script), "--replay", missing)) == EXIT_FAILURE
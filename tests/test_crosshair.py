@@ -0,0 +1,55 @@
+import numpy as np
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.data import Point, PointSet
+from scoopick.model import PointsModel
+from scoopick.widgets import CrosshairOverlay, ScreenshotViewer
+
+
+def make_overlay(points: "list[Point] | PointSet") -> "tuple[CrosshairOverlay, PointsModel, ScreenshotViewer]":
+    viewer = ScreenshotViewer()
+    viewer.resize(200, 100)
+    pixmap = QPixmap(QSize(100, 50))
+    pixmap.fill(QColor(0, 0, 0))
+    # The viewer shows the screenshot at twice its size
+    viewer.set_pixmap(pixmap)
+    model = PointsModel(points)
+    overlay = CrosshairOverlay(model, viewer)
+    return overlay, model, viewer
+
+
+def test_crosshairs_are_painted_at_viewer_position(qapp):
+    overlay, model, _ = make_overlay([Point(name="a", x=20, y=10, color=(0, 255, 0)), Point(name="b", x=-1, y=-1)])
+    image = overlay.grab().toImage()
+    # Vertical arm of the crosshair, above its center at (41, 21) in the viewer
+    assert image.pixelColor(41, 5).getRgb()[:3] == (0, 255, 0)
+
+    model.update_pos(Point(idx=0, x=30, y=20))
+    image = overlay.grab().toImage()
+    assert image.pixelColor(41, 5).getRgb()[:3] != (0, 255, 0)
+    assert image.pixelColor(61, 25).getRgb()[:3] == (0, 255, 0)
+
+
+def test_crosshairs_follow_the_zoom(qapp):
+    overlay, model, viewer = make_overlay([Point(name="a", x=20, y=10, color=(0, 255, 0))])
+    overlay.grab()
+    viewer.zoom_to(2, viewer.map_from_image(20, 10))
+    center = viewer.map_from_image(20, 10).toPoint()
+    assert overlay._view_positions()[0].tolist() == [center.x(), center.y()]
+
+
+def test_selection_is_tracked(qapp):
+    overlay, model, _ = make_overlay([Point(name="a", x=20, y=10), Point(name="b", x=40, y=10)])
+    model.select_points((model[1],))
+    assert overlay._selected == {1}
+    model.remove_selected_points()
+    assert overlay._selected == set()
+
+
+def test_many_points(qapp):
+    xs, ys = np.meshgrid(np.arange(0, 100, 2), np.arange(0, 50, 0.5))
+    overlay, model, _ = make_overlay(PointSet.from_arrays(np.stack([xs.ravel(), ys.ravel()], axis=1)))
+    assert len(model.points) == 5000
+    assert not overlay.grab().isNull()
+    assert len(overlay._positions) == 5000
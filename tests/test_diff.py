@@ -0,0 +1,55 @@
+import numpy as np
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+from scoopick.core import FrameDiffer, ScreenImage
+from scoopick.core.diff import blocks_to_rects, changed_blocks
+from scoopick.data import Point
+
+
+def make_frame(changes: "list[tuple[int, int, int, int]]" = (), origin=(0, 0)) -> ScreenImage:
+    image = QImage(64, 48, QImage.Format.Format_RGB32)
+    image.fill(QColor(0, 0, 0))
+    for x, y, width, height in changes:
+        for i in range(x, x + width):
+            for j in range(y, y + height):
+                image.setPixelColor(i, j, QColor(255, 255, 255))
+    return ScreenImage(QPixmap.fromImage(image), origin=origin)
+
+
+def test_changed_blocks():
+    first = np.zeros((20, 35, 3), dtype=np.uint8)
+    second = first.copy()
+    second[19, 34] = 3
+    assert changed_blocks(first, second, 16).tolist() == [[False, False, False], [False, False, True]]
+    assert not changed_blocks(first, second, 16, threshold=3).any()
+
+
+def test_blocks_to_rects():
+    blocks = np.array(
+        [
+            [1, 1, 0, 0],
+            [1, 1, 0, 1],
+            [0, 1, 0, 1],
+        ],
+        dtype=bool,
+    )
+    assert sorted(blocks_to_rects(blocks)) == [(0, 0, 2, 2), (1, 2, 1, 1), (3, 1, 1, 2)]
+    assert blocks_to_rects(np.zeros((2, 2), dtype=bool)) == []
+
+
+def test_frame_differ(qapp):
+    differ = FrameDiffer([Point(x=5, y=5), Point(x=40, y=40), Point(x=-1, y=-1)], block_size=16)
+    first = differ.update(make_frame(origin=(100, 0)))
+    assert first.rects == [QRect(100, 0, 64, 48)]
+    assert first.points.tolist() == []
+
+    assert not differ.update(make_frame(origin=(100, 0))).changed
+    diff = differ.update(make_frame([(10, 40, 2, 2)], origin=(100, 0)))
+    assert diff.rects == [QRect(100, 32, 16, 16)]
+
+    differ = FrameDiffer([Point(x=5, y=5), Point(x=40, y=40)], block_size=16)
+    differ.update(make_frame())
+    diff = differ.update(make_frame([(2, 2, 1, 1), (60, 45, 1, 1)]))
+    assert diff.rects == [QRect(0, 0, 16, 16), QRect(48, 32, 16, 16)]
+    assert diff.points.tolist() == [0]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+from scoopick.core import ScreenImage
+from scoopick.data import Point
+
+
+@pytest.fixture
+def screen_image(qapp) -> ScreenImage:
+    image = QImage(7, 5, QImage.Format.Format_RGB32)
+    image.fill(QColor(10, 20, 30))
+    image.setPixelColor(3, 2, QColor(200, 100, 50))
+    image.setPixelColor(6, 4, QColor(1, 2, 3))
+    return ScreenImage(QPixmap.fromImage(image))
+
+
+def test_as_array(screen_image: ScreenImage):
+    array = screen_image.as_array()
+    assert array.shape == (5, 7, 3)
+    assert tuple(array[2, 3]) == (200, 100, 50)
+    assert screen_image.as_array(alpha=True).shape == (5, 7, 4)
+    # The view is cached for the same pixmap
+    assert np.shares_memory(screen_image.as_array(), array)
+
+
+def test_as_array_invalidated(screen_image: ScreenImage):
+    array = screen_image.as_array()
+    screen_image.pixmap = QPixmap(2, 2)
+    assert screen_image.as_array().shape == (2, 2, 3)
+    assert not np.shares_memory(screen_image.as_array(), array)
+
+
+def test_get_pixel_colors(screen_image: ScreenImage):
+    points = [Point(x=3, y=2), Point(x=6, y=4), Point(x=0, y=0), Point(x=-1, y=-1)]
+    colors = screen_image.get_pixel_colors(points)
+    assert colors.tolist() == [[200, 100, 50], [1, 2, 3], [10, 20, 30], [0, 0, 0]]
+    assert screen_image.get_pixel_color(points[0]) == (200, 100, 50)
+
+
+def test_null_image(qapp):
+    screen_image = ScreenImage(QPixmap())
+    assert screen_image.as_array().shape == (0, 0, 3)
+    assert screen_image.get_pixel_colors([Point(x=0, y=0)]).tolist() == [[0, 0, 0]]
+
+
+def test_origin(screen_image: ScreenImage):
+    screen_image.origin = (100, 200)
+    assert screen_image.get_pixel_color((103, 202)) == (200, 100, 50)
+    assert screen_image.get_pixel_colors(np.array([[106, 204], [3, 2]])).tolist() == [[1, 2, 3], [0, 0, 0]]
+
+
+def test_image_backed(screen_image: ScreenImage):
+    frame = ScreenImage(screen_image.pixmap.toImage(), origin=(10, 10))
+    # Sampled without creating a pixmap, e.g. on another thread
+    assert frame.size == (7, 5) and frame.get_pixel_color((13, 12)) == (200, 100, 50)
+    assert frame.to_image() is frame and frame._pixmap is None
+    assert frame.pixmap.size().width() == 7
+    assert screen_image.to_image().get_pixel_color((3, 2)) == (200, 100, 50)
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def imported_modules(statement: str) -> "set[str]":
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env.pop("WAYLAND_DISPLAY", None)
+    code = f"import sys; {statement}; print('\\n'.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return set(result.stdout.splitlines())
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import scoopick",
+        "from scoopick.data import Point",
+        "from scoopick.core import ScreenImage",
+        "from scoopick.screenshot import Screenshot",
+        "from scoopick.runner import ScriptRunner",
+        "from scoopick.cli import main",
+    ],
+)
+def test_library_imports_are_light(statement: str):
+    modules = imported_modules(statement)
+    for heavy in ("PySide6.QtWidgets", "PySide6.QtDBus", "pyqttoast", "jsonschema", "importlib.metadata"):
+        assert heavy not in modules, f"'{statement}' imports {heavy}"
+
+
+def test_version_is_resolved_lazily():
+    import scoopick
+
+    assert isinstance(scoopick.__version__, str)
@@ -0,0 +1,52 @@
+import time
+from logging import ERROR, INFO, WARNING, getLogger
+
+from PySide6.QtCore import QCoreApplication, QObject
+
+from scoopick.data import PACKAGE_NAME
+from scoopick.util.logger import ToastNotifier, init_logger, remove_handlers, summarize
+
+
+class RecordingNotifier(ToastNotifier):
+    def __init__(self, app: QObject, interval: int):
+        super().__init__(app, interval)
+        self.toasts: list[tuple[str, str]] = []
+
+    def show_toast(self, text: str, title: str = "", preset=None, duration: int = 0):
+        self.toasts.append((title, text))
+
+
+def process_events_for(seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+
+def test_summarize():
+    assert summarize([WARNING], WARNING) == ""
+    assert summarize([INFO, WARNING, WARNING, ERROR, WARNING], ERROR) == "3 more warnings, 1 more info"
+
+
+def test_toasts_are_coalesced(qapp):
+    notifier = RecordingNotifier(QObject(), interval=50)
+    for i in range(5):
+        notifier.record_received.emit(WARNING, f"warning {i}")
+    notifier.record_received.emit(ERROR, "error")
+    notifier.record_received.emit(WARNING, "last warning")
+    assert notifier.toasts == [("Warning", "warning 0")]
+    process_events_for(0.1)
+    assert notifier.toasts[1:] == [("Error", "error\n5 more warnings")]
+
+
+def test_init_logger_replaces_handlers(qapp):
+    logger = getLogger(PACKAGE_NAME)
+    handlers = list(logger.handlers)
+    try:
+        init_logger(QObject())
+        init_logger(QObject())
+        assert len(logger.handlers) == len(handlers) + 1
+        logger.debug("not shown")
+    finally:
+        remove_handlers(logger)
+    assert logger.handlers == handlers
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QImage, QPixmap
+
+from scoopick.core import Anchor, ScreenImage, Template, TemplateMatcher
+from scoopick.data import Point
+
+
+def make_frame(array: np.ndarray, origin=(0, 0)) -> ScreenImage:
+    height, width = array.shape[:2]
+    image = QImage(array.tobytes(), width, height, width * 3, QImage.Format.Format_RGB888).copy()
+    return ScreenImage(QPixmap.fromImage(image), origin=origin)
+
+
+@pytest.fixture
+def screen() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    array = np.full((240, 320, 3), 200, dtype=np.uint8)
+    for _ in range(40):
+        x, y, w, h = rng.integers(0, 300), rng.integers(0, 220), rng.integers(4, 60), rng.integers(4, 30)
+        array[y : y + h, x : x + w] = rng.integers(0, 255, 3)
+    return array
+
+
+def test_template_is_found(qapp, screen):
+    template = Template(screen[100:140, 150:214])
+    frame = make_frame(screen, origin=(10, 20))
+    match = TemplateMatcher().match(frame, template)
+    assert (match.x, match.y, match.width, match.height) == (160, 120, 64, 40)
+    assert match.score == pytest.approx(1, abs=1e-4)
+    # Full resolution only gives the same result
+    assert TemplateMatcher(max_levels=0).match(frame, template)[:4] == match[:4]
+
+
+def test_search_region(qapp, screen):
+    template = Template(screen[100:140, 150:214])
+    frame = make_frame(screen)
+    assert TemplateMatcher().match(frame, template, region=(140, 90, 90, 60)).rect == QRect(150, 100, 64, 40)
+    assert TemplateMatcher().match(frame, template, region=(0, 0, 100, 100)) is None
+
+
+def test_missing_template(qapp, screen):
+    rng = np.random.default_rng(1)
+    template = Template(rng.integers(0, 255, (32, 32, 3)))
+    assert TemplateMatcher().match(make_frame(screen), template) is None
+
+
+def test_scales(qapp, screen):
+    template = Template(screen[100:140, 150:214])
+    # The screen is shown twice larger
+    frame = make_frame(np.repeat(np.repeat(screen, 2, axis=0), 2, axis=1))
+    match = TemplateMatcher().match(frame, template, scales=(1.0, 2.0))
+    assert match.scale == 2.0
+    assert match.rect == QRect(300, 200, 128, 80)
+
+
+def test_anchor(qapp, screen, tmp_path):
+    anchor = Anchor.from_frame(make_frame(screen), (150, 100, 64, 40))
+    path = str(tmp_path / "anchor.png")
+    anchor.save(path)
+    anchor = Anchor.load(path)
+    assert anchor.origin == (150, 100)
+
+    # The window moved by (30, -20)
+    moved = np.full_like(screen, 200)
+    moved[:-20, 30:] = screen[20:, :-30]
+    match = anchor.locate(make_frame(moved))
+    assert match.rect == QRect(180, 80, 64, 40)
+    points = anchor.relocate([Point(x=160, y=110), Point(x=-1, y=-1)], match)
+    assert points.xy.tolist() == [[190, 90], [-1, -1]]
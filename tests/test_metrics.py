@@ -0,0 +1,118 @@
+import time
+
+import numpy as np
+import pytest
+from PySide6.QtCore import QRect
+
+from scoopick.metrics import Histogram, MetricsRegistry
+
+
+def test_disabled_registry_records_nothing():
+    metrics = MetricsRegistry()
+
+    @metrics.timed("call")
+    def call():
+        return 1
+
+    with metrics.timer("block"):
+        pass
+    metrics.observe("value", 0.1)
+    metrics.increment("counter")
+    assert call() == 1
+    assert metrics.histograms() == {} and metrics.counters() == {}
+
+
+def test_timers_and_counters():
+    metrics = MetricsRegistry(enabled=True)
+
+    @metrics.timed("call", kind="decorated")
+    def call():
+        time.sleep(0.002)
+
+    call()
+    call()
+    with metrics.timer("call", kind="block"):
+        pass
+    metrics.increment("pixels", 10)
+    metrics.increment("pixels", 5)
+    histograms = {key.format_labels(): histogram for key, histogram in metrics.histograms().items()}
+    assert histograms["kind=decorated"].count == 2
+    assert histograms["kind=decorated"].mean >= 0.002
+    assert histograms["kind=block"].count == 1
+    assert list(metrics.counters().values()) == [15]
+    metrics.reset()
+    assert metrics.histograms() == {}
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005,) * 50 + (0.005,) * 45 + (0.05,) * 5:
+        histogram.observe(value)
+    assert histogram.counts == [50, 45, 5, 0]
+    assert histogram.quantile(0.5) == pytest.approx(0.001)
+    assert 0.001 < histogram.quantile(0.9) < 0.01
+    assert histogram.quantile(1.0) == pytest.approx(0.05)
+
+
+def test_exports():
+    metrics = MetricsRegistry(enabled=True)
+    metrics.observe("capture", 0.003, backend="qt")
+    metrics.increment("runs", outcome="failed")
+    data = metrics.to_dict()
+    assert data["histograms"][0]["labels"] == {"backend": "qt"}
+    assert data["histograms"][0]["buckets"]["0.005"] == 1
+    text = metrics.to_prometheus()
+    assert "# TYPE scoopick_capture_seconds histogram" in text
+    assert 'scoopick_capture_seconds_bucket{backend="qt",le="+Inf"} 1' in text
+    assert 'scoopick_capture_seconds_count{backend="qt"} 1' in text
+    assert 'scoopick_runs_total{outcome="failed"} 1' in text
+
+
+def test_metrics_widget(qapp):
+    from scoopick.widgets import MetricsWidget
+
+    metrics = MetricsRegistry()
+    widget = MetricsWidget(metrics=metrics)
+    widget._record_box.setChecked(True)
+    assert metrics.enabled
+    metrics.observe("capture", 0.002, backend="qt")
+    widget.refresh()
+    assert widget.table.rowCount() == 1
+    assert [widget.table.item(0, column).text() for column in range(3)] == ["capture", "backend=qt", "1"]
+    widget.reset()
+    assert widget.table.rowCount() == 0
+
+
+def test_pixel_sampling_is_instrumented(qapp, monkeypatch):
+    from PySide6.QtGui import QPixmap
+
+    from scoopick.core import ScreenImage
+    from scoopick.metrics import PIXEL_SAMPLING, registry
+
+    monkeypatch.setattr(registry, "enabled", True)
+    registry.reset()
+    frame = ScreenImage(QPixmap(4, 4))
+    frame.get_pixel_color((1, 1))
+    frame.get_pixel_colors(np.array([(1, 1), (2, 2)]))
+    labels = {key.format_labels() for key in registry.histograms() if key.name == PIXEL_SAMPLING}
+    registry.reset()
+    assert labels == {"points=one", "points=many"}
+
+
+def test_work_is_counted(qapp, monkeypatch):
+    from scoopick.data import Point
+    from scoopick.metrics import CAPTURED_PIXELS, UPDATED_POINTS, registry
+    from scoopick.model import PointsModel
+    from scoopick.screenshot import grab
+
+    monkeypatch.setattr(registry, "enabled", True)
+    registry.reset()
+    model = PointsModel()
+    model.add_points([Point(name=f"p{i}", x=i, y=i) for i in range(3)])
+    model.update_positions([Point(idx=0, name="p0", x=5, y=5), Point(idx=2, name="p2", x=6, y=6)])
+    grab(QRect(0, 0, 4, 5))
+    counters = {(key.name, key.format_labels()): value for key, value in registry.counters().items()}
+    registry.reset()
+    assert counters[UPDATED_POINTS, "operation=add"] == 3
+    assert counters[UPDATED_POINTS, "operation=move_many"] == 2
+    assert counters[CAPTURED_PIXELS, "backend=qt"] == 20
@@ -0,0 +1,39 @@
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.core import MipmapCache
+
+
+def make_pixmap(width: int, height: int) -> QPixmap:
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor(10, 20, 30))
+    return pixmap
+
+
+def test_levels_are_built_on_demand(qapp):
+    cache = MipmapCache()
+    assert cache.set_source(make_pixmap(1600, 800))
+    assert cache.source_size == QSize(1600, 800)
+    level = cache.level_for_scale(0.2)
+    assert level.size() == QSize(400, 200)
+    assert level.pixelColor(10, 10) == QColor(10, 20, 30)
+    # Only the levels needed for the requested scale are built
+    assert [level.width() for level in cache._levels] == [1600, 800, 400]
+    assert cache.level_for_scale(1.0).size() == QSize(1600, 800)
+
+
+def test_levels_are_kept_until_the_source_changes(qapp):
+    cache = MipmapCache()
+    pixmap = make_pixmap(400, 200)
+    cache.set_source(pixmap)
+    cache.level_for_scale(0.25)
+    assert not cache.set_source(pixmap)
+    assert len(cache._levels) == 3
+    assert cache.set_source(make_pixmap(400, 200))
+    assert len(cache._levels) == 1
+
+
+def test_null_source(qapp):
+    cache = MipmapCache()
+    cache.set_source(QPixmap())
+    assert cache.source_size.isEmpty()
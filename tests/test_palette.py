@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+from scoopick.core import Classification, Palette, ScreenImage
+from scoopick.data import Point
+
+PALETTE = {"gray": (50, 50, 50), "green": (83, 141, 78), "yellow": (181, 159, 59)}
+
+
+def test_classify_colors():
+    palette = Palette(PALETTE)
+    colors = np.array([[52, 50, 49], [180, 160, 60], [90, 140, 70]])
+    assert palette.classify_colors(colors) == [
+        Classification("gray", 3),
+        Classification("yellow", 3),
+        Classification("green", 16),
+    ]
+
+
+def test_threshold_and_metric():
+    palette = Palette(PALETTE, metric="chebyshev", threshold=10)
+    assert palette.match((90, 140, 70)) == Classification("green", 8)
+    assert palette.match((255, 0, 0)).label is None
+    assert Palette(PALETTE, metric="euclidean").match((53, 54, 50)).distance == 5.0
+
+
+def test_classify_frame(qapp):
+    image = QImage(3, 1, QImage.Format.Format_RGB32)
+    image.fill(QColor(*PALETTE["gray"]))
+    image.setPixelColor(2, 0, QColor(*PALETTE["yellow"]))
+    frame = ScreenImage(QPixmap.fromImage(image))
+    labels = [label for label, _ in Palette(PALETTE).classify(frame, [Point(x=0, y=0), Point(x=2, y=0)])]
+    assert labels == ["gray", "yellow"]
+
+
+def test_invalid_palette():
+    with pytest.raises(ValueError):
+        Palette({})
+    with pytest.raises(ValueError):
+        Palette(PALETTE, metric="cosine")
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from scoopick.data import Point, PointSet, PointView
+
+
+@pytest.fixture
+def point_set() -> PointSet:
+    return PointSet.from_points(
+        [Point(name="a", x=1, y=2, color=(1, 2, 3)), Point(name="b", x=-1, y=-1), Point(name="c", x=5, y=6)]
+    )
+
+
+def test_arrays(point_set: PointSet):
+    assert point_set.xy.tolist() == [[1, 2], [-1, -1], [5, 6]]
+    assert point_set.colors[0].tolist() == [1, 2, 3]
+    assert point_set.names == ["a", "b", "c"]
+    assert point_set.is_set.tolist() == [True, False, True]
+
+
+def test_views_write_through(point_set: PointSet):
+    view = point_set[-1]
+    assert isinstance(view, PointView)
+    assert (view.idx, view.name, view.to_tuple(), str(view)) == (2, "c", (5, 6), "c (5, 6)")
+    view.x, view.color = 7, (9, 9, 9)
+    assert point_set.xy[2].tolist() == [7, 6]
+    assert point_set[2].color == (9, 9, 9)
+    assert view == Point(idx=2, name="c", x=7, y=6, color=(9, 9, 9))
+    assert Point(idx=2, name="c", x=7, y=6, color=(9, 9, 9)) == view
+
+
+def test_append_and_delete(point_set: PointSet):
+    for i in range(20):
+        point_set.append(Point(name=f"p{i}", x=i, y=i))
+    assert len(point_set) == 23
+    point_set.delete([0, 1, -1])
+    assert len(point_set) == 20
+    assert point_set.names[0] == "c"
+    assert point_set.to_points()[0] == Point(idx=0, name="c", x=5, y=6)
+    with pytest.raises(IndexError):
+        point_set.delete(20)
+
+
+def test_from_arrays():
+    xs, ys = np.meshgrid(np.arange(3), np.arange(2))
+    grid = PointSet.from_arrays(np.stack([xs.ravel(), ys.ravel()], axis=1))
+    assert len(grid) == 6
+    assert grid[4].to_tuple() == (1, 1)
+    assert grid[4].name == "Point 5"
+    assert grid[4].color == Point().color
+    with pytest.raises(ValueError):
+        PointSet.from_arrays([[0, 0]], names=["a", "b"])
+
+
+def test_copy_is_independent(point_set: PointSet):
+    copy = point_set.copy()
+    copy.set_xy(0, 10, 10)
+    copy.names[0] = "z"
+    assert point_set[0].to_tuple() == (1, 2)
+    assert point_set[0].name == "a"
+
+
+def test_points_model_round_trip(tmp_path):
+    from scoopick.model import PointsModel
+
+    model = PointsModel()
+    model.add_point(Point(name="extra", x=3, y=4, color=(7, 8, 9)))
+    model.select_points((model[0], model[2]))
+    model.remove_selected_points()
+    assert [point.name for point in model.points] == ["Point 2", "Point 4", "Point 5", "Point 6", "extra"]
+    assert [point.idx for point in model.selected_points] == [0, 2]
+
+    filepath = tmp_path / "points.json"
+    model.to_file(filepath)
+    loaded = PointsModel()
+    assert loaded.load_from_file(filepath)
+    assert loaded.points.to_points() == model.points.to_points()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from scoopick.data import Point
+from scoopick.model import PointsModel
+
+
+@pytest.fixture
+def model() -> PointsModel:
+    return PointsModel([Point(name=f"p{i}", x=i, y=i) for i in range(10)])
+
+
+@pytest.fixture
+def signals(model: PointsModel) -> "list[tuple]":
+    signals = []
+    model.dataChanged.connect(lambda first, last, *args: signals.append(("changed", first.row(), last.row())))
+    model.rowsInserted.connect(lambda parent, first, last: signals.append(("inserted", first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: signals.append(("removed", first, last)))
+    model.modelReset.connect(lambda: signals.append(("reset",)))
+    model.layoutChanged.connect(lambda *args: signals.append(("layout",)))
+    return signals
+
+
+def test_insert_and_remove_rows(model: PointsModel, signals: "list[tuple]"):
+    model.add_points([Point(name="a"), Point(name="b")])
+    model.remove_points([1, 2, 3, 7])
+    assert signals == [("inserted", 10, 11), ("removed", 7, 7), ("removed", 1, 3)]
+    assert [point.name for point in model.points] == ["p0", "p4", "p5", "p6", "p8", "p9", "a", "b"]
+
+
+def test_many_scattered_removals_reset_the_model(model: PointsModel, signals: "list[tuple]"):
+    model.add_points(Point(name=f"q{i}") for i in range(40))
+    model.remove_points(range(0, 50, 2))
+    assert signals[1:] == [("reset",)]
+    assert len(model.points) == 25
+
+
+def test_update_positions_emits_once(model: PointsModel, signals: "list[tuple]"):
+    model.update_positions([Point(idx=2, x=50, y=50), Point(idx=6, x=60, y=60)])
+    assert signals == [("changed", 2, 6)]
+    assert model[6].to_tuple() == (60, 60)
+    assert model.nearest_point(59, 59).idx == 6
+
+
+def test_batch_coalesces_updates(model: PointsModel, signals: "list[tuple]"):
+    with model.batch():
+        model.update_pos(Point(idx=3, x=30, y=30))
+        with model.batch():
+            model.update_pos(Point(idx=8, x=80, y=80))
+        assert signals == []
+        model.update_point(Point(idx=5, name="five", x=5, y=5))
+    assert signals == [("changed", 3, 8)]
+    assert model[5].name == "five"
+
+
+def test_batch_flushes_before_structural_changes(model: PointsModel, signals: "list[tuple]"):
+    with model.batch():
+        model.update_pos(Point(idx=9, x=1, y=1))
+        model.remove_point(model[0])
+    assert signals == [("changed", 9, 9), ("removed", 0, 0)]
+
+
+@pytest.mark.parametrize(
+    "point",
+    [{"name": "a", "x": 1, "y": 2, "color": [300, 0, 0]}, {"name": "a", "x": 2147483648, "y": 2}],
+)
+def test_load_rejects_out_of_range_values(model: PointsModel, tmp_path, point: dict):
+    path = tmp_path / "points.json"
+    path.write_text(json.dumps({"points": [point]}))
+    assert not model.load_from_file(str(path))
+    assert model.rowCount(None) == 10
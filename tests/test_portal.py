@@ -0,0 +1,151 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import pytest
+from PySide6.QtCore import (
+    ClassInfo,
+    QCoreApplication,
+    QEvent,
+    QEventLoop,
+    QObject,
+    QRunnable,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtDBus import QDBusConnection, QDBusObjectPath
+from PySide6.QtGui import QColor, QImage
+
+from scoopick.portal import (
+    PORTAL_PATH,
+    PORTAL_REQUEST_INTERFACE,
+    PORTAL_SCREENSHOT_INTERFACE,
+    ScreenshotPortal,
+    _PortalRequest,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("dbus-daemon") is None, reason="dbus-daemon not available")
+
+SERVICE = "org.scoopick.test.Portal"
+
+
+@ClassInfo({"D-Bus Interface": PORTAL_SCREENSHOT_INTERFACE})
+class FakePortal(QObject):
+    """Stand-in for the Screenshot portal, answering each request by writing a small PNG."""
+
+    def __init__(self, connection: QDBusConnection, client_name: str, respond: bool = True):
+        super().__init__()
+        self._connection = connection
+        self._sender = client_name.lstrip(":").replace(".", "_")
+        self._respond = respond
+        self.tokens = []
+
+    @Slot(str, "QVariantMap", result=QDBusObjectPath)
+    def Screenshot(self, parent_window: str, options: dict) -> QDBusObjectPath:
+        self.tokens.append(options["handle_token"])
+        handle = f"{PORTAL_PATH}/request/{self._sender}/{options['handle_token']}"
+        if self._respond:
+            QTimer.singleShot(10, lambda: self._send_response(handle, len(self.tokens)))
+        return QDBusObjectPath(handle)
+
+    def _send_response(self, handle: str, width: int):
+        image = QImage(width, 3, QImage.Format.Format_RGB32)
+        image.fill(QColor(1, 2, 3))
+        path = tempfile.mktemp(suffix=".png")
+        image.save(path)
+        request = FakeRequest(self)
+        assert self._connection.registerObject(handle, request, QDBusConnection.RegisterOption.ExportAllSignals)
+        request.Response.emit(0, {"uri": f"file://{path}"})
+
+
+@ClassInfo({"D-Bus Interface": PORTAL_REQUEST_INTERFACE})
+class FakeRequest(QObject):
+    Response = Signal("uint", "QVariantMap")
+
+
+@pytest.fixture
+def make_portal(qapp):
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    bus_address = daemon.stdout.readline().strip()
+    objects = []
+
+    def make(respond: bool = True):
+        service_bus = QDBusConnection.connectToBus(bus_address, "service")
+        client_bus = QDBusConnection.connectToBus(bus_address, "client")
+        fake = FakePortal(service_bus, client_bus.baseService(), respond)
+        assert service_bus.registerService(SERVICE)
+        assert service_bus.registerObject(PORTAL_PATH, fake, QDBusConnection.RegisterOption.ExportAllSlots)
+        portal = ScreenshotPortal(client_bus, service=SERVICE, timeout=500)
+        objects.extend((fake, portal))
+        return fake, portal
+
+    yield make
+    for name in ("client", "service"):
+        QDBusConnection.disconnectFromBus(name)
+    objects.clear()
+    daemon.terminate()
+    daemon.wait()
+
+
+def wait_for(portal: ScreenshotPortal, count: int) -> dict:
+    results = {}
+    loop = QEventLoop()
+
+    def store(request_id, value):
+        results[request_id] = value
+        if len(results) == count:
+            loop.quit()
+
+    portal.captured.connect(store)
+    portal.failed.connect(store)
+    QTimer.singleShot(3000, loop, loop.quit)
+    loop.exec()
+    return results
+
+
+def test_overlapping_requests(make_portal):
+    fake, portal = make_portal()
+    ids = [portal.request(), portal.request()]
+    results = wait_for(portal, 2)
+    assert sorted(results) == ids
+    assert all(isinstance(image, QImage) and not image.isNull() for image in results.values())
+    assert len(set(fake.tokens)) == 2
+
+
+def test_timeout(make_portal):
+    _, portal = make_portal(respond=False)
+    request_id = portal.request()
+    results = wait_for(portal, 1)
+    assert "timed out" in results[request_id]
+
+
+def test_decode_outlives_timed_out_request(make_portal, tmp_path, capsys):
+    _, portal = make_portal(respond=False)
+    portal.thread_pool.setMaxThreadCount(1)
+    gate = threading.Event()
+    # Hold the decode task back until the request is gone
+    portal.thread_pool.start(QRunnable.create(lambda: gate.wait(3)))
+    image = QImage(2, 2, QImage.Format.Format_RGB32)
+    path = str(tmp_path / "screenshot.png")
+    image.save(path)
+    request_id = portal.request()
+    request = portal.findChild(_PortalRequest)
+    failed = []
+    portal.failed.connect(lambda *args: failed.append(args))
+    request.on_response(0, {"uri": f"file://{path}"})
+    request._on_timeout()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+    gate.set()
+    assert portal.thread_pool.waitForDone(3000)
+    QCoreApplication.processEvents()
+    assert [request_id for request_id, _ in failed] == [request_id]
+    assert not os.path.exists(path)
+    assert "RuntimeError" not in capsys.readouterr().err
@@ -0,0 +1,114 @@
+import pytest
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.core import ScreenImage
+from scoopick.recording import (
+    FrameRecorder,
+    FrameRecording,
+    RecordingSource,
+    ReplaySource,
+)
+from scoopick.screenshot import Screenshot
+
+SCREENS = [QRect(0, 0, 1920, 1080), QRect(1920, 0, 1280, 1024)]
+
+
+def make_frame(color: "tuple[int, int, int]", origin: "tuple[int, int]" = (0, 0)) -> ScreenImage:
+    pixmap = QPixmap(64, 32)
+    pixmap.fill(QColor(*color))
+    return ScreenImage(pixmap, origin)
+
+
+@pytest.fixture
+def recording_path(qapp, tmp_path) -> str:
+    path = str(tmp_path / "session.rec")
+    with FrameRecorder(path, SCREENS) as recorder:
+        recorder.write(make_frame((10, 20, 30)), timestamp=5.0)
+        recorder.write(make_frame((10, 20, 30)), timestamp=5.25)
+        recorder.write(make_frame((40, 50, 60), origin=(1900, 100)), timestamp=6.0)
+    return path
+
+
+def test_recording_round_trip(recording_path):
+    recording = FrameRecording(recording_path)
+    assert len(recording) == 3
+    assert recording.timestamps.tolist() == [0.0, 0.25, 1.0]
+    assert recording.screens == SCREENS
+    assert recording.frame_rect(2) == QRect(1900, 100, 64, 32)
+    # The repeated frame is stored once
+    assert recording.pixels(0).ctypes.data == recording.pixels(1).ctypes.data
+    assert recording[1].get_pixel_color((3, 3)) == (10, 20, 30)
+    assert [recording.index_at(t) for t in (0.0, 0.3, 0.99, 5.0)] == [0, 1, 1, 2]
+
+
+def test_recording_crops_regions(recording_path):
+    recording = FrameRecording(recording_path)
+    frame = recording.frame(2, QRect(1950, 110, 100, 100))
+    assert frame.rect == QRect(1950, 110, 14, 22)
+    assert frame.get_pixel_color((1960, 120)) == (40, 50, 60)
+    # Frames hold a QImage, usable off the GUI thread without converting a pixmap
+    assert frame.to_image() is frame
+    assert recording.frame(2, QRect(0, 0, 10, 10)).is_null
+
+
+def test_incomplete_recording(qapp, tmp_path):
+    path = tmp_path / "broken.rec"
+    path.write_bytes(b"SCOOPREC" + bytes(64))
+    with pytest.raises(ValueError):
+        FrameRecording(str(path))
+
+
+def test_replay_frame_by_frame(recording_path):
+    source = ReplaySource(recording_path, speed=None)
+    colors = [source.grab(None).get_pixel_color((1910, 110)) for _ in range(4)]
+    assert colors == [(0, 0, 0), (0, 0, 0), (40, 50, 60), (40, 50, 60)]
+    assert source.finished
+    source.rewind()
+    assert not source.finished
+
+
+def test_replay_at_recorded_speed(recording_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("scoopick.recording.time.monotonic", lambda: now[0])
+    source = ReplaySource(recording_path, speed=2.0)
+    assert source.grab(None).origin == (0, 0)
+    now[0] += 0.6
+    assert source.grab(None).origin == (1900, 100)
+    assert source.finished
+
+
+def test_screenshot_replays_recording(recording_path):
+    screenshot = Screenshot(ReplaySource(recording_path, speed=None))
+    assert screenshot.screen_rects() == SCREENS
+    frame = screenshot.screenshot_sync(region=(0, 0, 8, 8))
+    assert frame.size == (8, 8) and frame.get_pixel_color((1, 1)) == (10, 20, 30)
+    screenshot.screenshot_sync()
+    # Regions are resolved against the recorded screens, not the current ones
+    frame = screenshot.screenshot_sync(region=1)
+    assert frame.rect == QRect(1920, 100, 44, 32)
+
+
+def test_record_and_replay(recording_path, tmp_path):
+    path = str(tmp_path / "copy.rec")
+    source = RecordingSource(path, ReplaySource(recording_path, speed=None))
+    for _ in range(3):
+        source.grab(None)
+    source.close()
+    copy = FrameRecording(path)
+    assert len(copy) == 3 and copy.screens == SCREENS
+    assert [copy.frame_rect(i) for i in range(3)] == [FrameRecording(recording_path).frame_rect(i) for i in range(3)]
+
+
+def test_recording_the_screens_uses_the_portal(recording_path, tmp_path):
+    path = str(tmp_path / "wayland.rec")
+    screenshot = Screenshot(RecordingSource(path))
+    # As on Wayland
+    screenshot._portal = object()
+    assert screenshot._uses_portal
+    screenshot._captured(make_frame((1, 2, 3)))
+    screenshot.source.close()
+    assert len(FrameRecording(path)) == 1
+    screenshot = Screenshot(RecordingSource(str(tmp_path / "copy.rec"), ReplaySource(recording_path)))
+    screenshot._portal = object()
+    assert not screenshot._uses_portal
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QEventLoop, QThread, QTimer
+
+from scoopick.data import Point
+from scoopick.runner import (
+    AsyncScriptRunner,
+    CancelToken,
+    ScriptRunner,
+    create_runner,
+    qt_event_loop,
+)
+from scoopick.screenshot import Screenshot, screen_geometries
+
+
+def run_to_end(runner: ScriptRunner) -> "list[str]":
+    events = []
+    loop = QEventLoop()
+    runner.succeeded.connect(lambda: events.append("succeeded"))
+    runner.cancelled.connect(lambda: events.append("cancelled"))
+    runner.failed.connect(lambda error: events.append(f"failed: {error}"))
+    runner.progress.connect(lambda done, total: events.append(f"{done}/{total}"))
+    if isinstance(runner, AsyncScriptRunner):
+        # Async scripts need asyncio to drive the application, as the GUI and the CLI do
+        app = QCoreApplication.instance()
+        timeout = QTimer(singleShot=True, interval=5000)
+        timeout.timeout.connect(app.quit)
+        runner.finished.connect(app.quit)
+        timeout.start()
+        QTimer.singleShot(0, runner.start)
+        qt_event_loop().run_forever()
+        timeout.stop()
+        return events
+    runner.finished.connect(loop.quit)
+    QTimer.singleShot(5000, loop, loop.quit)
+    runner.start()
+    loop.exec()
+    return events
+
+
+def test_script_runs_off_gui_thread(qapp):
+    calls = {}
+
+    def run(points, capture_screenshot, progress):
+        calls["thread"] = QThread.currentThread()
+        calls["frame"] = capture_screenshot(region=(0, 0, 5, 5))
+        calls["points"] = points
+        progress(1, 2)
+
+    points = [Point(idx=0, name="a", x=1, y=2)]
+    runner = ScriptRunner(run, points, Screenshot())
+    assert run_to_end(runner) == ["1/2", "succeeded"]
+    assert calls["thread"] is not qapp.thread()
+    assert calls["frame"].size == (5, 5)
+    assert calls["points"] == points and calls["points"][0] is not points[0]
+
+
+def test_script_cancelled(qapp):
+    started = threading.Event()
+
+    def run(points, capture_screenshot, cancel_token: CancelToken):
+        started.set()
+        while True:
+            cancel_token.wait(0.01)
+            capture_screenshot(region=(0, 0, 1, 1))
+
+    runner = ScriptRunner(run, [], Screenshot())
+    QTimer.singleShot(50, runner.cancel)
+    assert run_to_end(runner) == ["cancelled"]
+    assert started.is_set()
+
+
+def test_wait_on_gui_thread(qapp):
+    started = threading.Event()
+
+    def run(points, capture_screenshot):
+        started.set()
+        while True:
+            # Blocks until the GUI thread runs the capture
+            capture_screenshot(region=(0, 0, 1, 1))
+
+    runner = ScriptRunner(run, [], Screenshot())
+    runner.start()
+    assert started.wait(2)
+    runner.cancel()
+    assert runner.wait(2000)
+    assert not runner.running
+
+
+def test_script_failed(qapp):
+    def run(points, capture_screenshot):
+        raise RuntimeError("boom")
+
+    assert run_to_end(ScriptRunner(run, [], Screenshot())) == ["failed: boom"]
+
+
+def test_async_script_runs_on_gui_thread(qapp):
+    calls = {}
+
+    async def run(points, capture_screenshot, wait_for_change, progress):
+        calls["thread"] = QThread.currentThread()
+        calls["frames"] = await asyncio.gather(*(capture_screenshot(region=(x, 0, 5, 5)) for x in range(3)))
+        calls["changed"] = await wait_for_change(region=(0, 0, 5, 5), timeout=0.05)
+        progress(1, 2)
+
+    runner = create_runner(run, [], Screenshot())
+    assert isinstance(runner, AsyncScriptRunner)
+    assert run_to_end(runner) == ["1/2", "succeeded"]
+    assert not runner.running
+    assert calls["thread"] is qapp.thread()
+    assert [frame.origin for frame in calls["frames"]] == [(0, 0), (1, 0), (2, 0)]
+    assert isinstance(calls["changed"], bool)
+
+
+def test_async_script_cancelled(qapp):
+    async def run(points, capture_screenshot):
+        while True:
+            await asyncio.sleep(0.01)
+
+    runner = create_runner(run, [], Screenshot())
+    QTimer.singleShot(50, runner.cancel)
+    assert run_to_end(runner) == ["cancelled"]
+
+
+def test_async_script_needs_the_asyncio_loop(qapp):
+    async def run(points, capture_screenshot):
+        pass
+
+    with pytest.raises(RuntimeError):
+        create_runner(run, [], Screenshot()).start()
+
+
+def test_actions_get_the_screens_from_the_gui_thread(qapp):
+    calls = {}
+
+    def run(points, capture_screenshot, actions):
+        calls["actions"] = actions(interval=0.1)
+
+    assert run_to_end(ScriptRunner(run, [], Screenshot())) == ["succeeded"]
+    assert calls["actions"]._screens == screen_geometries()
@@ -0,0 +1,51 @@
+from scoopick.data import Schema, ValidationIssue, validate, validate_data
+from scoopick.data.schema import _points_look_valid, get_validator
+
+
+def test_validator_is_compiled_once():
+    assert get_validator(Schema.POINTS) is get_validator(Schema.POINTS)
+
+
+def test_valid_points():
+    data = {
+        "$schema": "points_schema.json",
+        "points": [
+            {"idx": 0, "name": "a", "x": 1, "y": 2, "color": [1, 2, 3]},
+            {"name": "b", "x": -1, "y": -1},
+        ],
+    }
+    assert _points_look_valid(data)
+    assert validate(Schema.POINTS, data) == []
+    assert validate_data(Schema.POINTS, data)
+
+
+def test_invalid_points_are_reported():
+    data = {"points": [{"name": "a", "x": 1, "y": 2}, {"name": "b", "x": 1.5, "y": 2, "color": [1, 2]}, 3]}
+    assert not _points_look_valid(data)
+    issues = validate(Schema.POINTS, data)
+    assert {issue.path for issue in issues} == {"points/1/x", "points/1/color", "points/2"}
+    assert not validate_data(Schema.POINTS, data)
+
+
+def test_precheck_is_stricter_than_schema():
+    # Accepted by the schema, but not by the fast path: the full validation still runs
+    data = {"points": [{"name": "a", "x": 1.0, "y": 2}], "other": True}
+    assert not _points_look_valid(data)
+    assert validate(Schema.POINTS, data) == []
+
+
+def test_issue_str():
+    assert str(ValidationIssue("points/0/x", "bad")) == "points/0/x: bad"
+    assert str(ValidationIssue("", "bad")) == "bad"
+
+
+def test_color_components_are_bytes():
+    data = {"points": [{"name": "a", "x": 1, "y": 2, "color": [300, 0, -1]}]}
+    assert not _points_look_valid(data)
+    assert {issue.path for issue in validate(Schema.POINTS, data)} == {"points/0/color/0", "points/0/color/2"}
+
+
+def test_coordinates_fit_in_int32():
+    data = {"points": [{"name": "a", "x": 2**31, "y": -(2**31) - 1}, {"name": "b", "x": 2**31 - 1, "y": -(2**31)}]}
+    assert not _points_look_valid(data)
+    assert {issue.path for issue in validate(Schema.POINTS, data)} == {"points/0/x", "points/0/y"}
@@ -0,0 +1,132 @@
+import asyncio
+
+from PySide6.QtCore import QRect
+from PySide6.QtGui import QColor, QGuiApplication, QPixmap
+
+import scoopick.screenshot as screenshot_module
+from scoopick.core import ScreenImage
+from scoopick.data import Point
+from scoopick.screenshot import (
+    AUTO_REGION,
+    Screenshot,
+    desktop_rect,
+    points_bounding_rect,
+    screen_rects,
+    split_region,
+    stitch,
+    to_global,
+)
+
+
+def test_points_bounding_rect():
+    points = [Point(x=10, y=20), Point(x=30, y=25), Point(x=-1, y=-1)]
+    assert points_bounding_rect(points, margin=2) == QRect(8, 18, 25, 10)
+    assert points_bounding_rect([Point(x=-1, y=-1)]).isEmpty()
+
+
+def test_region_capture(qapp):
+    screenshot = Screenshot()
+    frame = screenshot.screenshot_sync(region=(10, 20, 30, 40))
+    assert frame.size == (30, 40)
+    assert frame.origin == (10, 20)
+    assert frame.rect == QRect(10, 20, 30, 40)
+
+
+def test_auto_region_capture(qapp):
+    screenshot = Screenshot()
+    screenshot.track_points([Point(x=50, y=60), Point(x=70, y=65)], margin=5)
+    frame = screenshot.screenshot_sync(region=AUTO_REGION)
+    assert frame.rect == QRect(45, 55, 31, 16)
+
+
+def test_full_capture(qapp):
+    screenshot = Screenshot()
+    frame = screenshot.screenshot_sync()
+    assert frame.origin == (0, 0)
+    assert not frame.is_null
+
+
+def test_stream(qapp):
+    screenshot = Screenshot()
+    with screenshot.stream(fps=100, region=(0, 0, 20, 10), capacity=3) as stream:
+        frame = stream.next_frame(timeout=2)
+        assert frame is not None
+        assert frame.image.rect == QRect(0, 0, 20, 10)
+        # Frames are grabbed on the GUI thread, and only QImages are sent to the stream thread
+        assert frame.image.to_image() is frame.image
+        assert stream.next_frame(after=frame.timestamp, timeout=2).timestamp > frame.timestamp
+        assert stream.latest() is not None
+        assert len(stream.frames()) <= 3
+    assert not stream.running
+
+
+def test_screenshot_async(qapp):
+    frame = asyncio.run(Screenshot().screenshot_async(region=(0, 0, 5, 5)))
+    # Grabbed on this thread, then converted on a worker thread without touching the pixmap
+    assert frame.size == (5, 5) and frame.to_image() is frame
+
+
+def test_split_region():
+    rects = [QRect(0, 0, 100, 50), QRect(100, 0, 200, 100)]
+    assert split_region(QRect(90, 10, 20, 20), rects) == [(0, QRect(90, 10, 10, 20)), (1, QRect(100, 10, 10, 20))]
+    assert split_region(QRect(150, 60, 10, 10), rects) == [(1, QRect(150, 60, 10, 10))]
+    assert split_region(QRect(0, 60, 10, 10), rects) == []
+
+
+def test_stitch(qapp):
+    left, right = QPixmap(10, 20), QPixmap(10, 20)
+    left.fill(QColor(255, 0, 0))
+    right.fill(QColor(0, 0, 255))
+    frame = ScreenImage(
+        stitch(QRect(90, 0, 20, 30), [ScreenImage(left, origin=(90, 0)), ScreenImage(right, origin=(100, 0))]),
+        origin=(90, 0),
+    )
+    assert frame.size == (20, 30)
+    assert frame.get_pixel_color((95, 5)) == (255, 0, 0)
+    assert frame.get_pixel_color((105, 5)) == (0, 0, 255)
+    # Not covered by any screen
+    assert frame.get_pixel_color((105, 25)) == (0, 0, 0)
+
+
+def test_screen_index_region(qapp):
+    screenshot = Screenshot()
+    frame = screenshot.screenshot_sync(region=0)
+    assert frame.rect == screen_rects()[0]
+    assert desktop_rect().contains(frame.rect)
+
+
+def test_capture_across_screens(qapp, monkeypatch):
+    # Pretend the screen is split into two side by side screens
+    screen = QGuiApplication.primaryScreen()
+    monkeypatch.setattr(
+        screenshot_module, "_screens", lambda: [(screen, QRect(0, 0, 100, 100)), (screen, QRect(100, 0, 100, 100))]
+    )
+    frame = Screenshot().screenshot_sync(region=(90, 10, 20, 30))
+    assert frame.rect == QRect(90, 10, 20, 30)
+    assert Screenshot().screenshot_sync(region=(110, 10, 20, 30)).rect == QRect(110, 10, 20, 30)
+
+
+def test_to_global():
+    # A 4K screen at 200% on the right of a full HD one
+    screens = [(QRect(0, 0, 1920, 1080), 1.0), (QRect(1920, 0, 1920, 1080), 2.0)]
+    assert to_global((100, 50), screens) == (100, 50)
+    assert to_global((3840 + 100, 50), screens) == (1920 + 50, 25)
+    # Outside of the screens, the closest one is used
+    assert to_global((3840 + 3900, 50), screens) == (1920 + 1950, 25)
+    # Screen coordinates start at the top-left corner of the virtual desktop, the OS ones at the primary screen
+    screens = [(QRect(0, 0, 1920, 1080), 1.0), (QRect(-1280, -200, 1280, 1024), 1.0)]
+    assert to_global((1280 + 10, 200 + 20), screens) == (10, 20)
+    assert to_global((5, 5), screens) == (-1275, -195)
+
+
+def test_stream_without_application(qapp, monkeypatch):
+    from scoopick import stream as stream_module
+
+    class NoApplication:
+        @staticmethod
+        def instance():
+            return None
+
+    monkeypatch.setattr(stream_module, "QCoreApplication", NoApplication)
+    stream = stream_module.FrameStream(30)
+    assert not stream.running
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from scoopick.data import Point
+from scoopick.model import GridIndex, PointsModel
+
+
+@pytest.fixture
+def coords() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    coords = rng.integers(0, 1000, (2000, 2))
+    coords[::10] = -1
+    return coords
+
+
+def brute_force_distances(coords: np.ndarray, x: int, y: int) -> np.ndarray:
+    distances = np.hypot(*(coords - (x, y)).T)
+    distances[(coords < 0).any(axis=1)] = np.inf
+    return distances
+
+
+def test_nearest_and_radius_match_brute_force(coords: np.ndarray):
+    index = GridIndex.from_points(coords, cell_size=16)
+    rng = np.random.default_rng(1)
+    for x, y in rng.integers(-50, 1050, (100, 2)).tolist():
+        distances = brute_force_distances(coords, x, y)
+        assert distances[index.nearest(x, y)] == distances.min()
+        assert sorted(index.within_radius(x, y, 40).tolist()) == np.flatnonzero(distances <= 40).tolist()
+
+
+def test_nearest_far_away(coords: np.ndarray):
+    index = GridIndex.from_points(coords, cell_size=1)
+    for x, y in ((10**9, 10**9), (0, 10**9), (500, 500)):
+        distances = brute_force_distances(coords, x, y)
+        assert distances[index.nearest(x, y)] == distances.min()
+    sparse = GridIndex.from_points(np.array([(0, 0), (5000, 5000)]), cell_size=1)
+    assert sparse.nearest(2400, 2400) == 0 and sparse.nearest(2600, 2600) == 1
+
+
+def test_in_rect(coords: np.ndarray):
+    index = GridIndex.from_points(coords)
+    xs, ys = coords.T
+    expected = np.flatnonzero((xs >= 100) & (xs < 300) & (ys >= 50) & (ys < 60))
+    assert index.in_rect(100, 50, 200, 10).tolist() == expected.tolist()
+    assert index.in_rect(0, 0, 0, 10).tolist() == []
+
+
+def test_move(coords: np.ndarray):
+    index = GridIndex.from_points(coords)
+    index.move(0, 5000, 5000)
+    assert index.nearest(5001, 5001) == 0
+    index.move(0, -1, -1)
+    assert index.nearest(5001, 5001) != 0
+    assert index.nearest(0, 0, max_distance=0.5) is None
+
+
+def test_model_queries_follow_updates():
+    model = PointsModel([Point(name="a", x=10, y=10), Point(name="b", x=100, y=100), Point(name="c", x=-1, y=-1)])
+    assert model.nearest_point(12, 12).name == "a"
+    model.update_pos(Point(idx=2, x=13, y=13))
+    assert model.nearest_point(12, 12).name == "c"
+    assert [point.name for point in model.points_near(12, 12, 5)] == ["c", "a"]
+    assert [point.name for point in model.points_in_rect(50, 50, 100, 100)] == ["b"]
+    model.add_point(Point(name="d", x=12, y=12))
+    assert model.nearest_point(12, 12).name == "d"
@@ -0,0 +1,55 @@
+from PySide6.QtCore import QPointF, QSize
+from PySide6.QtGui import QColor, QPixmap
+
+from scoopick.widgets import ScreenshotViewer
+
+
+def make_viewer(width: int = 200, height: int = 100) -> ScreenshotViewer:
+    viewer = ScreenshotViewer()
+    viewer.resize(width, height)
+    pixmap = QPixmap(QSize(100, 50))
+    pixmap.fill(QColor(0, 0, 255))
+    viewer.set_pixmap(pixmap)
+    return viewer
+
+
+def test_fit_and_mapping(qapp):
+    viewer = make_viewer()
+    assert viewer.scale == 2
+    assert viewer.transform() == (2, 0, 0)
+    assert viewer.map_to_image(QPointF(41, 21)) == (20, 10)
+    assert viewer.map_from_image(20, 10) == QPointF(41, 21)
+    assert viewer.map_to_image(QPointF(-1, 21)) == (-1, -1)
+
+
+def test_screenshot_is_centered_when_aspect_ratios_differ(qapp):
+    viewer = make_viewer(300, 100)
+    assert viewer.transform() == (2, 50, 0)
+    assert viewer.map_to_image(QPointF(20, 20)) == (-1, -1)
+
+
+def test_zoom_keeps_anchor_in_place(qapp):
+    viewer = make_viewer()
+    anchor = QPointF(41, 21)
+    viewer.zoom_to(4, anchor)
+    assert viewer.scale == 8
+    assert viewer.map_to_image(anchor) == (20, 10)
+    # Zooming out never goes below the fitting scale
+    viewer.zoom_to(0.1)
+    assert viewer.zoom == 1
+    assert viewer.transform() == (2, 0, 0)
+
+
+def test_view_stays_on_the_screenshot(qapp):
+    viewer = make_viewer()
+    viewer.zoom_to(4, QPointF(0, 0))
+    assert viewer.map_to_image(QPointF(0, 0)) == (0, 0)
+    viewer.reset_view()
+    assert viewer.zoom == 1
+
+
+def test_tiles_are_painted(qapp):
+    viewer = make_viewer()
+    image = viewer.grab().toImage()
+    assert image.pixelColor(100, 50).getRgb()[:3] == (0, 0, 255)
+    assert viewer._tiles
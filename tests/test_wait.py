@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+from scoopick.core import AsyncWaiter, ScreenImage, Waiter, frames_differ
+
+
+def make_frame(color: "tuple[int, int, int]") -> ScreenImage:
+    image = QImage(4, 4, QImage.Format.Format_RGB32)
+    image.fill(QColor(*color))
+    return ScreenImage(QPixmap.fromImage(image))
+
+
+class FakeCapture:
+    """Returns a new color every `period` captures, up to the last one."""
+
+    def __init__(self, colors: "list[tuple[int, int, int]]", period: int = 1):
+        self._frames = [make_frame(color) for color in colors]
+        self._period = period
+        self.calls = 0
+
+    def __call__(self, region=None) -> ScreenImage:
+        frame = self._frames[min(self.calls // self._period, len(self._frames) - 1)]
+        self.calls += 1
+        return frame
+
+
+@pytest.fixture
+def waiter_factory(qapp):
+    return lambda capture: Waiter(capture, min_interval=0.001, max_interval=0.005)
+
+
+def test_frames_differ(qapp):
+    assert not frames_differ(make_frame((1, 2, 3)), make_frame((1, 2, 3)))
+    assert frames_differ(make_frame((1, 2, 3)), make_frame((1, 2, 5)))
+    assert not frames_differ(make_frame((1, 2, 3)), make_frame((1, 2, 5)), threshold=2)
+
+
+def test_wait_for_color(waiter_factory):
+    capture = FakeCapture([(0, 0, 0), (0, 0, 0), (100, 50, 0)])
+    assert waiter_factory(capture).wait_for_color((1, 1), (98, 50, 0), tolerance=5, timeout=1)
+    assert capture.calls == 3
+    assert not waiter_factory(FakeCapture([(0, 0, 0)])).wait_for_color((1, 1), (255, 0, 0), timeout=0.02)
+
+
+def test_wait_for_change(waiter_factory):
+    assert waiter_factory(FakeCapture([(0, 0, 0), (0, 0, 0), (1, 0, 0)])).wait_for_change(timeout=1)
+    assert not waiter_factory(FakeCapture([(0, 0, 0)])).wait_for_change(timeout=0.02)
+
+
+def test_wait_until_stable(waiter_factory):
+    capture = FakeCapture([(0, 0, 0), (10, 0, 0), (20, 0, 0), (30, 0, 0)])
+    assert waiter_factory(capture).wait_until_stable(settle_ms=20, timeout=1)
+    assert capture.calls > 4
+    flickering = FakeCapture([(i % 2, 0, 0) for i in range(1000)])
+    assert not waiter_factory(flickering).wait_until_stable(settle_ms=20, timeout=0.05)
+
+
+def test_async_waiter(qapp):
+    capture = FakeCapture([(0, 0, 0), (0, 0, 0), (100, 50, 0)])
+
+    async def capture_async(region=None) -> ScreenImage:
+        return capture(region)
+
+    waiter = AsyncWaiter(capture_async, min_interval=0.001, max_interval=0.005)
+    assert asyncio.run(waiter.wait_for_color((1, 1), (100, 50, 0), timeout=1))
+    assert not asyncio.run(waiter.wait_for_change(timeout=0.02))
+    assert asyncio.run(waiter.wait_until_stable(settle_ms=5, timeout=1))